@@ -6,15 +6,106 @@ Command actions module for TacticalMesh Node Agent.
 Provides built-in command handlers and extensibility for custom actions.
 """
 
-import json
+import copy
 import logging
-import subprocess
+import mmap
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional, Type
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Type
+
+try:
+    import yaml
+    from .config import YamlLoader, YamlDumper
+except ImportError:  # PyYAML not installed; UPDATE_CONFIG is unavailable
+    yaml = None
 
 logger = logging.getLogger(__name__)
 
+# Parsed YAML files keyed by path: ((st_mtime_ns, st_size), parsed mapping)
+_yaml_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+
+def _load_yaml_cached(path: str) -> Dict[str, Any]:
+    """
+    Load a YAML mapping, reusing the previous parse while the file is unchanged.
+    
+    The file is stat'ed on every call and only re-parsed when its mtime or
+    size differ from the cached entry. The returned dict is shared with the
+    cache and must be copied before it is modified.
+    
+    Args:
+        path: Path to the YAML file
+        
+    Returns:
+        Parsed mapping, or an empty dict if the file does not exist
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        _yaml_cache.pop(path, None)
+        return {}
+    
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _yaml_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    if yaml is None:
+        raise RuntimeError("PyYAML is required to read configuration files")
+    
+    if st.st_size == 0:
+        parsed = {}
+    else:
+        # Parse straight from a read-only mapping to skip the read() copy
+        with open(path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            parsed = yaml.load(mm, Loader=YamlLoader) or {}
+    _yaml_cache[path] = (key, parsed)
+    return parsed
+
+
+def _dump_yaml_cached(path: str, data: Dict[str, Any]) -> None:
+    """Write a YAML mapping and record it in the cache under the new mtime."""
+    if yaml is None:
+        raise RuntimeError("PyYAML is required to write configuration files")
+    
+    with open(path, 'w') as f:
+        yaml.dump(data, f, Dumper=YamlDumper, default_flow_style=False)
+    st = os.stat(path)
+    _yaml_cache[path] = ((st.st_mtime_ns, st.st_size), copy.deepcopy(data))
+
+
+def deep_update(base: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Recursively merge ``updates`` into ``base`` in place.
+    
+    Nested dicts present on both sides are merged key by key; any other
+    value replaces the one in ``base``. Uses an explicit stack instead of
+    recursion.
+    
+    Args:
+        base: Mapping to update
+        updates: Values to merge in
+        
+    Returns:
+        The updated ``base``
+    """
+    stack = [(base, updates)]
+    while stack:
+        target, source = stack.pop()
+        for key, value in source.items():
+            if type(value) is dict:
+                existing = target.get(key)
+                if type(existing) is dict:
+                    stack.append((existing, value))
+                    continue
+            target[key] = value
+    return base
+
 
 class CommandResult:
     """Result of a command execution."""
@@ -49,6 +140,9 @@ class ActionHandler(ABC):
             CommandResult with execution outcome
         """
         pass
+    
+    def close(self) -> None:
+        """Release resources held by the handler; called on agent shutdown."""
 
 
 class PingHandler(ActionHandler):
@@ -58,7 +152,7 @@ class PingHandler(ActionHandler):
         logger.info("Executing PING command")
         return CommandResult(
             success=True,
-            result={"message": "pong", "timestamp": __import__('datetime').datetime.utcnow().isoformat()}
+            result={"message": "pong", "timestamp": datetime.utcnow().isoformat()}
         )
 
 
@@ -79,7 +173,7 @@ class ReloadConfigHandler(ActionHandler):
                 result={"message": "Configuration reloaded", "config_path": self.config_path}
             )
         except Exception as e:
-            logger.error(f"Failed to reload config: {e}")
+            logger.error("Failed to reload config: %s", e)
             return CommandResult(success=False, error=str(e))
 
 
@@ -88,6 +182,8 @@ class UpdateConfigHandler(ActionHandler):
     
     def __init__(self, config_path: str):
         self.config_path = config_path
+        # Commands run on a thread pool; serialize the read-modify-write
+        self._lock = threading.Lock()
     
     def execute(self, payload: Optional[Dict[str, Any]]) -> CommandResult:
         logger.info("Executing UPDATE_CONFIG command")
@@ -95,42 +191,33 @@ class UpdateConfigHandler(ActionHandler):
         if not payload:
             return CommandResult(success=False, error="No configuration payload provided")
         
+        with self._lock:
+            return self._apply_update(payload)
+    
+    def _apply_update(self, payload: Dict[str, Any]) -> CommandResult:
+        """Merge the payload's config into the file on disk."""
         try:
             config_updates = payload.get("config", {})
             
-            # Load existing config
-            config_file = Path(self.config_path)
-            if config_file.exists():
-                import yaml
-                with open(config_file, 'r') as f:
-                    current_config = yaml.safe_load(f) or {}
-            else:
-                current_config = {}
+            # Load existing config (cached while the file is unchanged)
+            cached_config = _load_yaml_cached(self.config_path)
+            current_config = copy.deepcopy(cached_config)
             
             # Merge updates
-            def deep_update(base: dict, updates: dict) -> dict:
-                for key, value in updates.items():
-                    if isinstance(value, dict) and key in base and isinstance(base[key], dict):
-                        deep_update(base[key], value)
-                    else:
-                        base[key] = value
-                return base
-            
             updated_config = deep_update(current_config, config_updates)
             
-            # Write back
-            import yaml
-            with open(config_file, 'w') as f:
-                yaml.dump(updated_config, f, default_flow_style=False)
+            # Write back, skipping the write when nothing changed
+            if updated_config != cached_config or not Path(self.config_path).exists():
+                _dump_yaml_cached(self.config_path, updated_config)
             
-            logger.info(f"Configuration updated: {list(config_updates.keys())}")
+            logger.info("Configuration updated: %s", list(config_updates))
             return CommandResult(
                 success=True,
                 result={"message": "Configuration updated", "updated_keys": list(config_updates.keys())}
             )
             
         except Exception as e:
-            logger.error(f"Failed to update config: {e}")
+            logger.error("Failed to update config: %s", e)
             return CommandResult(success=False, error=str(e))
 
 
@@ -152,29 +239,210 @@ class ChangeRoleHandler(ActionHandler):
             if self.role_callback:
                 self.role_callback(new_role)
             
-            logger.info(f"Role changed to: {new_role}")
+            logger.info("Role changed to: %s", new_role)
             return CommandResult(
                 success=True,
                 result={"message": f"Role changed to {new_role}", "new_role": new_role}
             )
         except Exception as e:
-            logger.error(f"Failed to change role: {e}")
+            logger.error("Failed to change role: %s", e)
             return CommandResult(success=False, error=str(e))
 
 
+# Seconds a CUSTOM script may run before it is considered hung
+CUSTOM_SCRIPT_TIMEOUT_SECONDS = 60
+
+
+class _WorkerUnavailable(Exception):
+    """Raised when a request could not be delivered to a script worker."""
+
+
+class PersistentScriptWorker:
+    """
+    Long-lived child process serving CUSTOM action requests over stdio.
+    
+    Avoids a fork+exec per command for scripts that support batch mode.
+    The script is started once as ``<script_path> --batch`` and must then:
+    
+    - read one JSON-encoded params object per line from stdin
+    - write one JSON object per line to stdout with ``returncode`` and
+      optional ``stdout``/``stderr`` strings
+    - exit when stdin is closed
+    
+    Requests are serialized with a lock, so one worker handles one
+    command at a time. A script that exits or answers with anything but a
+    JSON object before its first valid response is not batch-capable;
+    that is reported as ``_WorkerUnavailable``.
+    """
+    
+    def __init__(self, script_path: str, timeout: float = CUSTOM_SCRIPT_TIMEOUT_SECONDS):
+        self.script_path = script_path
+        self.timeout = timeout
+        self._process = None
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        # Set once the script has answered a request in batch mode
+        self._answered = False
+    
+    def _ensure_started(self) -> None:
+        """Spawn the worker process if it is not running."""
+        import subprocess
+        
+        if self._process is not None and self._process.poll() is None:
+            return
+        self._buffer.clear()
+        try:
+            self._process = subprocess.Popen(
+                [self.script_path, "--batch"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            self._process = None
+            raise _WorkerUnavailable(f"Failed to start worker: {e}") from e
+    
+    def _read_line(self) -> bytes:
+        """Read one response line from the worker, honouring the timeout."""
+        import select
+        
+        deadline = time.monotonic() + self.timeout
+        fd = self._process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Script execution timed out")
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise RuntimeError("Script worker exited unexpectedly")
+            self._buffer += chunk
+        line, _, rest = bytes(self._buffer).partition(b"\n")
+        self._buffer[:] = rest
+        return line
+    
+    def request(self, params: Dict[str, Any]) -> Tuple[int, str, str]:
+        """
+        Send one request to the worker and wait for its response.
+        
+        Args:
+            params: Action parameters
+            
+        Returns:
+            Tuple of (returncode, stdout, stderr)
+            
+        Raises:
+            _WorkerUnavailable: If the request could not be delivered, or
+                the script never answered in batch mode
+            TimeoutError: If the worker did not answer in time
+            RuntimeError: If a previously working worker died or sent a
+                malformed response
+        """
+        import orjson
+        
+        with self._lock:
+            self._ensure_started()
+            try:
+                self._process.stdin.write(orjson.dumps(params) + b"\n")
+                self._process.stdin.flush()
+            except OSError as e:
+                self.close()
+                raise _WorkerUnavailable(f"Worker not accepting requests: {e}") from e
+            
+            try:
+                response = orjson.loads(self._read_line())
+                result = (
+                    int(response.get("returncode", 0)),
+                    response.get("stdout", ""),
+                    response.get("stderr", "")
+                )
+            except TimeoutError:
+                self.close()
+                raise
+            except Exception as e:
+                # The worker's state is unknown; restart it on the next request
+                self.close()
+                if not self._answered:
+                    raise _WorkerUnavailable(f"Script does not speak the batch protocol: {e}") from e
+                raise
+            
+            self._answered = True
+            return result
+    
+    def close(self) -> None:
+        """Stop the worker process."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=1)
+        except Exception:
+            process.kill()
+            process.wait()
+
+
 class CustomHandler(ActionHandler):
     """Handler for CUSTOM commands - execute user-defined actions."""
     
-    def __init__(self, allowed_actions: Optional[Dict[str, str]] = None):
+    def __init__(
+        self,
+        allowed_actions: Optional[Dict[str, str]] = None,
+        batch_actions: Optional[Set[str]] = None
+    ):
         """
         Initialize with allowed custom actions.
         
         Args:
             allowed_actions: Dict of action_name -> script_path
+            batch_actions: Action names whose scripts support the
+                PersistentScriptWorker ``--batch`` protocol
         """
         self.allowed_actions = allowed_actions or {}
+        self.batch_actions = set(batch_actions or ())
+        self._workers: Dict[str, PersistentScriptWorker] = {}
+        # Commands run on a thread pool; one worker per action
+        self._workers_lock = threading.Lock()
+    
+    def _get_worker(self, action_name: str) -> PersistentScriptWorker:
+        """Get or lazily create the persistent worker for an action."""
+        with self._workers_lock:
+            worker = self._workers.get(action_name)
+            if worker is None:
+                worker = PersistentScriptWorker(self.allowed_actions[action_name])
+                self._workers[action_name] = worker
+            return worker
+    
+    def _drop_worker(self, action_name: str) -> None:
+        """Stop using batch mode for an action and discard its worker."""
+        with self._workers_lock:
+            self.batch_actions.discard(action_name)
+            worker = self._workers.pop(action_name, None)
+        if worker is not None:
+            worker.close()
+    
+    def _run_once(self, script_path: str, action_params: Dict[str, Any]) -> Tuple[int, str, str]:
+        """Run the script in a fresh process with params as a JSON argument."""
+        import subprocess
+        import orjson
+        
+        result = subprocess.run(
+            [script_path, orjson.dumps(action_params).decode()],
+            capture_output=True,
+            text=True,
+            timeout=CUSTOM_SCRIPT_TIMEOUT_SECONDS
+        )
+        return result.returncode, result.stdout, result.stderr
     
     def execute(self, payload: Optional[Dict[str, Any]]) -> CommandResult:
+        # Deferred: most nodes never run CUSTOM commands
+        import subprocess
+        
         logger.info("Executing CUSTOM command")
         
         if not payload:
@@ -188,7 +456,7 @@ class CustomHandler(ActionHandler):
         
         # Check if action is allowed
         if action_name not in self.allowed_actions:
-            logger.warning(f"Unknown or disallowed custom action: {action_name}")
+            logger.warning("Unknown or disallowed custom action: %s", action_name)
             return CommandResult(
                 success=False,
                 error=f"Action '{action_name}' is not allowed"
@@ -197,49 +465,83 @@ class CustomHandler(ActionHandler):
         script_path = self.allowed_actions[action_name]
         
         try:
-            # Execute the script with params as JSON
-            result = subprocess.run(
-                [script_path, json.dumps(action_params)],
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
+            returncode = None
+            if action_name in self.batch_actions:
+                try:
+                    returncode, stdout, stderr = self._get_worker(action_name).request(action_params)
+                except _WorkerUnavailable as e:
+                    # Not batch-capable after all; rerun this command and all
+                    # later ones as one-shot runs
+                    logger.warning("Batch worker for '%s' unavailable, falling back: %s", action_name, e)
+                    self._drop_worker(action_name)
+            
+            if returncode is None:
+                # Execute the script with params as JSON
+                returncode, stdout, stderr = self._run_once(script_path, action_params)
             
-            if result.returncode == 0:
+            if returncode == 0:
                 return CommandResult(
                     success=True,
                     result={
                         "action": action_name,
-                        "stdout": result.stdout,
-                        "returncode": result.returncode
+                        "stdout": stdout,
+                        "returncode": returncode
                     }
                 )
             else:
                 return CommandResult(
                     success=False,
-                    error=f"Script failed with code {result.returncode}: {result.stderr}"
+                    error=f"Script failed with code {returncode}: {stderr}"
                 )
                 
-        except subprocess.TimeoutExpired:
+        except (subprocess.TimeoutExpired, TimeoutError):
             return CommandResult(success=False, error="Script execution timed out")
         except Exception as e:
             return CommandResult(success=False, error=str(e))
+    
+    def close(self) -> None:
+        """Stop all persistent script workers."""
+        with self._workers_lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.close()
 
 
 class ActionRegistry:
     """Registry for command action handlers."""
     
-    def __init__(self):
-        self._handlers: Dict[str, ActionHandler] = {}
+    def __init__(self, handlers: Optional[Dict[str, ActionHandler]] = None):
+        """
+        Initialize the registry.
+        
+        Args:
+            handlers: Optional initial mapping of command_type -> handler
+        """
+        self._handlers: Dict[str, ActionHandler] = {
+            command_type.lower(): handler
+            for command_type, handler in (handlers or {}).items()
+        }
+        # Bound execute methods, so dispatch is one dict hit and a call
+        self._dispatch: Dict[str, Callable[[Optional[Dict[str, Any]]], CommandResult]] = {
+            command_type: handler.execute
+            for command_type, handler in self._handlers.items()
+        }
     
     def register(self, command_type: str, handler: ActionHandler):
         """Register a handler for a command type."""
-        self._handlers[command_type.lower()] = handler
-        logger.debug(f"Registered handler for command type: {command_type}")
+        key = command_type.lower()
+        self._handlers[key] = handler
+        self._dispatch[key] = handler.execute
+        logger.debug("Registered handler for command type: %s", command_type)
     
     def get_handler(self, command_type: str) -> Optional[ActionHandler]:
         """Get the handler for a command type."""
-        return self._handlers.get(command_type.lower())
+        # Keys are stored lower-cased; canonical input hits without .lower()
+        handler = self._handlers.get(command_type)
+        if handler is None:
+            handler = self._handlers.get(command_type.lower())
+        return handler
     
     def execute(
         self,
@@ -256,38 +558,54 @@ class ActionRegistry:
         Returns:
             CommandResult with execution outcome
         """
-        handler = self.get_handler(command_type)
+        execute = self._dispatch.get(command_type)
+        if execute is None:
+            execute = self._dispatch.get(command_type.lower())
         
-        if not handler:
-            logger.warning(f"No handler registered for command type: {command_type}")
+        if execute is None:
+            logger.warning("No handler registered for command type: %s", command_type)
             return CommandResult(
                 success=False,
                 error=f"Unknown command type: {command_type}"
             )
         
         try:
-            return handler.execute(payload)
+            return execute(payload)
         except Exception as e:
-            logger.error(f"Error executing {command_type} command: {e}")
+            logger.error("Error executing %s command: %s", command_type, e)
             return CommandResult(success=False, error=str(e))
+    
+    def close(self) -> None:
+        """Close every registered handler."""
+        for handler in self._handlers.values():
+            handler.close()
 
 
-def create_default_registry(config_path: str = "config.yaml") -> ActionRegistry:
+def create_default_registry(
+    config_path: str = "config.yaml",
+    reload_callback: Optional[Callable[[], None]] = None,
+    custom_actions: Optional[Dict[str, str]] = None,
+    batch_actions: Optional[Set[str]] = None
+) -> ActionRegistry:
     """
     Create an action registry with default handlers.
     
     Args:
         config_path: Path to agent config file
+        reload_callback: Called when a RELOAD_CONFIG command is executed
+        custom_actions: CUSTOM action name -> script path
+        batch_actions: CUSTOM actions whose scripts support batch mode
         
     Returns:
         Configured ActionRegistry
     """
-    registry = ActionRegistry()
-    
-    registry.register("ping", PingHandler())
-    registry.register("reload_config", ReloadConfigHandler(config_path))
-    registry.register("update_config", UpdateConfigHandler(config_path))
-    registry.register("change_role", ChangeRoleHandler())
-    registry.register("custom", CustomHandler())
+    handlers = {
+        "ping": PingHandler(),
+        "reload_config": ReloadConfigHandler(config_path, reload_callback),
+        "update_config": UpdateConfigHandler(config_path),
+        "change_role": ChangeRoleHandler(),
+        "custom": CustomHandler(custom_actions, batch_actions),
+    }
+    logger.debug("Registering default handlers: %s", ", ".join(handlers))
     
-    return registry
+    return ActionRegistry(handlers)
@@ -3,23 +3,37 @@
 """
 HTTP client for TacticalMesh Node Agent.
 
-Provides resilient communication with the Mesh Controller, including
-retry logic, exponential backoff, and connection failover.
+Provides resilient asynchronous communication with the Mesh Controller,
+including retry logic, exponential backoff, and connection failover.
 """
 
+import asyncio
 import logging
-import time
 from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
 
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import aiohttp
+import orjson
 
 from .config import AgentConfig
 
 logger = logging.getLogger(__name__)
 
+# Status codes that are retried with exponential backoff
+RETRY_STATUS_CODES = frozenset({500, 502, 503, 504})
+
+# Fixed controller endpoints whose full URLs are precomputed per controller
+REGISTER_ENDPOINT = "/api/v1/nodes/register"
+HEARTBEAT_ENDPOINT = "/api/v1/nodes/heartbeat"
+RESULTS_BATCH_ENDPOINT = "/api/v1/commands/results:batch"
+FIXED_ENDPOINTS = (REGISTER_ENDPOINT, HEARTBEAT_ENDPOINT, RESULTS_BATCH_ENDPOINT)
+
+# Maximum simultaneous connections to the controller
+CONNECTION_POOL_SIZE = 4
+
+# Upper bound on how long a blocking caller waits for a scheduled request
+BLOCKING_CALL_TIMEOUT_SECONDS = 60
+
 
 @dataclass
 class CommandInfo:
@@ -32,13 +46,16 @@ class CommandInfo:
 
 class ControllerClient:
     """
-    HTTP client for communicating with the Mesh Controller.
+    Asynchronous HTTP client for communicating with the Mesh Controller.
     
     Features:
     - Automatic retry with exponential backoff
     - Controller URL failover
-    - Connection pooling
+    - Connection pooling (single keep-alive connector per client)
     - Request/response logging
+    
+    All network methods are coroutines and must be awaited from the
+    agent's event loop.
     """
     
     def __init__(self, config: AgentConfig):
@@ -49,104 +66,153 @@ class ControllerClient:
             config: Agent configuration
         """
         self.config = config
-        self.auth_token: Optional[str] = config.auth_token
         self._current_url_index = 0
-        self._session = self._create_session()
+        # Created lazily: aiohttp sessions must be bound to a running loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # Default headers sent with every request; Authorization is kept
+        # in sync by the auth_token setter
+        self._headers: Dict[str, str] = {
+            "Content-Type": "application/json",
+            "User-Agent": f"TacticalMesh-Agent/{config.node_id}"
+        }
+        self.auth_token = config.auth_token
         
         # Build list of controller URLs
         self._controller_urls = [config.controller.primary_url]
         self._controller_urls.extend(config.controller.backup_urls)
+        self._build_urls()
     
-    def _create_session(self) -> requests.Session:
-        """Create a requests session with retry configuration."""
-        session = requests.Session()
+    def _create_session(self) -> aiohttp.ClientSession:
+        """
+        Create an aiohttp session with a shared keep-alive connector.
         
-        retry_strategy = Retry(
-            total=self.config.max_retries,
-            backoff_factor=self.config.retry_backoff_base,
-            status_forcelist=[500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "POST", "PUT", "DELETE"]
+        TLS verification, the request timeout, and default headers are bound
+        here once rather than passed on every request. Idle connections are
+        kept slightly longer than the heartbeat interval so consecutive
+        heartbeats can reuse them.
+        """
+        connector = aiohttp.TCPConnector(
+            ssl=None if self.config.controller.verify_ssl else False,
+            limit=CONNECTION_POOL_SIZE,
+            keepalive_timeout=self.config.heartbeat_interval_seconds + 5
+        )
+        timeout = aiohttp.ClientTimeout(total=self.config.controller.timeout_seconds)
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers=self._headers
         )
-        
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        
-        return session
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the open session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
     
     @property
     def current_controller_url(self) -> str:
         """Get the current controller URL."""
         return self._controller_urls[self._current_url_index]
     
+    def _build_urls(self) -> None:
+        """Precompute full URLs of the fixed endpoints for the current controller."""
+        base = self.current_controller_url
+        self._urls: Dict[str, str] = {endpoint: base + endpoint for endpoint in FIXED_ENDPOINTS}
+    
     def _switch_controller(self):
         """Switch to the next available controller URL."""
         self._current_url_index = (self._current_url_index + 1) % len(self._controller_urls)
-        logger.warning(f"Switching to controller: {self.current_controller_url}")
+        self._build_urls()
+        logger.warning("Switching to controller: %s", self.current_controller_url)
     
-    def _get_headers(self) -> Dict[str, str]:
-        """Get request headers with authentication."""
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": f"TacticalMesh-Agent/{self.config.node_id}"
-        }
-        if self.auth_token:
-            headers["Authorization"] = f"Bearer {self.auth_token}"
-        return headers
+    @property
+    def auth_token(self) -> Optional[str]:
+        """Bearer token used to authenticate with the controller."""
+        return self._auth_token
+    
+    @auth_token.setter
+    def auth_token(self, token: Optional[str]) -> None:
+        self._auth_token = token
+        if token:
+            self._headers["Authorization"] = f"Bearer {token}"
+        else:
+            self._headers.pop("Authorization", None)
+        
+        # Keep an already-open session's default headers in sync
+        if self._session is not None and not self._session.closed:
+            if token:
+                self._session.headers["Authorization"] = self._headers["Authorization"]
+            else:
+                self._session.headers.pop("Authorization", None)
     
-    def _make_request(
+    def _backoff_delay(self, retry_count: int) -> float:
+        """Exponential backoff delay before the given retry attempt."""
+        delay = self.config.retry_backoff_base * (2 ** retry_count)
+        return min(delay, self.config.retry_backoff_max)
+    
+    async def _make_request(
         self,
         method: str,
         endpoint: str,
-        data: Optional[Dict] = None,
-        retry_count: int = 0
+        data: Optional[Dict] = None
     ) -> Optional[Dict]:
         """
         Make an HTTP request to the controller.
         
+        Server errors (5xx) are retried with exponential backoff up to
+        ``config.max_retries`` times. Each failed response is released
+        before the backoff sleep so retries never wait on the connection
+        pool for a connection an earlier attempt still holds.
+        
         Args:
             method: HTTP method
             endpoint: API endpoint
             data: Request body data
-            retry_count: Current retry attempt
             
         Returns:
             Response data or None if failed
         """
-        url = f"{self.current_controller_url}{endpoint}"
+        url = self._urls.get(endpoint) or self.current_controller_url + endpoint
+        body = orjson.dumps(data) if data is not None else None
+        retry_count = 0
         
         try:
-            response = self._session.request(
-                method=method,
-                url=url,
-                json=data,
-                headers=self._get_headers(),
-                timeout=self.config.controller.timeout_seconds,
-                verify=self.config.controller.verify_ssl
-            )
-            
-            response.raise_for_status()
-            return response.json()
+            while True:
+                # Content-Type: application/json is a session default header
+                async with self._get_session().request(method, url, data=body) as response:
+                    status = response.status
+                    if status not in RETRY_STATUS_CODES or retry_count >= self.config.max_retries:
+                        if status >= 400:
+                            text = await response.text()
+                            logger.error("HTTP error from %s: %d - %s", url, status, text)
+                            return None
+                        
+                        return orjson.loads(await response.read())
+                
+                delay = self._backoff_delay(retry_count)
+                retry_count += 1
+                logger.warning(
+                    "HTTP %d from %s, retrying in %.1fs (%d/%d)",
+                    status, url, delay, retry_count, self.config.max_retries
+                )
+                await asyncio.sleep(delay)
             
-        except requests.exceptions.ConnectionError as e:
-            logger.error(f"Connection error to {url}: {e}")
+        except aiohttp.ClientConnectionError as e:
+            logger.error("Connection error to %s: %s", url, e)
             if len(self._controller_urls) > 1:
                 self._switch_controller()
             return None
             
-        except requests.exceptions.Timeout as e:
-            logger.error(f"Request timeout to {url}: {e}")
-            return None
-            
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP error from {url}: {e.response.status_code} - {e.response.text}")
+        except asyncio.TimeoutError as e:
+            logger.error("Request timeout to %s: %s", url, e)
             return None
             
         except Exception as e:
-            logger.error(f"Unexpected error in request to {url}: {e}")
+            logger.error("Unexpected error in request to %s: %s", url, e)
             return None
     
-    def register(
+    async def register(
         self,
         ip_address: Optional[str] = None,
         mac_address: Optional[str] = None,
@@ -163,7 +229,7 @@ class ControllerClient:
         Returns:
             Authentication token if successful, None otherwise
         """
-        logger.info(f"Registering node {self.config.node_id} with controller")
+        logger.info("Registering node %s with controller", self.config.node_id)
         
         data = {
             "node_id": self.config.node_id,
@@ -174,17 +240,17 @@ class ControllerClient:
             "metadata": metadata
         }
         
-        response = self._make_request("POST", "/api/v1/nodes/register", data)
+        response = await self._make_request("POST", REGISTER_ENDPOINT, data)
         
         if response and "auth_token" in response:
             self.auth_token = response["auth_token"]
-            logger.info(f"Node registered successfully: {response.get('id')}")
+            logger.info("Node registered successfully: %s", response.get('id'))
             return self.auth_token
         
         logger.error("Failed to register node")
         return None
     
-    def heartbeat(
+    async def heartbeat(
         self,
         cpu_usage: Optional[float] = None,
         memory_usage: Optional[float] = None,
@@ -220,14 +286,14 @@ class ControllerClient:
             "custom_metrics": custom_metrics
         }
         
-        response = self._make_request("POST", "/api/v1/nodes/heartbeat", data)
+        response = await self._make_request("POST", HEARTBEAT_ENDPOINT, data)
         
         if response:
             pending_commands = []
             for cmd in response.get("pending_commands", []):
                 pending_commands.append(CommandInfo(
                     id=cmd["id"],
-                    command_type=cmd["command_type"],
+                    command_type=cmd["command_type"].lower(),
                     payload=cmd.get("payload"),
                     created_at=cmd["created_at"]
                 ))
@@ -235,7 +301,7 @@ class ControllerClient:
         
         return None
     
-    def report_command_result(
+    async def report_command_result(
         self,
         command_id: str,
         status: str,
@@ -261,9 +327,71 @@ class ControllerClient:
             "error_message": error_message
         }
         
-        response = self._make_request("POST", f"/api/v1/commands/{command_id}/result", data)
+        response = await self._make_request(
+            "POST", "/api/v1/commands/" + str(command_id) + "/result", data
+        )
+        return response is not None
+    
+    async def report_results_batch(self, results: List[Dict[str, Any]]) -> bool:
+        """
+        Report several command results to the controller in one request.
+        
+        Args:
+            results: Result entries, each with command_id, status, and
+                optional result and error_message
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not results:
+            return True
+        
+        response = await self._make_request(
+            "POST", RESULTS_BATCH_ENDPOINT, {"results": results}
+        )
         return response is not None
     
-    def close(self):
+    async def close(self):
         """Close the HTTP session."""
-        self._session.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+class BlockingControllerClient:
+    """
+    Blocking facade over an async ControllerClient.
+    
+    Mesh peering callbacks run on background threads; this wrapper lets
+    them call the controller by scheduling the coroutine on the agent's
+    event loop and waiting for the result.
+    """
+    
+    def __init__(self, client: ControllerClient):
+        """
+        Initialize the facade.
+        
+        Args:
+            client: Async controller client to delegate to
+        """
+        self._client = client
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def bind_loop(self, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Bind the event loop that owns the wrapped client."""
+        self._loop = loop
+    
+    def _call(self, coro_fn, *args, **kwargs):
+        """Run a client coroutine on the bound loop and wait for its result."""
+        if self._loop is None or self._loop.is_closed():
+            logger.warning("Controller client event loop not running")
+            return None
+        future = asyncio.run_coroutine_threadsafe(coro_fn(*args, **kwargs), self._loop)
+        return future.result(timeout=BLOCKING_CALL_TIMEOUT_SECONDS)
+    
+    def heartbeat(self, **kwargs) -> Optional[List[CommandInfo]]:
+        """Blocking variant of ControllerClient.heartbeat."""
+        return self._call(self._client.heartbeat, **kwargs)
+    
+    def report_command_result(self, **kwargs) -> bool:
+        """Blocking variant of ControllerClient.report_command_result."""
+        return bool(self._call(self._client.report_command_result, **kwargs))
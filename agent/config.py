@@ -8,11 +8,17 @@ Handles loading and validation of agent configuration from YAML files.
 
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import yaml
 from pydantic import BaseModel, Field, validator
 
+# Prefer the libyaml-backed C implementations; fall back to pure Python
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+
 
 class ControllerConfig(BaseModel):
     """Controller connection configuration."""
@@ -40,6 +46,15 @@ class MeshConfig(BaseModel):
     peers: List[MeshPeerConfig] = Field(default=[], description="Static peer list")
 
 
+class CustomActionConfig(BaseModel):
+    """A script the controller may run with a CUSTOM command."""
+    script: str = Field(..., description="Path to the executable script")
+    batch: bool = Field(
+        default=False,
+        description="Script serves requests over stdio when started with --batch"
+    )
+
+
 class AgentConfig(BaseModel):
     """Agent configuration model."""
     
@@ -86,6 +101,12 @@ class AgentConfig(BaseModel):
     # Mesh networking
     mesh: Optional[MeshConfig] = Field(default=None, description="Mesh networking configuration")
     
+    # CUSTOM command actions
+    custom_actions: Dict[str, CustomActionConfig] = Field(
+        default={},
+        description="Scripts allowed for CUSTOM commands, by action name"
+    )
+    
     @validator('log_level')
     def validate_log_level(cls, v):
         valid_levels = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
@@ -114,7 +135,7 @@ def load_config(config_path: str) -> AgentConfig:
         raise FileNotFoundError(f"Configuration file not found: {config_path}")
     
     with open(path, 'r') as f:
-        raw_config = yaml.safe_load(f)
+        raw_config = yaml.load(f, Loader=YamlLoader)
     
     # Support environment variable substitution
     raw_config = _substitute_env_vars(raw_config)
@@ -177,6 +198,6 @@ def create_default_config(config_path: str, node_id: str, controller_url: str):
     path.parent.mkdir(parents=True, exist_ok=True)
     
     with open(path, 'w') as f:
-        yaml.dump(default_config, f, default_flow_style=False, sort_keys=False)
+        yaml.dump(default_config, f, Dumper=YamlDumper, default_flow_style=False, sort_keys=False)
     
     return path
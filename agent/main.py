@@ -13,21 +13,24 @@ Usage:
 """
 
 import argparse
+import asyncio
 import logging
 import os
 import signal
+import socket
 import struct
 import sys
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Set
 
 import psutil
 
 from .config import load_config, create_default_config, AgentConfig
-from .client import ControllerClient, CommandInfo
+from .client import ControllerClient, BlockingControllerClient, CommandInfo
 from .actions import create_default_registry, ActionRegistry
 from .mesh.peering import MeshPeering, PeerStatus
 from .mesh.routing import MeshRouter, RelayMessage, MSG_ROUTE_REQUEST, MSG_ROUTE_RESPONSE, MSG_RELAY_DATA, MSG_RELAY_ACK
@@ -35,6 +38,9 @@ from .mesh.routing import MeshRouter, RelayMessage, MSG_ROUTE_REQUEST, MSG_ROUTE
 # Global flag for graceful shutdown
 _shutdown_requested = False
 
+# Maximum number of commands executed in parallel
+COMMAND_EXECUTOR_WORKERS = 4
+
 
 def setup_logging(config: AgentConfig) -> logging.Logger:
     """Configure logging based on agent configuration."""
@@ -61,7 +67,7 @@ def signal_handler(signum, frame):
     global _shutdown_requested
     _shutdown_requested = True
     logging.getLogger("tacticalmesh.agent").info(
-        f"Received signal {signum}, initiating graceful shutdown..."
+        "Received signal %s, initiating graceful shutdown...", signum
     )
 
 
@@ -69,12 +75,13 @@ def get_system_metrics() -> dict:
     """Collect system metrics for telemetry."""
     try:
         return {
-            "cpu_usage": psutil.cpu_percent(interval=0.1),
+            # Non-blocking: percentage since the previous call (primed at startup)
+            "cpu_usage": psutil.cpu_percent(interval=None),
             "memory_usage": psutil.virtual_memory().percent,
             "disk_usage": psutil.disk_usage('/').percent
         }
     except Exception as e:
-        logging.getLogger("tacticalmesh.agent").warning(f"Failed to collect metrics: {e}")
+        logging.getLogger("tacticalmesh.agent").warning("Failed to collect metrics: %s", e)
         return {}
 
 
@@ -86,13 +93,13 @@ def get_network_info() -> dict:
             if iface_name == 'lo':
                 continue
             for addr in addrs:
-                if addr.family.name == 'AF_INET':
+                if addr.family == socket.AF_INET:
                     return {
                         "ip_address": addr.address,
                         "interface": iface_name
                     }
     except Exception as e:
-        logging.getLogger("tacticalmesh.agent").warning(f"Failed to get network info: {e}")
+        logging.getLogger("tacticalmesh.agent").warning("Failed to get network info: %s", e)
     return {}
 
 
@@ -115,48 +122,81 @@ class NodeAgent:
         self.config = config
         self.logger = logger
         self.client = ControllerClient(config)
-        self.action_registry = create_default_registry(config.data_dir)
+        self._blocking_client = BlockingControllerClient(self.client)
+        self.action_registry = create_default_registry(
+            config.data_dir,
+            reload_callback=self._invalidate_network_info,
+            custom_actions={name: action.script for name, action in config.custom_actions.items()},
+            batch_actions={name for name, action in config.custom_actions.items() if action.batch}
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=COMMAND_EXECUTOR_WORKERS,
+            thread_name_prefix="command"
+        )
         self.registered = False
         self.last_heartbeat: Optional[datetime] = None
+        self._shutdown_event: Optional[asyncio.Event] = None
+        # In-flight command batches; referenced so they are not garbage collected
+        self._command_tasks: Set[asyncio.Task] = set()
+        
+        # Prime CPU sampling so the first heartbeat reports a real delta,
+        # and read boot time once since it never changes
+        psutil.cpu_percent(interval=None)
+        self._boot_time = psutil.boot_time()
+        
+        # Registration metadata is invariant for the life of the process
+        self._net_info: dict = get_network_info()
+        self._static_metadata = {
+            "hostname": os.uname().nodename,
+            "platform": sys.platform,
+            "python_version": sys.version,
+            "agent_version": "0.1.0"
+        }
+        
+        # Persisted auth token location; the data directory is created once
+        self._token_path = Path(config.data_dir) / ".auth_token"
+        self._token_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Mesh networking components
         self.mesh_peering: Optional[MeshPeering] = None
         self.mesh_router: Optional[MeshRouter] = None
         self._init_mesh()
     
-    def register(self) -> bool:
+    async def register(self) -> bool:
         """
         Register this node with the controller.
         
         Returns:
             True if registration was successful
         """
-        network_info = get_network_info()
+        # Interface discovery is cached; refreshed on RELOAD_CONFIG or if empty
+        if not self._net_info:
+            self._net_info = get_network_info()
+        network_info = self._net_info
         
-        token = self.client.register(
+        token = await self.client.register(
             ip_address=network_info.get("ip_address"),
-            metadata={
-                "hostname": os.uname().nodename,
-                "platform": sys.platform,
-                "python_version": sys.version,
-                "agent_version": "0.1.0"
-            }
+            metadata=self._static_metadata
         )
         
         if token:
             self.registered = True
-            self.logger.info(f"Successfully registered with controller")
+            self.logger.info("Successfully registered with controller")
             
-            # Save token to data directory for persistence
-            token_file = Path(self.config.data_dir) / ".auth_token"
-            token_file.parent.mkdir(parents=True, exist_ok=True)
-            token_file.write_text(token)
+            # Save token to data directory for persistence (atomic replace)
+            tmp_path = self._token_path.with_suffix(".tmp")
+            tmp_path.write_text(token)
+            os.replace(tmp_path, self._token_path)
             
             return True
         
         return False
     
-    def send_heartbeat(self) -> bool:
+    def _invalidate_network_info(self) -> None:
+        """Drop cached network info so the next registration rediscovers it."""
+        self._net_info = {}
+    
+    async def send_heartbeat(self) -> bool:
         """
         Send heartbeat with telemetry to the controller.
         
@@ -166,7 +206,7 @@ class NodeAgent:
             True if heartbeat was acknowledged (directly or via mesh)
         """
         # Try direct path first
-        if self._send_heartbeat_direct():
+        if await self._send_heartbeat_direct():
             return True
         
         self.logger.warning("Direct heartbeat failed - controller unreachable")
@@ -174,7 +214,7 @@ class NodeAgent:
         # If mesh enabled, try mesh relay
         if self.mesh_router:
             self.logger.info("Attempting mesh relay for heartbeat...")
-            return self._send_heartbeat_via_mesh()
+            return await self._send_heartbeat_via_mesh()
         
         return False
 
@@ -207,7 +247,7 @@ class NodeAgent:
         self.mesh_router = MeshRouter(
             node_id=self.config.node_id,
             peering=self.mesh_peering,
-            controller_client=self.client,
+            controller_client=self._blocking_client,
             route_cache_ttl=mesh_config.route_cache_ttl_seconds,
             max_hops=mesh_config.max_hops
         )
@@ -219,8 +259,8 @@ class NodeAgent:
         self.mesh_peering.start()
         
         self.logger.info(
-            f"Mesh networking enabled: port={mesh_config.listen_port}, "
-            f"peers={len(mesh_config.peers)}, max_hops={mesh_config.max_hops}"
+            "Mesh networking enabled: port=%d, peers=%d, max_hops=%d",
+            mesh_config.listen_port, len(mesh_config.peers), mesh_config.max_hops
         )
     
     def _handle_mesh_message(self, msg_type: bytes, payload: bytes, sender_addr: tuple) -> None:
@@ -274,9 +314,9 @@ class NodeAgent:
                     self.mesh_router.handle_relay_ack(message_id, success)
                     
         except Exception as e:
-            self.logger.error(f"Error handling mesh message: {e}")
+            self.logger.error("Error handling mesh message: %s", e)
     
-    def _send_heartbeat_direct(self) -> bool:
+    async def _send_heartbeat_direct(self) -> bool:
         """
         Send heartbeat directly to controller.
         
@@ -285,12 +325,12 @@ class NodeAgent:
         """
         metrics = get_system_metrics()
         
-        pending_commands = self.client.heartbeat(
+        pending_commands = await self.client.heartbeat(
             cpu_usage=metrics.get("cpu_usage"),
             memory_usage=metrics.get("memory_usage"),
             disk_usage=metrics.get("disk_usage"),
             custom_metrics={
-                "uptime": time.time() - psutil.boot_time()
+                "uptime": time.time() - self._boot_time
             }
         )
         
@@ -298,15 +338,36 @@ class NodeAgent:
             return False
         
         self.last_heartbeat = datetime.utcnow()
-        self.logger.debug(f"Direct heartbeat acknowledged, {len(pending_commands)} pending commands")
+        self.logger.debug("Direct heartbeat acknowledged, %d pending commands", len(pending_commands))
         
-        # Process any pending commands
-        for cmd in pending_commands:
-            self._execute_command(cmd)
+        # Run commands off the heartbeat cycle so a slow command never
+        # delays the next heartbeat
+        if pending_commands:
+            task = asyncio.create_task(self._run_commands(pending_commands))
+            self._command_tasks.add(task)
+            task.add_done_callback(self._command_tasks.discard)
         
         return True
     
-    def _send_heartbeat_via_mesh(self) -> bool:
+    async def _run_commands(self, commands: List[CommandInfo]) -> None:
+        """
+        Acknowledge a dispatched batch, execute it, and report its results.
+        
+        Acknowledgments go out before execution; the commands then run
+        concurrently and all results are reported in a single batch.
+        
+        Args:
+            commands: Commands received in one heartbeat response
+        """
+        acks = [{"command_id": cmd.id, "status": "acknowledged"} for cmd in commands]
+        if not await self.client.report_results_batch(acks):
+            self.logger.warning("Failed to acknowledge %d commands", len(acks))
+        
+        results = await asyncio.gather(*(self._execute_command(cmd) for cmd in commands))
+        if not await self.client.report_results_batch(results):
+            self.logger.warning("Failed to report %d command results", len(results))
+    
+    async def _send_heartbeat_via_mesh(self) -> bool:
         """
         Send heartbeat via mesh routing when direct path fails.
         
@@ -321,7 +382,7 @@ class NodeAgent:
             self.logger.info("Discovering mesh routes to controller...")
             self.mesh_router.discover_routes("controller")
             # Wait for responses
-            time.sleep(2.5)
+            await asyncio.sleep(2.5)
         
         # Check if route exists now
         route = self.mesh_router.select_best_route("controller")
@@ -353,86 +414,109 @@ class NodeAgent:
         success = self.mesh_router.relay_message(relay_msg)
         if success:
             self.logger.info(
-                f"Heartbeat relayed via {route.next_hop} "
-                f"({route.total_hops} hops, {route.estimated_rtt_ms:.0f}ms RTT)"
+                "Heartbeat relayed via %s (%d hops, %.0fms RTT)",
+                route.next_hop, route.total_hops, route.estimated_rtt_ms
             )
             self.last_heartbeat = datetime.utcnow()
         
         return success
     
-    def _execute_command(self, command: CommandInfo):
+    async def _execute_command(self, command: CommandInfo) -> dict:
         """
         Execute a command received from the controller.
         
         Args:
             command: Command information
+            
+        Returns:
+            Result entry to report to the controller
         """
-        self.logger.info(f"Executing command: {command.id} ({command.command_type})")
-        
-        # Acknowledge receipt
-        self.client.report_command_result(
-            command_id=command.id,
-            status="acknowledged"
-        )
-        
-        # Execute the command
-        result = self.action_registry.execute(
-            command_type=command.command_type,
-            payload=command.payload
-        )
-        
-        # Report result
-        self.client.report_command_result(
-            command_id=command.id,
-            status=result.status,
-            result=result.result,
-            error_message=result.error
+        self.logger.info("Executing command: %s (%s)", command.id, command.command_type)
+        
+        # Execute the command on the bounded worker pool; handlers may block
+        result = await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            self.action_registry.execute,
+            command.command_type,
+            command.payload
         )
         
         if result.success:
-            self.logger.info(f"Command {command.id} completed successfully")
+            self.logger.info("Command %s completed successfully", command.id)
         else:
-            self.logger.error(f"Command {command.id} failed: {result.error}")
+            self.logger.error("Command %s failed: %s", command.id, result.error)
+        
+        return {
+            "command_id": command.id,
+            "status": result.status,
+            "result": result.result,
+            "error_message": result.error
+        }
     
     def run(self):
         """
-        Main agent loop.
+        Main agent entry point.
         
-        Runs until shutdown is requested or an unrecoverable error occurs.
+        Drives the asynchronous agent loop until shutdown is requested
+        or an unrecoverable error occurs.
+        """
+        asyncio.run(self._run())
+    
+    def request_shutdown(self, signum: Optional[int] = None) -> None:
+        """Request a graceful shutdown, waking the agent loop immediately."""
+        signal_handler(signum, None)
+        if self._shutdown_event is not None:
+            self._shutdown_event.set()
+    
+    async def _wait_for_shutdown(self, timeout: float) -> bool:
         """
-        global _shutdown_requested
+        Sleep for up to ``timeout`` seconds unless shutdown is requested.
+        
+        Returns:
+            True if shutdown was requested
+        """
+        if _shutdown_requested:
+            return True
+        try:
+            await asyncio.wait_for(self._shutdown_event.wait(), timeout=max(0.0, timeout))
+            return True
+        except asyncio.TimeoutError:
+            return _shutdown_requested
+    
+    async def _run(self):
+        """Asynchronous agent loop: registration followed by heartbeats."""
+        loop = asyncio.get_running_loop()
+        self._shutdown_event = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.request_shutdown, sig)
+        self._blocking_client.bind_loop(loop)
         
-        self.logger.info(f"Starting TacticalMesh Node Agent: {self.config.node_id}")
+        self.logger.info("Starting TacticalMesh Node Agent: %s", self.config.node_id)
         
         # Try to load saved auth token
-        token_file = Path(self.config.data_dir) / ".auth_token"
-        if token_file.exists():
-            self.client.auth_token = token_file.read_text().strip()
+        if self._token_path.exists():
+            self.client.auth_token = self._token_path.read_text().strip()
             self.logger.info("Loaded saved authentication token")
         
-        # Registration loop
-        retry_delay = 5
-        while not self.registered and not _shutdown_requested:
-            if self.register():
-                break
+        try:
+            # Registration loop
+            retry_delay = 5
+            while not self.registered:
+                if await self.register():
+                    break
+                
+                self.logger.warning("Registration failed, retrying in %ss...", retry_delay)
+                if await self._wait_for_shutdown(retry_delay):
+                    return
+                retry_delay = min(retry_delay * 2, self.config.retry_backoff_max)
             
-            self.logger.warning(f"Registration failed, retrying in {retry_delay}s...")
-            time.sleep(retry_delay)
-            retry_delay = min(retry_delay * 2, self.config.retry_backoff_max)
-        
-        if _shutdown_requested:
-            return
-        
-        # Main heartbeat loop
-        heartbeat_failures = 0
-        last_heartbeat_time = 0
-        
-        while not _shutdown_requested:
-            current_time = time.time()
+            # Main heartbeat loop: sleep until the next deadline rather than polling
+            heartbeat_failures = 0
+            interval = self.config.heartbeat_interval_seconds
+            next_heartbeat = time.monotonic()
             
-            # Send heartbeat at configured interval
-            if current_time - last_heartbeat_time >= self.config.heartbeat_interval_seconds:
-                if self.send_heartbeat():
+            while not _shutdown_requested:
+                if await self.send_heartbeat():
                     heartbeat_failures = 0
                 else:
                     heartbeat_failures += 1
@@ -441,22 +525,30 @@ class NodeAgent:
                     if heartbeat_failures >= 3:
                         self.logger.warning("Multiple heartbeat failures, attempting re-registration")
                         self.registered = False
-                        if self.register():
+                        if await self.register():
                             heartbeat_failures = 0
                 
-                last_heartbeat_time = current_time
+                # Skip missed deadlines instead of bursting to catch up
+                next_heartbeat = max(next_heartbeat + interval, time.monotonic())
+                if await self._wait_for_shutdown(next_heartbeat - time.monotonic()):
+                    break
             
-            # Brief sleep to prevent tight loop
-            time.sleep(1)
-        
-        self.logger.info("Node Agent shutting down...")
-        self.client.close()
+            self.logger.info("Node Agent shutting down...")
+        finally:
+            # Commands still running cannot report once the client closes
+            for task in self._command_tasks:
+                task.cancel()
+            await asyncio.gather(*self._command_tasks, return_exceptions=True)
+            self._blocking_client.bind_loop(None)
+            await self.client.close()
     
     def cleanup(self):
         """Cleanup resources on shutdown."""
         if self.mesh_peering:
             self.mesh_peering.stop()
-        self.client.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        # Stops persistent CUSTOM script workers
+        self.action_registry.close()
 
 
 def main():
@@ -529,11 +621,7 @@ Examples:
     # Setup logging
     logger = setup_logging(config)
     
-    # Setup signal handlers
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
-    # Create and run agent
+    # Create and run agent (signal handlers are installed on the event loop)
     agent = NodeAgent(config, logger)
     
     try:
@@ -541,7 +629,7 @@ Examples:
     except KeyboardInterrupt:
         logger.info("Interrupted by user")
     except Exception as e:
-        logger.error(f"Fatal error: {e}", exc_info=True)
+        logger.error("Fatal error: %s", e, exc_info=True)
         return 1
     finally:
         agent.cleanup()
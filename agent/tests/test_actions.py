@@ -0,0 +1,125 @@
+# Copyright 2024 TacticalMesh Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Tests for CUSTOM command actions.
+
+Runs real scripts, both batch-capable and one-shot only, through the
+CustomHandler and its persistent workers.
+"""
+
+import os
+import sys
+import textwrap
+
+import pytest
+
+from agent.actions import CustomHandler, create_default_registry
+
+
+# Serves requests over stdio in --batch mode, otherwise runs once
+BATCH_SCRIPT = """
+import json, os, sys
+if sys.argv[1:] == ["--batch"]:
+    for line in sys.stdin:
+        params = json.loads(line)
+        print(json.dumps({"returncode": 0, "stdout": f"{os.getpid()} {params['n']}"}), flush=True)
+else:
+    print(f"once {json.loads(sys.argv[1])['n']}", end="")
+"""
+
+# Ignores --batch: treats it as its params argument and exits
+EXITING_SCRIPT = """
+import sys
+print(f"once {sys.argv[1]}", end="")
+"""
+
+# Answers --batch with something other than a JSON object
+CHATTY_SCRIPT = """
+import sys
+if sys.argv[1:] == ["--batch"]:
+    print("starting up", flush=True)
+    sys.stdin.read()
+else:
+    print(f"once {sys.argv[1]}", end="")
+"""
+
+
+def make_script(tmp_path, name: str, source: str) -> str:
+    """Write an executable Python script and return its path."""
+    path = tmp_path / name
+    path.write_text(f"#!{sys.executable}\n" + textwrap.dedent(source))
+    path.chmod(0o755)
+    return str(path)
+
+
+def custom_payload(n: int) -> dict:
+    """CUSTOM command payload for the probe action."""
+    return {"action": "probe", "params": {"n": n}}
+
+
+class TestCustomHandler:
+    """Tests for CUSTOM actions in batch and one-shot mode."""
+
+    def test_batch_script_reuses_one_process(self, tmp_path):
+        """A batch-capable script should serve every request from one worker."""
+        script = make_script(tmp_path, "batch.py", BATCH_SCRIPT)
+        handler = CustomHandler({"probe": script}, batch_actions={"probe"})
+        try:
+            outputs = []
+            for n in range(3):
+                result = handler.execute(custom_payload(n))
+                assert result.success, result.error
+                outputs.append(result.result["stdout"].split())
+            
+            assert [n for _, n in outputs] == ["0", "1", "2"]
+            assert len({pid for pid, _ in outputs}) == 1
+            assert int(outputs[0][0]) != os.getpid()
+            assert handler.batch_actions == {"probe"}
+        finally:
+            handler.close()
+
+    def test_one_shot_script_without_batch_mode(self, tmp_path):
+        """Actions not marked batch should run in a fresh process each time."""
+        script = make_script(tmp_path, "batch.py", BATCH_SCRIPT)
+        handler = CustomHandler({"probe": script})
+        
+        result = handler.execute(custom_payload(7))
+        assert result.success, result.error
+        assert result.result["stdout"] == "once 7"
+        assert handler._workers == {}
+
+    @pytest.mark.parametrize("source", [EXITING_SCRIPT, CHATTY_SCRIPT], ids=["exits", "malformed"])
+    def test_non_batch_script_falls_back_to_one_shot(self, tmp_path, source):
+        """A script that fails its first batch request should be rerun one-shot."""
+        script = make_script(tmp_path, "plain.py", source)
+        handler = CustomHandler({"probe": script}, batch_actions={"probe"})
+        try:
+            result = handler.execute(custom_payload(1))
+            assert result.success, result.error
+            assert result.result["stdout"] == 'once {"n":1}'
+            assert handler.batch_actions == set()
+            assert handler._workers == {}
+            
+            # Later commands go straight to one-shot runs
+            result = handler.execute(custom_payload(2))
+            assert result.success, result.error
+            assert result.result["stdout"] == 'once {"n":2}'
+        finally:
+            handler.close()
+
+    def test_close_stops_workers(self, tmp_path):
+        """Closing the registry should stop persistent workers."""
+        script = make_script(tmp_path, "batch.py", BATCH_SCRIPT)
+        registry = create_default_registry(
+            str(tmp_path / "config.yaml"),
+            custom_actions={"probe": script},
+            batch_actions={"probe"}
+        )
+        assert registry.execute("custom", custom_payload(1)).success
+        
+        worker = registry.get_handler("custom")._workers["probe"]
+        process = worker._process
+        registry.close()
+        
+        assert process.poll() is not None
+        assert registry.get_handler("custom")._workers == {}
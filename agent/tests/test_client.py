@@ -0,0 +1,321 @@
+# Copyright 2024 TacticalMesh Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Tests for the controller HTTP client.
+
+The client talks to an in-process aiohttp controller stand-in over real
+sockets; each test drives it on its own event loop.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+import orjson
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from agent import client as client_module
+from agent.client import BlockingControllerClient, ControllerClient
+from agent.config import AgentConfig
+
+HEARTBEAT = "/api/v1/nodes/heartbeat"
+REGISTER = "/api/v1/nodes/register"
+RESULTS_BATCH = "/api/v1/commands/results:batch"
+
+# Nothing listens here; connecting fails straight away
+UNREACHABLE_URL = "http://127.0.0.1:1"
+
+
+class FakeController:
+    """
+    Controller stand-in answering from per-path response queues.
+    
+    Each request pops the next queued (status, body, delay) for its path;
+    the last entry is repeated once the queue is down to one.
+    """
+    
+    def __init__(self):
+        self.requests = []
+        self._responses = defaultdict(list)
+    
+    def reply(self, path: str, body=None, status: int = 200, delay: float = 0):
+        """Queue a response for a path."""
+        self._responses[path].append((status, body, delay))
+    
+    def bodies(self, path: str) -> list:
+        """Decoded JSON bodies received on a path."""
+        return [body for request_path, body, _ in self.requests if request_path == path]
+    
+    async def handle(self, request: web.Request) -> web.Response:
+        raw = await request.read()
+        self.requests.append((
+            request.path,
+            orjson.loads(raw) if raw else None,
+            request.headers.get("Authorization")
+        ))
+        queue = self._responses[request.path]
+        status, body, delay = queue.pop(0) if len(queue) > 1 else queue[0]
+        if delay:
+            await asyncio.sleep(delay)
+        return web.Response(status=status, body=orjson.dumps(body), content_type="application/json")
+
+
+@asynccontextmanager
+async def controller_client(
+    controller: FakeController,
+    primary_url: str = None,
+    timeout_seconds: int = 30,
+    **overrides
+):
+    """
+    Serve the fake controller and yield a client pointed at it.
+    
+    With primary_url set, the fake controller is configured as the backup.
+    """
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", controller.handle)
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+    url = str(server.make_url("")).rstrip("/")
+    
+    config = {
+        "node_id": "test-node",
+        "controller": {
+            "primary_url": primary_url or url,
+            "backup_urls": [url] if primary_url else [],
+            "timeout_seconds": timeout_seconds,
+        },
+        "max_retries": 2,
+    }
+    config.update(overrides)
+    client = ControllerClient(AgentConfig(**config))
+    try:
+        yield client
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Retry immediately instead of sleeping between attempts."""
+    monkeypatch.setattr(ControllerClient, "_backoff_delay", lambda self, retry_count: 0)
+
+
+class TestRegisterAndHeartbeat:
+    """Tests for registration and heartbeats."""
+
+    def test_register_stores_token_for_later_requests(self):
+        """A successful registration should authenticate later requests."""
+        controller = FakeController()
+        controller.reply(REGISTER, {"id": "uuid-1", "auth_token": "secret"})
+        controller.reply(HEARTBEAT, {"pending_commands": []})
+        
+        async def scenario():
+            async with controller_client(controller, name="Test Node", node_type="sensor") as client:
+                assert await client.register(ip_address="10.0.0.5") == "secret"
+                assert client.auth_token == "secret"
+                assert await client.heartbeat(cpu_usage=12.5) == []
+        
+        asyncio.run(scenario())
+        (_, register_body, register_auth), (_, heartbeat_body, heartbeat_auth) = controller.requests
+        assert register_body["node_id"] == "test-node"
+        assert register_body["node_type"] == "sensor"
+        assert register_body["ip_address"] == "10.0.0.5"
+        assert register_auth is None
+        assert heartbeat_body["cpu_usage"] == 12.5
+        assert heartbeat_auth == "Bearer secret"
+
+    def test_register_without_token_fails(self):
+        """A registration response without a token should not authenticate."""
+        controller = FakeController()
+        controller.reply(REGISTER, {"id": "uuid-1"})
+        
+        async def scenario():
+            async with controller_client(controller) as client:
+                assert await client.register() is None
+                assert client.auth_token is None
+        
+        asyncio.run(scenario())
+
+    def test_heartbeat_returns_pending_commands(self):
+        """Pending commands should be parsed with lower-cased command types."""
+        controller = FakeController()
+        controller.reply(HEARTBEAT, {"pending_commands": [
+            {"id": "c1", "command_type": "PING", "payload": None, "created_at": "2024-01-01T00:00:00"},
+            {"id": "c2", "command_type": "custom", "payload": {"action": "x"}, "created_at": "2024-01-01T00:00:01"},
+        ]})
+        
+        async def scenario():
+            async with controller_client(controller, auth_token="secret") as client:
+                return await client.heartbeat()
+        
+        commands = asyncio.run(scenario())
+        assert [(c.id, c.command_type, c.payload) for c in commands] == [
+            ("c1", "ping", None),
+            ("c2", "custom", {"action": "x"}),
+        ]
+
+    def test_heartbeat_client_error_returns_none(self):
+        """A 4xx response should fail the heartbeat without retrying."""
+        controller = FakeController()
+        controller.reply(HEARTBEAT, {"detail": "Node not found"}, status=404)
+        
+        async def scenario():
+            async with controller_client(controller, auth_token="secret") as client:
+                return await client.heartbeat()
+        
+        assert asyncio.run(scenario()) is None
+        assert len(controller.requests) == 1
+
+
+class TestRetryAndFailover:
+    """Tests for retries on server errors, failover and timeouts."""
+
+    def test_server_error_is_retried(self, no_backoff):
+        """A 5xx response should be retried until the controller answers."""
+        controller = FakeController()
+        controller.reply(HEARTBEAT, status=503)
+        controller.reply(HEARTBEAT, status=502)
+        controller.reply(HEARTBEAT, {"pending_commands": []})
+        
+        async def scenario():
+            async with controller_client(controller, auth_token="secret") as client:
+                return await client.heartbeat()
+        
+        assert asyncio.run(scenario()) == []
+        assert len(controller.requests) == 3
+
+    def test_retries_release_connections(self, no_backoff, monkeypatch):
+        """Unread 5xx bodies should not hold pooled connections across retries."""
+        monkeypatch.setattr(client_module, "CONNECTION_POOL_SIZE", 2)
+        controller = FakeController()
+        controller.reply(HEARTBEAT, {"detail": "x" * (4 * 1024 * 1024)}, status=503)
+        controller.reply(HEARTBEAT, {"detail": "x" * (4 * 1024 * 1024)}, status=503)
+        controller.reply(HEARTBEAT, {"detail": "x" * (4 * 1024 * 1024)}, status=503)
+        controller.reply(HEARTBEAT, {"pending_commands": []})
+        
+        async def scenario():
+            async with controller_client(
+                controller, timeout_seconds=3, auth_token="secret", max_retries=4
+            ) as client:
+                return await client.heartbeat()
+        
+        assert asyncio.run(scenario()) == []
+        assert len(controller.requests) == 4
+
+    def test_retries_are_bounded(self, no_backoff):
+        """Server errors beyond max_retries should fail the request."""
+        controller = FakeController()
+        controller.reply(HEARTBEAT, status=503)
+        
+        async def scenario():
+            async with controller_client(controller, auth_token="secret", max_retries=1) as client:
+                return await client.heartbeat()
+        
+        assert asyncio.run(scenario()) is None
+        assert len(controller.requests) == 2
+
+    def test_connection_error_switches_controller(self):
+        """A connection error should fail over to the backup controller."""
+        controller = FakeController()
+        controller.reply(HEARTBEAT, {"pending_commands": []})
+        
+        async def scenario():
+            async with controller_client(controller, primary_url=UNREACHABLE_URL, auth_token="secret") as client:
+                assert await client.heartbeat() is None
+                assert client.current_controller_url != UNREACHABLE_URL
+                assert await client.heartbeat() == []
+        
+        asyncio.run(scenario())
+        assert len(controller.requests) == 1
+
+    def test_timeout_returns_none(self):
+        """A request timeout should fail the request without failing over."""
+        controller = FakeController()
+        controller.reply(HEARTBEAT, {"pending_commands": []}, delay=2)
+        
+        async def scenario():
+            async with controller_client(controller, timeout_seconds=1, auth_token="secret") as client:
+                url = client.current_controller_url
+                assert await client.heartbeat() is None
+                assert client.current_controller_url == url
+        
+        asyncio.run(scenario())
+
+
+class TestResultReporting:
+    """Tests for command result reporting."""
+
+    def test_report_command_result(self):
+        """A single result should be posted to the command's result endpoint."""
+        controller = FakeController()
+        controller.reply("/api/v1/commands/c1/result", {"status": "completed"})
+        
+        async def scenario():
+            async with controller_client(controller, auth_token="secret") as client:
+                return await client.report_command_result("c1", "completed", result={"pong": True})
+        
+        assert asyncio.run(scenario()) is True
+        assert controller.bodies("/api/v1/commands/c1/result") == [
+            {"command_id": "c1", "status": "completed", "result": {"pong": True}, "error_message": None}
+        ]
+
+    def test_report_results_batch(self, no_backoff):
+        """Batched results go in one request; an empty batch sends nothing."""
+        controller = FakeController()
+        controller.reply(RESULTS_BATCH, {"updated": 2})
+        results = [{"command_id": "c1", "status": "completed"}, {"command_id": "c2", "status": "failed"}]
+        
+        async def scenario():
+            async with controller_client(controller, auth_token="secret") as client:
+                assert await client.report_results_batch([]) is True
+                assert controller.requests == []
+                assert await client.report_results_batch(results) is True
+        
+        asyncio.run(scenario())
+        assert controller.bodies(RESULTS_BATCH) == [{"results": results}]
+
+    def test_report_results_batch_failure(self, no_backoff):
+        """A batch the controller keeps rejecting should report failure."""
+        controller = FakeController()
+        controller.reply(RESULTS_BATCH, status=500)
+        
+        async def scenario():
+            async with controller_client(controller, auth_token="secret", max_retries=1) as client:
+                return await client.report_results_batch([{"command_id": "c1", "status": "completed"}])
+        
+        assert asyncio.run(scenario()) is False
+
+
+class TestBlockingControllerClient:
+    """Tests for the blocking facade used by mesh threads."""
+
+    def test_unbound_loop_returns_none(self):
+        """Calls before a loop is bound should not block."""
+        config = AgentConfig(node_id="test-node", controller={"primary_url": UNREACHABLE_URL})
+        blocking = BlockingControllerClient(ControllerClient(config))
+        assert blocking.heartbeat() is None
+
+    def test_calls_run_on_bound_loop(self):
+        """Calls from another thread should run on the bound loop."""
+        controller = FakeController()
+        controller.reply(HEARTBEAT, {"pending_commands": []})
+        results = []
+        
+        async def scenario():
+            async with controller_client(controller, auth_token="secret") as client:
+                blocking = BlockingControllerClient(client)
+                blocking.bind_loop(asyncio.get_running_loop())
+                thread = threading.Thread(target=lambda: results.append(blocking.heartbeat(cpu_usage=1.0)))
+                thread.start()
+                while thread.is_alive():
+                    await asyncio.sleep(0.01)
+                blocking.bind_loop(None)
+        
+        asyncio.run(scenario())
+        assert results == [[]]
+        assert controller.bodies(HEARTBEAT)[0]["cpu_usage"] == 1.0
@@ -0,0 +1,81 @@
+# Copyright 2024 TacticalMesh Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Tests for the Node Agent heartbeat cycle.
+"""
+
+import asyncio
+import logging
+import threading
+
+from agent.actions import CommandResult
+from agent.client import CommandInfo
+from agent.config import AgentConfig
+from agent.main import NodeAgent
+
+
+class RecordingClient:
+    """Controller client stand-in that dispatches commands once and records reports."""
+    
+    def __init__(self, commands):
+        self.commands = commands
+        self.heartbeats = 0
+        self.reports = []
+    
+    async def heartbeat(self, **kwargs):
+        self.heartbeats += 1
+        commands, self.commands = self.commands, []
+        return commands
+    
+    async def report_results_batch(self, results):
+        self.reports.append(results)
+        return True
+
+
+class TestHeartbeatCycle:
+    """Tests for running commands alongside heartbeats."""
+
+    def test_slow_command_does_not_delay_heartbeats(self, tmp_path):
+        """Heartbeats should continue while a dispatched command is still running."""
+        config = AgentConfig(
+            node_id="test-node",
+            controller={"primary_url": "http://controller:8000"},
+            data_dir=str(tmp_path)
+        )
+        agent = NodeAgent(config, logging.getLogger(__name__))
+        agent.client = RecordingClient([
+            CommandInfo(id="c1", command_type="ping", payload=None, created_at="2024-01-01T00:00:00"),
+            CommandInfo(id="c2", command_type="ping", payload=None, created_at="2024-01-01T00:00:01"),
+        ])
+        release = threading.Event()
+        
+        def slow_execute(command_type, payload):
+            release.wait(timeout=5)
+            return CommandResult(success=True, result={"pong": True})
+        
+        agent.action_registry.execute = slow_execute
+        
+        async def scenario():
+            assert await agent.send_heartbeat() is True
+            assert await agent.send_heartbeat() is True
+            # Acknowledged straight away, results held back by the command
+            await asyncio.sleep(0.05)
+            assert agent.client.reports == [[
+                {"command_id": "c1", "status": "acknowledged"},
+                {"command_id": "c2", "status": "acknowledged"},
+            ]]
+            
+            release.set()
+            await asyncio.gather(*agent._command_tasks)
+        
+        try:
+            asyncio.run(scenario())
+        finally:
+            agent.cleanup()
+        
+        assert agent.client.heartbeats == 2
+        assert [(r["command_id"], r["status"]) for r in agent.client.reports[1]] == [
+            ("c1", "completed"),
+            ("c2", "completed"),
+        ]
+        assert not agent._command_tasks
@@ -6,32 +6,139 @@ Authentication and authorization module for TacticalMesh.
 Provides JWT-based authentication and role-based access control.
 """
 
+import asyncio
+import base64
+import hashlib
+import hmac
 import logging
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+import jwt
+import orjson
+from jwt import InvalidTokenError
 from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, make_transient_to_detached
 
+from .audit import AUDIT_LOG_INSERT, AuditLogWriter
 from .config import get_settings
-from .database import get_db
-from .models import User, UserRole, AuditLog
+from .database import async_session_maker, get_db
+from .models import User, UserRole
 from .schemas import TokenData
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context. New hashes use argon2id; existing bcrypt hashes
+# still verify and are rehashed on the next successful login.
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated=["bcrypt"],
+    argon2__type="ID",
+    argon2__memory_cost=settings.password_hash_memory_cost,
+    argon2__time_cost=settings.password_hash_time_cost,
+    argon2__parallelism=settings.password_hash_parallelism,
+)
+
+# Verified against when the username is unknown, so a missing account costs
+# the same KDF time as a wrong password and cannot be told apart by timing
+_DUMMY_HASH = pwd_context.hash("tacticalmesh-dummy-password")
+
+# Password KDF work runs in worker processes: argon2/bcrypt are CPU bound,
+# so login throughput scales with cores instead of contending for the GIL.
+# "spawn" avoids forking a process that already runs engine/asyncio threads.
+PASSWORD_WORKERS = os.cpu_count() or 1
+_password_executor = ProcessPoolExecutor(
+    max_workers=PASSWORD_WORKERS,
+    mp_context=multiprocessing.get_context("spawn")
+)
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# Audit logging is fixed for the process lifetime; hot call sites can test
+# this flag to skip building audit arguments altogether
+AUDIT_ENABLED = settings.audit_log_enabled
+
+# Batched audit writer, started and stopped by the application lifespan
+audit_writer = AuditLogWriter(
+    async_session_maker,
+    buffer_size=settings.audit_buffer_size,
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval,
+)
+
+# Role lookup by claim value, avoiding Enum value resolution per request
+_ROLE_BY_VALUE = {role.value: role for role in UserRole}
+
+# Signing parameters bound once at import; read on every token operation
+_JWT_KEY = settings.jwt_secret_key
+_JWT_ALGORITHM = settings.jwt_algorithm
+_JWT_ALGORITHMS = [settings.jwt_algorithm]
+_JWT_EXPIRES_DELTA = timedelta(minutes=settings.jwt_access_token_expire_minutes)
+
+# HMAC algorithms are signed inline: the static header segment is encoded
+# once and a keyed HMAC template is copied per token. Other algorithms
+# (RS*/ES*) go through PyJWT.
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+
+def _b64url(data: bytes) -> bytes:
+    """Unpadded base64url, as used by JWS."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+_JWT_HMAC = (
+    hmac.new(_JWT_KEY.encode(), digestmod=_HMAC_DIGESTS[_JWT_ALGORITHM])
+    if _JWT_ALGORITHM in _HMAC_DIGESTS else None
+)
+_JWT_HEADER_SEGMENT = _b64url(orjson.dumps({"alg": _JWT_ALGORITHM, "typ": "JWT"})) + b"."
+
+# Claims every access token must carry
+JWT_DECODE_OPTIONS = {"require": ["exp", "sub"]}
+
+# Verified-token cache: sha256(token) -> (cache deadline, TokenData).
+# Only successful decodes are stored, and never past the token's own expiry.
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_CACHE_TTL_SECONDS = min(30, settings.jwt_access_token_expire_minutes * 60)
+_token_cache: "OrderedDict[bytes, Tuple[float, TokenData]]" = OrderedDict()
+
+# Authenticated-user cache: user_id -> (cache deadline, column snapshot).
+# Plain column values are stored rather than ORM instances so entries are
+# never bound to the session that loaded them.
+USER_CACHE_MAX_SIZE = 5000
+USER_CACHE_TTL_SECONDS = 60
+_user_cache: "OrderedDict[UUID, Tuple[float, dict]]" = OrderedDict()
+
+# Recently verified credentials: keyed blake2b(username, password) ->
+# (cache deadline, password hash it was verified against). A hit skips the
+# KDF only while the stored hash is unchanged, so a password change or
+# rehash invalidates it. The key is random per process and never stored.
+CREDENTIAL_CACHE_MAX_SIZE = 1024
+CREDENTIAL_CACHE_TTL_SECONDS = 30
+_CREDENTIAL_CACHE_KEY = os.urandom(32)
+_credential_cache: "OrderedDict[bytes, Tuple[float, str]]" = OrderedDict()
+
+# Columns loaded (and cached) for authenticated users: what the auth checks,
+# login, password change and /me actually read. Lockout counters and
+# bookkeeping timestamps are left unloaded.
+_USER_COLUMNS = (
+    "id", "username", "email", "hashed_password", "role", "is_active",
+    "force_password_change", "created_at", "last_login",
+)
+_USER_LOAD_ONLY = load_only(*(getattr(User, key) for key in _USER_COLUMNS))
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -43,6 +150,54 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password executor, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor, verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash on the password executor, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+
+def _credential_key(username: str, password: str) -> bytes:
+    """Derive the verified-credential cache key without keeping the password."""
+    digest = hashlib.blake2b(password.encode(), key=_CREDENTIAL_CACHE_KEY, digest_size=16)
+    return digest.digest() + username.encode()
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash if its scheme is deprecated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _warm_up_kdf() -> None:
+    """Load the hash backends in a password worker process."""
+    for scheme in pwd_context.schemes():
+        pwd_context.handler(scheme).get_backend()
+    pwd_context.verify("warmup", _DUMMY_HASH)
+
+
+async def warm_up_auth() -> None:
+    """Start the password workers and load the hash and JWT backends."""
+    decode_token(create_access_token({"sub": "warmup"}, timedelta(seconds=5)))
+    
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(
+        loop.run_in_executor(_password_executor, _warm_up_kdf)
+        for _ in range(PASSWORD_WORKERS)
+    ))
+
+
+def shutdown_auth() -> None:
+    """Stop the password worker processes."""
+    _password_executor.shutdown(wait=False, cancel_futures=True)
+
+
 def create_access_token(
     data: dict,
     expires_delta: Optional[timedelta] = None
@@ -58,57 +213,109 @@ def create_access_token(
         Encoded JWT token string
     """
     to_encode = data.copy()
+    to_encode["exp"] = int(time.time() + (expires_delta or _JWT_EXPIRES_DELTA).total_seconds())
     
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(
-            minutes=settings.jwt_access_token_expire_minutes
-        )
-    
-    to_encode.update({"exp": expire})
-    
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.jwt_secret_key,
-        algorithm=settings.jwt_algorithm
-    )
+    if _JWT_HMAC is None:
+        return jwt.encode(to_encode, _JWT_KEY, algorithm=_JWT_ALGORITHM)
     
-    return encoded_jwt
+    signing_input = _JWT_HEADER_SEGMENT + _b64url(orjson.dumps(to_encode))
+    mac = _JWT_HMAC.copy()
+    mac.update(signing_input)
+    return (signing_input + b"." + _b64url(mac.digest())).decode()
 
 
 def decode_token(token: str) -> Optional[TokenData]:
     """
     Decode and validate a JWT token.
     
+    Recently verified tokens are served from an in-memory LRU cache so
+    repeated requests with the same bearer token skip signature checks.
+    
     Args:
         token: JWT token string
         
     Returns:
         TokenData if valid, None otherwise
     """
+    key = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+    
+    cached = _token_cache.get(key)
+    if cached is not None:
+        if cached[0] > now:
+            _token_cache.move_to_end(key)
+            return cached[1]
+        del _token_cache[key]
+    
     try:
+        # exp and sub are enforced by the decoder in the same pass that
+        # verifies the signature; the token is parsed exactly once.
         payload = jwt.decode(
             token,
-            settings.jwt_secret_key,
-            algorithms=[settings.jwt_algorithm]
+            _JWT_KEY,
+            algorithms=_JWT_ALGORITHMS,
+            options=JWT_DECODE_OPTIONS
         )
         
-        username: str = payload.get("sub")
-        user_id: str = payload.get("user_id")
-        role: str = payload.get("role")
+        user_id = payload.get("user_id")
+        role = payload.get("role")
         
-        if username is None:
-            return None
-            
-        return TokenData(
-            username=username,
+        token_data = TokenData(
+            username=payload["sub"],
             user_id=UUID(user_id) if user_id else None,
-            role=UserRole(role) if role else None
+            role=_ROLE_BY_VALUE[role] if role else None
         )
-    except JWTError as e:
+    except (InvalidTokenError, KeyError, ValueError) as e:
         logger.warning(f"JWT decode error: {e}")
         return None
+    
+    deadline = min(now + TOKEN_CACHE_TTL_SECONDS, payload["exp"])
+    
+    _token_cache[key] = (deadline, token_data)
+    if len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+        _token_cache.popitem(last=False)
+    
+    return token_data
+
+
+def _select_user_by_username(username: str):
+    """Cached-compilation statement for the per-request username lookup."""
+    return lambda_stmt(
+        lambda: select(User).options(_USER_LOAD_ONLY).where(User.username == username)
+    )
+
+
+def invalidate_cached_user(user_id: Optional[UUID]) -> None:
+    """Drop a user from the authenticated-user cache after it changes."""
+    _user_cache.pop(user_id, None)
+
+
+def _cache_user(user: User) -> None:
+    """Store a column snapshot of an authenticated user."""
+    _user_cache[user.id] = (
+        time.time() + USER_CACHE_TTL_SECONDS,
+        {key: getattr(user, key) for key in _USER_COLUMNS}
+    )
+    _user_cache.move_to_end(user.id)
+    if len(_user_cache) > USER_CACHE_MAX_SIZE:
+        _user_cache.popitem(last=False)
+
+
+async def _get_cached_user(db: AsyncSession, token_data: TokenData) -> Optional[User]:
+    """Rebuild a cached user and attach it to the session without a SELECT."""
+    cached = _user_cache.get(token_data.user_id)
+    if cached is None:
+        return None
+    
+    deadline, snapshot = cached
+    if deadline <= time.time() or snapshot["username"] != token_data.username:
+        del _user_cache[token_data.user_id]
+        return None
+    
+    _user_cache.move_to_end(token_data.user_id)
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
 
 
 async def get_current_user(
@@ -138,13 +345,19 @@ async def get_current_user(
     if token_data is None or token_data.username is None:
         raise credentials_exception
     
-    result = await db.execute(
-        select(User).where(User.username == token_data.username)
-    )
-    user = result.scalar_one_or_none()
+    user = None
+    if token_data.user_id is not None:
+        user = await _get_cached_user(db, token_data)
     
     if user is None:
-        raise credentials_exception
+        result = await db.execute(_select_user_by_username(token_data.username))
+        user = result.scalar_one_or_none()
+        
+        if user is None:
+            raise credentials_exception
+        
+        if user.id == token_data.user_id:
+            _cache_user(user)
     
     if not user.is_active:
         raise HTTPException(
@@ -177,10 +390,16 @@ def require_role(*allowed_roles: UserRole):
     Returns:
         Dependency function that checks user role
     """
+    return _role_checker(frozenset(allowed_roles))
+
+
+@lru_cache(maxsize=None)
+def _role_checker(allowed: FrozenSet[UserRole]):
+    """Build (once per distinct role set) the dependency behind require_role."""
     async def role_checker(
         current_user: User = Depends(get_current_active_user)
     ) -> User:
-        if current_user.role not in allowed_roles:
+        if current_user.role not in allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Role '{current_user.role.value}' is not authorized for this action"
@@ -196,7 +415,7 @@ require_operator = require_role(UserRole.ADMIN, UserRole.OPERATOR)
 require_any_role = require_role(UserRole.ADMIN, UserRole.OPERATOR, UserRole.OBSERVER)
 
 
-async def create_audit_log(
+async def _create_audit_log(
     db: AsyncSession,
     user: Optional[User],
     action: str,
@@ -205,11 +424,21 @@ async def create_audit_log(
     details: Optional[dict] = None,
     success: bool = True,
     error_message: Optional[str] = None,
-    request: Optional[Request] = None
-) -> AuditLog:
+    request: Optional[Request] = None,
+    durable: bool = False
+) -> None:
     """
     Create an audit log entry.
     
+    Entries are handed to the background audit writer and inserted in
+    batches. If the writer is not running (e.g. outside the application
+    lifespan) the entry is flushed on the request's session instead.
+    
+    Failure paths that raise right after logging pass ``durable=True``:
+    the entry is inserted and committed on the request's session before
+    returning, so it is neither rolled back with the request nor lost
+    from the in-memory buffer.
+    
     Args:
         db: Database session
         user: User who performed the action
@@ -220,13 +449,8 @@ async def create_audit_log(
         success: Whether the action succeeded
         error_message: Error message if failed
         request: HTTP request for IP/user agent
-        
-    Returns:
-        Created AuditLog entry
+        durable: Commit the entry before returning
     """
-    if not settings.audit_log_enabled:
-        return None
-    
     ip_address = None
     user_agent = None
     
@@ -234,7 +458,7 @@ async def create_audit_log(
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent", "")[:500]
     
-    audit_log = AuditLog(
+    row = dict(
         user_id=user.id if user else None,
         username=user.username if user else None,
         action=action,
@@ -244,19 +468,31 @@ async def create_audit_log(
         success=success,
         error_message=error_message,
         ip_address=ip_address,
-        user_agent=user_agent
+        user_agent=user_agent,
+        timestamp=datetime.utcnow()
     )
     
-    db.add(audit_log)
-    await db.flush()
+    if durable:
+        await db.execute(AUDIT_LOG_INSERT, row)
+        await db.commit()
+    elif audit_writer.running:
+        audit_writer.submit(row)
+    else:
+        await db.execute(AUDIT_LOG_INSERT, row)
     
     logger.info(
         f"Audit: user={user.username if user else 'anonymous'} "
         f"action={action} resource={resource_type}/{resource_id} "
         f"success={success}"
     )
-    
-    return audit_log
+
+
+async def _skip_audit_log(*args, **kwargs) -> None:
+    """Stand-in for create_audit_log when audit logging is disabled."""
+    return None
+
+
+create_audit_log = _create_audit_log if AUDIT_ENABLED else _skip_audit_log
 
 
 async def authenticate_user(
@@ -267,6 +503,10 @@ async def authenticate_user(
     """
     Authenticate a user by username and password.
     
+    A username/password pair verified in the last
+    ``CREDENTIAL_CACHE_TTL_SECONDS`` is accepted without running the KDF
+    again, as long as the user's stored hash has not changed since.
+    
     Args:
         db: Database session
         username: Username to authenticate
@@ -275,15 +515,39 @@ async def authenticate_user(
     Returns:
         User if authentication succeeds, None otherwise
     """
-    result = await db.execute(
-        select(User).where(User.username == username)
-    )
+    result = await db.execute(_select_user_by_username(username))
     user = result.scalar_one_or_none()
     
-    if not user:
-        return None
+    if user is not None:
+        key = _credential_key(username, password)
+        cached = _credential_cache.get(key)
+        if cached is not None:
+            if cached[0] > time.time() and cached[1] == user.hashed_password:
+                _credential_cache.move_to_end(key)
+                return user
+            del _credential_cache[key]
     
-    if not verify_password(password, user.hashed_password):
+    # Run the KDF off the event loop so a login burst cannot stall it.
+    # Unknown users are verified against a dummy hash for constant timing.
+    loop = asyncio.get_running_loop()
+    verified, new_hash = await loop.run_in_executor(
+        _password_executor,
+        _verify_and_update,
+        password,
+        user.hashed_password if user else _DUMMY_HASH
+    )
+    
+    if not user or not verified:
         return None
     
+    if new_hash:
+        user.hashed_password = new_hash
+    
+    _credential_cache[key] = (
+        time.time() + CREDENTIAL_CACHE_TTL_SECONDS,
+        user.hashed_password
+    )
+    if len(_credential_cache) > CREDENTIAL_CACHE_MAX_SIZE:
+        _credential_cache.popitem(last=False)
+    
     return user
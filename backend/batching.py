@@ -0,0 +1,128 @@
+# Copyright 2024 TacticalMesh Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Batched background inserts for TacticalMesh.
+
+Append-only tables written on hot request paths (audit log, telemetry)
+are fed through an in-memory queue and inserted in multi-row batches by
+a single background task per table.
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import Insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Queue marker telling the writer task to flush and exit
+_STOP = object()
+
+
+class BatchInsertWriter:
+    """
+    Background writer that batches rows for one INSERT statement.
+    
+    Requests enqueue plain row dicts without touching the database; a
+    single task drains the queue and executes ``statement`` with up to
+    ``batch_size`` rows at a time, flushing at least every
+    ``flush_interval`` seconds.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        statement: Insert,
+        session_factory: Callable[[], AsyncSession],
+        buffer_size: int = 10000,
+        batch_size: int = 100,
+        flush_interval: float = 2.0
+    ):
+        self.name = name
+        self.statement = statement
+        self.session_factory = session_factory
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def running(self) -> bool:
+        """Whether the writer task is accepting entries."""
+        return self._task is not None and not self._task.done()
+    
+    def start(self) -> None:
+        """Start the writer task on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.buffer_size)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"{self.name} writer started")
+    
+    async def stop(self) -> None:
+        """Flush buffered entries and stop the writer task."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        logger.info(f"{self.name} writer stopped")
+    
+    def submit(self, row: Dict[str, Any]) -> bool:
+        """
+        Enqueue a row without blocking.
+        
+        Args:
+            row: Column values for the writer's INSERT
+            
+        Returns:
+            True if queued, False if the buffer was full and the row was dropped
+        """
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except asyncio.QueueFull:
+            logger.warning(
+                f"{self.name} buffer full ({self.buffer_size}), dropping entry"
+            )
+            return False
+    
+    async def _run(self) -> None:
+        """Drain the queue in batches until the stop marker is seen."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            await self._write(batch)
+    
+    async def _write(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert a batch of rows in a single statement."""
+        try:
+            async with self.session_factory() as session:
+                await session.execute(self.statement, rows)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to write {len(rows)} {self.name} entries: {e}")
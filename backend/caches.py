@@ -0,0 +1,82 @@
+# Copyright 2024 TacticalMesh Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+In-process lookup caches for TacticalMesh.
+
+Short-lived caches for values that are read on hot request paths and
+change rarely. Entries expire on their own; writers that change a cached
+value invalidate it explicitly.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Node
+
+# node_id -> (cache deadline, Node.id). Only existing nodes are cached, so
+# a node registered after a miss is found on the next lookup.
+NODE_UUID_CACHE_MAX_SIZE = 4096
+NODE_UUID_CACHE_TTL_SECONDS = 60
+_node_uuid_cache: "OrderedDict[str, Tuple[float, UUID]]" = OrderedDict()
+
+# One in-flight lookup per node_id; concurrent callers wait for it
+_node_uuid_locks: Dict[str, asyncio.Lock] = {}
+
+_SELECT_NODE_ID_BY_NODE_ID = select(Node.id).where(Node.node_id == bindparam("node_id"))
+
+
+def _cached_node_uuid(node_id: str) -> Optional[UUID]:
+    """Return a live cache entry, dropping it if expired."""
+    cached = _node_uuid_cache.get(node_id)
+    if cached is None:
+        return None
+    if cached[0] <= time.time():
+        del _node_uuid_cache[node_id]
+        return None
+    _node_uuid_cache.move_to_end(node_id)
+    return cached[1]
+
+
+async def node_uuid(db: AsyncSession, node_id: str) -> Optional[UUID]:
+    """
+    Resolve a node's public node_id to its primary key.
+
+    Args:
+        db: Database session used on a cache miss
+        node_id: The node's node_id
+
+    Returns:
+        The node's UUID, or None if no such node exists
+    """
+    uuid = _cached_node_uuid(node_id)
+    if uuid is not None:
+        return uuid
+
+    lock = _node_uuid_locks.setdefault(node_id, asyncio.Lock())
+    try:
+        async with lock:
+            uuid = _cached_node_uuid(node_id)
+            if uuid is not None:
+                return uuid
+
+            result = await db.execute(_SELECT_NODE_ID_BY_NODE_ID, {"node_id": node_id})
+            uuid = result.scalar_one_or_none()
+            if uuid is not None:
+                _node_uuid_cache[node_id] = (time.time() + NODE_UUID_CACHE_TTL_SECONDS, uuid)
+                if len(_node_uuid_cache) > NODE_UUID_CACHE_MAX_SIZE:
+                    _node_uuid_cache.popitem(last=False)
+            return uuid
+    finally:
+        if not lock.locked() and _node_uuid_locks.get(node_id) is lock:
+            del _node_uuid_locks[node_id]
+
+
+def invalidate_node_uuid(node_id: str) -> None:
+    """Drop a node from the cache after it is deleted."""
+    _node_uuid_cache.pop(node_id, None)
@@ -7,10 +7,11 @@ Handles environment-based configuration with sensible defaults for
 development and production deployments.
 """
 
+from dataclasses import make_dataclass
 from functools import lru_cache
 from typing import List, Optional
 
-from pydantic import Field
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -32,6 +33,29 @@ class Settings(BaseSettings):
         description="PostgreSQL connection URL"
     )
     
+    @field_validator("database_url")
+    @classmethod
+    def use_asyncpg_driver(cls, value: str) -> str:
+        """Map plain postgres:// URLs onto the asyncpg driver."""
+        scheme, sep, rest = value.partition("://")
+        if scheme in ("postgres", "postgresql"):
+            return f"postgresql+asyncpg{sep}{rest}"
+        return value
+    
+    db_pool_size: int = 20
+    db_max_overflow: int = 40
+    db_pool_timeout: int = Field(
+        default=5,
+        description="Seconds to wait for a pooled connection before failing"
+    )
+    db_statement_cache_size: int = Field(
+        default=1024,
+        description=(
+            "asyncpg prepared statement cache size per connection; "
+            "must be 0 behind pgbouncer in transaction pooling mode"
+        )
+    )
+    
     # Redis settings (for transient data/caching)
     redis_url: Optional[str] = Field(
         default="redis://localhost:6379/0",
@@ -46,6 +70,14 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 60
     
+    # Password hashing (argon2id); lowered only by the test suite
+    password_hash_time_cost: int = 3
+    password_hash_memory_cost: int = Field(
+        default=65536,
+        description="argon2 memory cost in KiB; must be at least 8 x parallelism"
+    )
+    password_hash_parallelism: int = 4
+    
     # CORS settings
     cors_origins: List[str] = Field(
         default=["http://localhost:3000", "http://localhost:5173"],
@@ -64,6 +96,32 @@ class Settings(BaseSettings):
     
     # Audit logging
     audit_log_enabled: bool = True
+    audit_buffer_size: int = Field(
+        default=10000,
+        description="Maximum audit entries buffered in memory before new ones are dropped"
+    )
+    audit_batch_size: int = Field(
+        default=100,
+        description="Maximum audit entries written per INSERT"
+    )
+    audit_flush_interval: float = Field(
+        default=2.0,
+        description="Seconds to wait for a batch to fill before writing it"
+    )
+    
+    # Telemetry ingestion
+    telemetry_buffer_size: int = Field(
+        default=50000,
+        description="Maximum telemetry records buffered in memory before new ones are dropped"
+    )
+    telemetry_batch_size: int = Field(
+        default=5000,
+        description="Maximum telemetry records written per INSERT"
+    )
+    telemetry_flush_interval: float = Field(
+        default=1.0,
+        description="Seconds to wait for a telemetry batch to fill before writing it"
+    )
     
     class Config:
         env_file = ".env"
@@ -71,11 +129,23 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
-@lru_cache()
-def get_settings() -> Settings:
+# Immutable, slotted snapshot of Settings. Attribute reads are plain slot
+# loads instead of going through pydantic's model machinery.
+FrozenSettings = make_dataclass(
+    "FrozenSettings",
+    [(name, field.annotation) for name, field in Settings.model_fields.items()],
+    frozen=True,
+    slots=True,
+)
+FrozenSettings.__module__ = __name__
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> FrozenSettings:
     """
     Get cached settings instance.
     
-    Uses lru_cache to ensure settings are only loaded once.
+    Uses lru_cache to ensure settings are only loaded (and validated by
+    pydantic) once; callers receive a frozen dataclass snapshot.
     """
-    return Settings()
+    return FrozenSettings(**Settings().model_dump())
@@ -11,10 +11,13 @@ import asyncio
 import logging
 from typing import AsyncGenerator
 
+import orjson
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.exc import OperationalError, InterfaceError
 from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 
 from .config import get_settings
 
@@ -25,16 +28,32 @@ settings = get_settings()
 MAX_CONNECTION_RETRIES = 3
 RETRY_DELAY_SECONDS = 5
 
+# asyncpg-specific tuning: keep prepared statements cached per connection
+# and disable the PostgreSQL JIT, which only adds latency to short OLTP queries
+connect_args = {}
+if make_url(settings.database_url).get_driver_name() == "asyncpg":
+    connect_args = {
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+        "server_settings": {"jit": "off"},
+    }
+
 # Create async engine with production settings
 engine = create_async_engine(
     settings.database_url,
     echo=settings.debug,
+    echo_pool="debug" if settings.debug else False,
     future=True,
     pool_pre_ping=True,  # Verify connections before use
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
     pool_recycle=1800,  # Recycle connections after 30 minutes
-    pool_timeout=30,  # Wait up to 30s for connection from pool
+    pool_timeout=settings.db_pool_timeout,  # Fail fast instead of queueing on checkout
+    connect_args=connect_args,
+    query_cache_size=1200,  # Room for every filter permutation of the list endpoints
+    # JSON/JSONB columns (audit details, node metadata, config values)
+    json_serializer=lambda value: orjson.dumps(value).decode(),
+    json_deserializer=orjson.loads,
 )
 
 # Create async session factory
@@ -81,7 +100,6 @@ async def get_db_with_retry() -> AsyncGenerator[AsyncSession, None]:
             async with async_session_maker() as session:
                 try:
                     yield session
-                    await session.commit()
                     return
                 except Exception:
                     await session.rollback()
@@ -116,11 +134,26 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     
     Yields an async session and ensures proper cleanup.
     Uses retry logic for production resilience.
+    
+    The session is not committed automatically: endpoints that write call
+    ``await db.commit()`` themselves, so read-only requests skip the
+    COMMIT round trip. Uncommitted work is rolled back on close.
     """
     async for session in get_db_with_retry():
         yield session
 
 
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """
+    Dependency that provides the session factory.
+    
+    Lets an endpoint open extra short-lived sessions, e.g. to run
+    independent read queries concurrently; an AsyncSession can only
+    execute one statement at a time.
+    """
+    return async_session_maker
+
+
 async def init_db() -> None:
     """
     Initialize database tables with retry logic.
@@ -7,7 +7,8 @@ Provides centralized dependencies for database sessions, authentication,
 and role-based access control across all routers.
 """
 
-from typing import AsyncGenerator
+from functools import lru_cache
+from typing import AsyncGenerator, FrozenSet
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -27,12 +28,11 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     Dependency that provides a database session.
     
     Yields an async session and ensures proper cleanup via context manager.
-    The session auto-commits on successful exit or rolls back on exception.
+    Endpoints that write commit explicitly; the session rolls back on exception.
     """
     async with async_session_maker() as session:
         try:
             yield session
-            await session.commit()
         except Exception:
             await session.rollback()
             raise
@@ -59,14 +59,22 @@ def require_role(*allowed_roles: UserRole):
         async def admin_endpoint(user: User = Depends(require_role(UserRole.ADMIN))):
             ...
     """
+    return _role_checker(frozenset(allowed_roles))
+
+
+@lru_cache(maxsize=None)
+def _role_checker(allowed: FrozenSet[UserRole]):
+    """Build (once per distinct role set) the dependency behind require_role."""
+    required = ", ".join(role.value for role in UserRole if role in allowed)
+    
     async def role_checker(
         current_user: User = Depends(get_current_active_user)
     ) -> User:
-        if current_user.role not in allowed_roles:
+        if current_user.role not in allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Role '{current_user.role.value}' is not authorized for this action. "
-                       f"Required: {', '.join(r.value for r in allowed_roles)}"
+                       f"Required: {required}"
             )
         return current_user
     
@@ -7,23 +7,23 @@ This is the main entry point for the Mesh Controller backend service.
 It provides the central orchestration for tactical mesh networks.
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from datetime import datetime
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
+from fastapi.responses import ORJSONResponse
 
 from .config import get_settings
 from .database import init_db, close_db, async_session_maker
 from .models import User, UserRole
-from .auth import get_password_hash
+from .auth import audit_writer, get_password_hash, shutdown_auth, warm_up_auth
 from .schemas import HealthResponse
 from .routers import auth, nodes, commands, config, simulation
-from .security import limiter
+from .routers.nodes import mark_stale_nodes_offline, telemetry_writer
+from .security import close_redis, init_redis
 from .simulation import simulation_manager
 
 # Configure logging
@@ -35,6 +35,19 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def stale_node_sweeper() -> None:
+    """Mark nodes offline on a timer, every half heartbeat timeout."""
+    interval = settings.node_heartbeat_timeout_seconds / 2
+    while True:
+        try:
+            async with async_session_maker() as session:
+                swept = await mark_stale_nodes_offline(session)
+            if swept:
+                logger.info(f"Marked {swept} stale node(s) offline")
+        except Exception as e:
+            logger.error(f"Stale node sweep failed: {e}")
+        await asyncio.sleep(interval)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -42,6 +55,8 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting TacticalMesh Controller...")
     await init_db()
+    await init_redis(settings.redis_url)
+    await warm_up_auth()
     
     # Create default admin user if not exists
     async with async_session_maker() as session:
@@ -62,6 +77,9 @@ async def lifespan(app: FastAPI):
             await session.commit()
             logger.warning("Created default admin user - PASSWORD CHANGE REQUIRED ON FIRST LOGIN")
     
+    audit_writer.start()
+    telemetry_writer.start()
+    sweeper_task = asyncio.create_task(stale_node_sweeper())
     logger.info("TacticalMesh Controller started successfully")
     
     yield
@@ -69,6 +87,11 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down TacticalMesh Controller...")
     await simulation_manager.stop()  # Ensure simulation stops
+    sweeper_task.cancel()
+    await audit_writer.stop()  # Flush buffered audit entries
+    await telemetry_writer.stop()
+    shutdown_auth()
+    await close_redis()
     await close_db()
     logger.info("TacticalMesh Controller stopped")
 
@@ -106,13 +129,10 @@ Apache License 2.0 - https://www.apache.org/licenses/LICENSE-2.0
         "name": "Apache 2.0",
         "url": "https://www.apache.org/licenses/LICENSE-2.0",
     },
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Configure rate limiting
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -128,7 +148,7 @@ app.add_middleware(
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler for unhandled errors."""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
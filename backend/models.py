@@ -8,20 +8,45 @@ and audit logs.
 """
 
 import enum
-from datetime import datetime
 from typing import Optional
 from uuid import uuid4
 
 from sqlalchemy import (
     Boolean, Column, DateTime, Enum, Float, ForeignKey,
-    Integer, String, Text, JSON
+    Index, Integer, String, Text, JSON, text
 )
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql.expression import FunctionElement
 
 from .database import Base
 
 
+class utcnow(FunctionElement):
+    """Database-side current timestamp as naive UTC."""
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _compile_utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "sqlite")
+def _compile_utcnow_sqlite(element, compiler, **kw):
+    # SQLite stores DateTime as text, so match SQLAlchemy's
+    # "YYYY-MM-DD HH:MM:SS.ffffff" format; CURRENT_TIMESTAMP drops the
+    # fraction and then compares out of order against bound values
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+@compiles(utcnow, "postgresql")
+def _compile_utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
 class UserRole(str, enum.Enum):
     """User roles for access control."""
     ADMIN = "admin"
@@ -61,6 +86,7 @@ class User(Base):
     """User model for authentication and authorization."""
     
     __tablename__ = "users"
+    __mapper_args__ = {"eager_defaults": True}  # RETURNING server timestamps
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     username = Column(String(100), unique=True, nullable=False, index=True)
@@ -74,13 +100,18 @@ class User(Base):
     failed_login_attempts = Column(Integer, default=0)
     locked_until = Column(DateTime, nullable=True)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
     last_login = Column(DateTime, nullable=True)
     
     # Relationships
     audit_logs = relationship("AuditLog", back_populates="user")
     commands = relationship("Command", back_populates="created_by_user")
+    
+    __table_args__ = (
+        # Authentication lookup by username on active accounts
+        Index("ix_users_username_active", "username", "is_active"),
+    )
 
 
 
@@ -88,6 +119,7 @@ class Node(Base):
     """Mesh node model representing edge devices."""
     
     __tablename__ = "nodes"
+    __mapper_args__ = {"eager_defaults": True}  # RETURNING server timestamps
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     node_id = Column(String(100), unique=True, nullable=False, index=True)
@@ -120,18 +152,24 @@ class Node(Base):
     node_metadata = Column(JSON, nullable=True)
     
     # Timestamps
-    registered_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    registered_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     commands = relationship("Command", back_populates="target_node")
     telemetry_records = relationship("TelemetryRecord", back_populates="node")
+    
+    __table_args__ = (
+        # Heartbeat-timeout sweep: status = ONLINE AND last_heartbeat < cutoff
+        Index("ix_nodes_status_hb", "status", "last_heartbeat"),
+    )
 
 
 class Command(Base):
     """Command model for controller-to-node instructions."""
     
     __tablename__ = "commands"
+    __mapper_args__ = {"eager_defaults": True}  # RETURNING server timestamps
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     command_type = Column(Enum(CommandType), nullable=False)
@@ -149,7 +187,7 @@ class Command(Base):
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
     sent_at = Column(DateTime, nullable=True)
     acknowledged_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
@@ -157,12 +195,21 @@ class Command(Base):
     # Relationships
     target_node = relationship("Node", back_populates="commands")
     created_by_user = relationship("User", back_populates="commands")
+    
+    __table_args__ = (
+        # list_commands filters, newest first
+        Index("ix_commands_status_created", status, created_at.desc()),
+        Index("ix_commands_target_created", target_node_id, created_at.desc()),
+        # Heartbeat dispatch: a node's pending commands, oldest first
+        Index("ix_commands_target_status_created", target_node_id, status, created_at),
+    )
 
 
 class TelemetryRecord(Base):
     """Time-series telemetry data from nodes."""
     
     __tablename__ = "telemetry_records"
+    __mapper_args__ = {"eager_defaults": True}  # RETURNING server timestamps
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     node_id = Column(UUID(as_uuid=True), ForeignKey("nodes.id"), nullable=False)
@@ -183,7 +230,7 @@ class TelemetryRecord(Base):
     custom_metrics = Column(JSON, nullable=True)
     
     # Timestamp
-    recorded_at = Column(DateTime, default=datetime.utcnow)
+    recorded_at = Column(DateTime, server_default=utcnow())
     
     # Relationships
     node = relationship("Node", back_populates="telemetry_records")
@@ -193,22 +240,35 @@ class Configuration(Base):
     """Configuration storage for global and per-node settings."""
     
     __tablename__ = "configurations"
+    __mapper_args__ = {"eager_defaults": True}  # RETURNING server timestamps
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    key = Column(String(255), nullable=False, index=True)
+    key = Column(String(255), nullable=False)
     value = Column(JSON, nullable=True)
     scope = Column(String(50), default="global")  # global, node, etc.
     node_id = Column(UUID(as_uuid=True), ForeignKey("nodes.id"), nullable=True)
     description = Column(Text, nullable=True)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
+    
+    __table_args__ = (
+        # Node-scoped lookup by key; global keys are unique among themselves
+        Index("ix_configurations_key_node", "key", "node_id"),
+        Index(
+            "ix_configurations_global_key", "key",
+            unique=True,
+            postgresql_where=text("scope = 'global'"),
+            sqlite_where=text("scope = 'global'")
+        ),
+    )
 
 
 class AuditLog(Base):
     """Audit log for tracking operator actions."""
     
     __tablename__ = "audit_logs"
+    __mapper_args__ = {"eager_defaults": True}  # RETURNING server timestamps
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     
@@ -231,7 +291,13 @@ class AuditLog(Base):
     error_message = Column(Text, nullable=True)
     
     # When
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column(DateTime, server_default=utcnow(), index=True)
     
     # Relationships
     user = relationship("User", back_populates="audit_logs")
+    
+    __table_args__ = (
+        # Per-user and per-action audit history, newest first
+        Index("ix_audit_user_ts", "user_id", "timestamp"),
+        Index("ix_audit_action_ts", "action", "timestamp"),
+    )
@@ -0,0 +1,48 @@
+# Copyright 2024 TacticalMesh Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Keyset pagination cursors for TacticalMesh list endpoints.
+
+A cursor encodes the (timestamp, id) sort key of the last row on a page;
+the next page seeks past it instead of skipping rows with OFFSET.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(timestamp: datetime, row_id: UUID) -> str:
+    """
+    Build an opaque cursor pointing just past a row.
+    
+    Args:
+        timestamp: The row's sort timestamp
+        row_id: The row's primary key, breaking timestamp ties
+    
+    Returns:
+        URL-safe cursor string
+    """
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Parse a cursor produced by encode_cursor.
+    
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(timestamp), UUID(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
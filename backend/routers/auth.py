@@ -12,20 +12,26 @@ Provides login and user management endpoints with security controls:
 
 import logging
 from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import lambda_stmt, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
 from ..auth import (
+    AUDIT_ENABLED,
     authenticate_user,
     create_access_token,
     create_audit_log,
-    get_password_hash,
+    get_password_hash_async,
     require_admin,
     require_any_role,
     get_current_active_user,
-    verify_password,
+    invalidate_cached_user,
+    verify_password_async,
 )
 from ..config import get_settings
 from ..database import get_db
@@ -34,10 +40,11 @@ from ..schemas import (
     LoginRequest,
     Token,
     UserCreate,
+    UserListResponse,
     UserResponse,
 )
 from ..security import (
-    limiter,
+    SlidingWindowLimiter,
     PasswordValidator,
     lockout_manager,
 )
@@ -47,9 +54,24 @@ settings = get_settings()
 
 router = APIRouter(prefix="/api/v1/auth", tags=["Authentication"])
 
+# Login response constants, computed once
+_TOKEN_EXPIRES_DELTA = timedelta(minutes=settings.jwt_access_token_expire_minutes)
+_TOKEN_EXPIRES_IN = settings.jwt_access_token_expire_minutes * 60
+_USER_RESPONSE_FIELDS = tuple(UserResponse.model_fields)
 
-@router.post("/login", response_model=Token)
-@limiter.limit("5/minute")
+
+def _user_response(user: User) -> UserResponse:
+    """Build a UserResponse from typed ORM columns without re-validating them."""
+    return UserResponse.model_construct(
+        **{field: getattr(user, field) for field in _USER_RESPONSE_FIELDS}
+    )
+
+
+@router.post(
+    "/login",
+    response_model=Token,
+    dependencies=[Depends(SlidingWindowLimiter("login", 5, 60))]
+)
 async def login(
     request: Request,
     login_data: LoginRequest,
@@ -68,17 +90,19 @@ async def login(
     - Account locks after 5 failed attempts for 15 minutes
     """
     # Check if account is locked out
-    if lockout_manager.is_locked_out(login_data.username):
-        remaining = lockout_manager.get_lockout_remaining(login_data.username)
-        await create_audit_log(
-            db,
-            user=None,
-            action="login_blocked_lockout",
-            details={"username": login_data.username, "remaining_seconds": remaining},
-            success=False,
-            error_message="Account locked due to too many failed attempts",
-            request=request
-        )
+    if await lockout_manager.is_locked_out(login_data.username):
+        remaining = await lockout_manager.get_lockout_remaining(login_data.username)
+        # Sampled and queued: repeated hits on a locked account don't each cost a write
+        if lockout_manager.should_audit_blocked(login_data.username):
+            await create_audit_log(
+                db,
+                user=None,
+                action="login_blocked_lockout",
+                details={"username": login_data.username, "remaining_seconds": remaining},
+                success=False,
+                error_message="Account locked due to too many failed attempts",
+                request=request
+            )
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=f"Account locked due to too many failed attempts. Try again in {remaining} seconds.",
@@ -89,8 +113,8 @@ async def login(
     
     if not user:
         # Record failed attempt and check for lockout
-        is_now_locked = lockout_manager.record_failed_attempt(login_data.username)
-        remaining_attempts = lockout_manager.get_remaining_attempts(login_data.username)
+        is_now_locked = await lockout_manager.record_failed_attempt(login_data.username)
+        remaining_attempts = await lockout_manager.get_remaining_attempts(login_data.username)
         
         await create_audit_log(
             db,
@@ -103,14 +127,16 @@ async def login(
             },
             success=False,
             error_message="Invalid credentials",
-            request=request
+            request=request,
+            durable=True
         )
         
         if is_now_locked:
+            remaining = await lockout_manager.get_lockout_remaining(login_data.username)
             raise HTTPException(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Account locked due to too many failed attempts. Try again in 15 minutes.",
-                headers={"Retry-After": "900"}
+                detail=f"Account locked due to too many failed attempts. Try again in {remaining} seconds.",
+                headers={"Retry-After": str(remaining)}
             )
         
         raise HTTPException(
@@ -120,17 +146,16 @@ async def login(
         )
     
     # Clear failed attempts on successful login
-    lockout_manager.clear_attempts(login_data.username)
+    await lockout_manager.clear_attempts(login_data.username)
     
     # Update last login
     user.last_login = datetime.utcnow()
-    await db.flush()
+    invalidate_cached_user(user.id)
     
     # Check if password change is required
     requires_password_change = user.force_password_change
     
     # Create token
-    expires_delta = timedelta(minutes=settings.jwt_access_token_expire_minutes)
     access_token = create_access_token(
         data={
             "sub": user.username,
@@ -138,23 +163,25 @@ async def login(
             "role": user.role.value,
             "requires_password_change": requires_password_change
         },
-        expires_delta=expires_delta
+        expires_delta=_TOKEN_EXPIRES_DELTA
     )
     
-    await create_audit_log(
-        db,
-        user=user,
-        action="login_success",
-        resource_type="user",
-        resource_id=str(user.id),
-        details={"requires_password_change": requires_password_change},
-        request=request
-    )
+    if AUDIT_ENABLED:
+        await create_audit_log(
+            db,
+            user=user,
+            action="login_success",
+            resource_type="user",
+            resource_id=str(user.id),
+            details={"requires_password_change": requires_password_change},
+            request=request
+        )
+    await db.commit()
     
-    return Token(
+    return Token.model_construct(
         access_token=access_token,
         token_type="bearer",
-        expires_in=settings.jwt_access_token_expire_minutes * 60,
+        expires_in=_TOKEN_EXPIRES_IN,
         role=user.role,
         requires_password_change=requires_password_change
     )
@@ -182,7 +209,7 @@ async def change_password(
     - At least one special character
     """
     # Verify current password
-    if not verify_password(current_password, current_user.hashed_password):
+    if not await verify_password_async(current_password, current_user.hashed_password):
         await create_audit_log(
             db,
             user=current_user,
@@ -191,7 +218,8 @@ async def change_password(
             resource_id=str(current_user.id),
             success=False,
             error_message="Current password verification failed",
-            request=request
+            request=request,
+            durable=True
         )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -202,9 +230,9 @@ async def change_password(
     PasswordValidator.validate_or_raise(new_password)
     
     # Update password
-    current_user.hashed_password = get_password_hash(new_password)
+    current_user.hashed_password = await get_password_hash_async(new_password)
     current_user.force_password_change = False
-    await db.flush()
+    invalidate_cached_user(current_user.id)
     
     await create_audit_log(
         db,
@@ -214,14 +242,19 @@ async def change_password(
         resource_id=str(current_user.id),
         request=request
     )
+    await db.commit()
     
     logger.info(f"Password changed for user: {current_user.username}")
     
     return {"message": "Password changed successfully"}
 
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-@limiter.limit("10/minute")
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(SlidingWindowLimiter("register", 10, 60))]
+)
 async def register_user(
     request: Request,
     user_data: UserCreate,
@@ -241,37 +274,36 @@ async def register_user(
     # Validate password complexity
     PasswordValidator.validate_or_raise(user_data.password)
     
-    # Check if username exists
-    result = await db.execute(
-        select(User).where(User.username == user_data.username)
-    )
-    if result.scalar_one_or_none():
+    # Check if username or email exists (single probe of the unique indexes).
+    # A NULL email bind never matches, so one cached statement covers both cases.
+    username = user_data.username
+    email = user_data.email or None
+    result = await db.execute(lambda_stmt(
+        lambda: select(User.username)
+        .where(or_(User.username == username, User.email == email))
+        .limit(1)
+    ))
+    existing_username = result.scalar_one_or_none()
+    if existing_username is not None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-    
-    # Check if email exists
-    if user_data.email:
-        result = await db.execute(
-            select(User).where(User.email == user_data.email)
-        )
-        if result.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
+            detail=(
+                "Username already registered"
+                if existing_username == user_data.username
+                else "Email already registered"
             )
+        )
     
     # Create user
     new_user = User(
+        id=uuid4(),  # Known up front, so the audit entry needs no flush
         username=user_data.username,
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         role=user_data.role
     )
     
     db.add(new_user)
-    await db.flush()
     
     await create_audit_log(
         db,
@@ -282,23 +314,52 @@ async def register_user(
         details={"username": new_user.username, "role": new_user.role.value},
         request=request
     )
+    await db.commit()
     
     logger.info(f"User created: {new_user.username} by {current_user.username}")
     
-    return UserResponse.model_validate(new_user)
+    return _user_response(new_user)
 
 
-@router.get("/users", response_model=list[UserResponse])
+@router.get("/users", response_model=UserListResponse)
 async def list_users(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[UUID] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
-) -> list[UserResponse]:
+) -> UserListResponse:
     """
-    List all users (admin only).
+    List users with keyset pagination (admin only).
+    
+    - **limit**: Maximum users to return (default: 100, max: 1000)
+    - **cursor**: `next_cursor` from the previous page
+    
+    Rows are typed ORM columns, so they are serialized straight to JSON
+    with orjson rather than through UserResponse models.
     """
-    result = await db.execute(select(User))
-    users = result.scalars().all()
-    return [UserResponse.model_validate(u) for u in users]
+    query = (
+        select(User)
+        .options(load_only(
+            User.id, User.username, User.email, User.role,
+            User.is_active, User.created_at, User.last_login
+        ))
+        .order_by(User.id)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        query = query.where(User.id > cursor)
+    
+    users = []
+    next_cursor = None
+    result = await db.stream_scalars(query.execution_options(yield_per=500))
+    async for user in result:
+        if len(users) == limit:
+            next_cursor = users[-1]["id"]
+            break
+        users.append({field: getattr(user, field) for field in _USER_RESPONSE_FIELDS})
+    await result.close()
+    
+    return ORJSONResponse({"users": users, "next_cursor": next_cursor})
 
 
 @router.get("/me", response_model=UserResponse)
@@ -308,5 +369,5 @@ async def get_current_user_info(
     """
     Get current user information.
     """
-    return UserResponse.model_validate(current_user)
+    return _user_response(current_user)
 
@@ -6,23 +6,30 @@ Commands router for TacticalMesh.
 Provides command creation, listing, and status endpoints.
 """
 
+import asyncio
 import logging
+from datetime import datetime
 from typing import Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
-from sqlalchemy import select, func
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import bindparam, delete, select, func, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from ..auth import create_audit_log, require_any_role, require_operator
+from ..caches import node_uuid
 from ..config import get_settings
-from ..database import get_db
+from ..database import get_db, get_sessionmaker
 from ..models import Node, Command, CommandStatus, CommandType, User
+from ..pagination import decode_cursor, encode_cursor
 from ..schemas import (
     CommandCreate,
     CommandResponse,
     CommandListResponse,
     CommandResultUpdate,
+    CommandResultBatch,
+    CommandResultBatchResponse,
 )
 
 logger = logging.getLogger(__name__)
@@ -30,6 +37,52 @@ settings = get_settings()
 
 router = APIRouter(prefix="/api/v1/commands", tags=["Commands"])
 
+# Validates a whole result page in one pydantic-core call
+_COMMAND_RESPONSE_FIELDS = tuple(CommandResponse.model_fields)
+
+# Invariant statements built once; per-request values are bound at execute
+_NODE_UUID = select(Node.id).where(Node.node_id == bindparam("node_id")).scalar_subquery()
+_SELECT_COMMANDS_BY_IDS = select(Command).where(
+    Command.id.in_(bindparam("command_ids", expanding=True))
+)
+
+_DELETE_PENDING_COMMAND = (
+    delete(Command)
+    .where(Command.id == bindparam("command_id"), Command.status == CommandStatus.PENDING)
+    .returning(Command.command_type)
+)
+
+# Statuses that stamp completed_at
+_FINAL_STATUSES = frozenset((CommandStatus.COMPLETED, CommandStatus.FAILED))
+
+
+def _apply_command_result(command: Command, result_data: CommandResultUpdate) -> None:
+    """Apply a node-reported result to a command and stamp lifecycle times."""
+    command.status = result_data.status
+    command.result = result_data.result
+    command.error_message = result_data.error_message
+    
+    if result_data.status == CommandStatus.ACKNOWLEDGED:
+        command.acknowledged_at = command.acknowledged_at or datetime.utcnow()
+    elif result_data.status in _FINAL_STATUSES:
+        command.completed_at = datetime.utcnow()
+
+
+def _command_result_values(result_data: CommandResultUpdate) -> dict:
+    """Column values for applying a node-reported result in a single UPDATE."""
+    values = {
+        "status": result_data.status,
+        "result": result_data.result,
+        "error_message": result_data.error_message,
+    }
+    
+    if result_data.status == CommandStatus.ACKNOWLEDGED:
+        values["acknowledged_at"] = func.coalesce(Command.acknowledged_at, datetime.utcnow())
+    elif result_data.status in _FINAL_STATUSES:
+        values["completed_at"] = datetime.utcnow()
+    
+    return values
+
 
 @router.post("", response_model=CommandResponse, status_code=status.HTTP_201_CREATED)
 async def create_command(
@@ -48,12 +101,9 @@ async def create_command(
     The command will be delivered to the node on its next heartbeat.
     """
     # Find target node
-    result = await db.execute(
-        select(Node).where(Node.node_id == command_data.target_node_id)
-    )
-    node = result.scalar_one_or_none()
+    target_uuid = await node_uuid(db, command_data.target_node_id)
     
-    if not node:
+    if target_uuid is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Target node not found: {command_data.target_node_id}"
@@ -61,15 +111,15 @@ async def create_command(
     
     # Create command
     new_command = Command(
+        id=uuid4(),
         command_type=command_data.command_type,
         status=CommandStatus.PENDING,
-        target_node_id=node.id,
+        target_node_id=target_uuid,
         payload=command_data.payload,
         created_by=current_user.id
     )
     
     db.add(new_command)
-    await db.flush()
     
     await create_audit_log(
         db,
@@ -84,6 +134,7 @@ async def create_command(
         },
         request=request
     )
+    await db.commit()
     
     logger.info(
         f"Command created: {new_command.id} type={command_data.command_type.value} "
@@ -95,26 +146,33 @@ async def create_command(
 
 @router.get("", response_model=CommandListResponse)
 async def list_commands(
-    page: int = Query(1, ge=1),
+    page: int = Query(1, ge=1, deprecated=True),
     page_size: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
     status_filter: Optional[CommandStatus] = None,
     command_type: Optional[CommandType] = None,
     target_node_id: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
+    session_maker: async_sessionmaker = Depends(get_sessionmaker),
     current_user: User = Depends(require_any_role)
 ) -> CommandListResponse:
     """
     List commands with pagination and filtering.
     
-    - **page**: Page number (default: 1)
+    - **page**: Page number (default: 1); deprecated, use **cursor**
     - **page_size**: Items per page (default: 50, max: 100)
+    - **cursor**: `next_cursor` from the previous page
     - **status_filter**: Filter by command status
     - **command_type**: Filter by command type
     - **target_node_id**: Filter by target node's node_id
+    
+    The page is written out with orjson directly from the ORM columns,
+    skipping CommandResponse validation.
     """
     # Build query
     query = select(Command)
     count_query = select(func.count(Command.id))
+    params = {}
     
     if status_filter:
         query = query.where(Command.status == status_filter)
@@ -125,32 +183,77 @@ async def list_commands(
         count_query = count_query.where(Command.command_type == command_type)
     
     if target_node_id:
-        # Join with Node to filter by node_id
-        node_result = await db.execute(
-            select(Node.id).where(Node.node_id == target_node_id)
+        # Resolve node_id inside the same statement
+        query = query.where(Command.target_node_id == _NODE_UUID)
+        count_query = count_query.where(Command.target_node_id == _NODE_UUID)
+        params["node_id"] = target_node_id
+    
+    # Keyset pagination: seek past the cursor instead of skipping rows
+    query = query.order_by(Command.created_at.desc(), Command.id.desc())
+    if cursor:
+        query = query.where(
+            tuple_(Command.created_at, Command.id) < tuple_(*decode_cursor(cursor))
+        )
+    else:
+        query = query.offset((page - 1) * page_size)
+    query = query.limit(page_size)
+    
+    # Count on a second session so it runs alongside the page query
+    async with session_maker() as count_session:
+        count_result, result = await asyncio.gather(
+            count_session.execute(count_query, params),
+            db.stream_scalars(query.execution_options(yield_per=page_size), params)
         )
-        node_uuid = node_result.scalar_one_or_none()
-        if node_uuid:
-            query = query.where(Command.target_node_id == node_uuid)
-            count_query = count_query.where(Command.target_node_id == node_uuid)
-    
-    # Get total count
-    result = await db.execute(count_query)
-    total = result.scalar()
-    
-    # Get paginated results
-    query = query.order_by(Command.created_at.desc())
-    query = query.offset((page - 1) * page_size).limit(page_size)
-    
-    result = await db.execute(query)
-    commands = result.scalars().all()
-    
-    return CommandListResponse(
-        commands=[CommandResponse.model_validate(c) for c in commands],
-        total=total,
-        page=page,
-        page_size=page_size
+        commands = [command async for command in result]
+    total = count_result.scalar()
+    
+    return ORJSONResponse({
+        "commands": [
+            {field: getattr(command, field) for field in _COMMAND_RESPONSE_FIELDS}
+            for command in commands
+        ],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": encode_cursor(commands[-1].created_at, commands[-1].id) if len(commands) == page_size else None,
+    })
+
+
+@router.post("/results:batch", response_model=CommandResultBatchResponse)
+async def update_command_results_batch(
+    batch: CommandResultBatch,
+    db: AsyncSession = Depends(get_db)
+) -> CommandResultBatchResponse:
+    """
+    Apply several command result updates in one request (called by node agent).
+    
+    - **results**: List of result updates, applied in order
+    
+    An acknowledgment and a final status for the same command may be sent
+    in one batch; the later entry wins. Unknown command IDs are reported
+    back in **not_found** rather than failing the whole batch.
+    """
+    command_ids = {entry.command_id for entry in batch.results}
+    result = await db.execute(
+        _SELECT_COMMANDS_BY_IDS, {"command_ids": list(command_ids)}
     )
+    commands = {command.id: command for command in result.scalars().all()}
+    
+    updated = 0
+    not_found = []
+    for entry in batch.results:
+        command = commands.get(entry.command_id)
+        if command is None:
+            not_found.append(entry.command_id)
+            continue
+        _apply_command_result(command, entry)
+        updated += 1
+    
+    await db.commit()
+    
+    logger.info(f"Command results batch applied: updated={updated} not_found={len(not_found)}")
+    
+    return CommandResultBatchResponse(updated=updated, not_found=not_found)
 
 
 @router.get("/{command_id}", response_model=CommandResponse)
@@ -162,10 +265,7 @@ async def get_command(
     """
     Get details of a specific command by ID.
     """
-    result = await db.execute(
-        select(Command).where(Command.id == command_id)
-    )
-    command = result.scalar_one_or_none()
+    command = await db.get(Command, command_id)
     
     if not command:
         raise HTTPException(
@@ -190,8 +290,13 @@ async def update_command_result(
     - **result**: Command execution result as JSON
     - **error_message**: Error message if failed
     """
+    # Update and read back the command in one round trip
     result = await db.execute(
-        select(Command).where(Command.id == command_id)
+        update(Command)
+        .where(Command.id == command_id)
+        .values(**_command_result_values(result_data))
+        .returning(Command)
+        .execution_options(synchronize_session=False)
     )
     command = result.scalar_one_or_none()
     
@@ -201,17 +306,7 @@ async def update_command_result(
             detail=f"Command not found: {command_id}"
         )
     
-    # Update command
-    command.status = result_data.status
-    command.result = result_data.result
-    command.error_message = result_data.error_message
-    
-    if result_data.status == CommandStatus.ACKNOWLEDGED:
-        command.acknowledged_at = command.acknowledged_at or __import__('datetime').datetime.utcnow()
-    elif result_data.status in [CommandStatus.COMPLETED, CommandStatus.FAILED]:
-        command.completed_at = __import__('datetime').datetime.utcnow()
-    
-    await db.flush()
+    await db.commit()
     
     logger.info(
         f"Command {command_id} result updated: status={result_data.status.value}"
@@ -232,18 +327,23 @@ async def cancel_command(
     
     Only commands in PENDING status can be cancelled.
     """
+    # Delete only if still pending; the failure path looks up the reason
     result = await db.execute(
-        select(Command).where(Command.id == command_id)
+        _DELETE_PENDING_COMMAND,
+        {"command_id": command_id},
+        execution_options={"synchronize_session": False}
     )
-    command = result.scalar_one_or_none()
-    
-    if not command:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Command not found: {command_id}"
-        )
+    command_type = result.scalar_one_or_none()
     
-    if command.status != CommandStatus.PENDING:
+    if command_type is None:
+        command = await db.get(Command, command_id)
+        
+        if not command:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Command not found: {command_id}"
+            )
+        
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot cancel command in status: {command.status.value}"
@@ -254,12 +354,11 @@ async def cancel_command(
         user=current_user,
         action="command_cancelled",
         resource_type="command",
-        resource_id=str(command.id),
-        details={"command_type": command.command_type.value},
+        resource_id=str(command_id),
+        details={"command_type": command_type.value},
         request=request
     )
     
-    await db.delete(command)
-    await db.flush()
+    await db.commit()
     
     logger.info(f"Command cancelled: {command_id} by {current_user.username}")
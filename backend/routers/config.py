@@ -6,16 +6,19 @@ Configuration router for TacticalMesh.
 Provides endpoints for managing global and per-node configuration.
 """
 
+import asyncio
 import logging
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
-from sqlalchemy import select, func
-from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
+from sqlalchemy import and_, bindparam, select, func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from ..auth import create_audit_log, require_any_role, require_operator
-from ..database import get_db
+from ..caches import node_uuid
+from ..database import get_db, get_sessionmaker
 from ..models import Configuration, Node, User
 from ..schemas import (
     ConfigItem,
@@ -28,12 +31,32 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/config", tags=["Configuration"])
 
+# Whole-list validation: one pydantic-core call per response
+_CONFIG_LIST_ADAPTER = TypeAdapter(List[ConfigResponse])
+
+# Invariant statements built once; per-request values are bound at execute
+_SELECT_NODE_ID_BY_NODE_ID = select(Node.id).where(Node.node_id == bindparam("node_id"))
+_NODE_UUID = _SELECT_NODE_ID_BY_NODE_ID.scalar_subquery()
+_SELECT_CONFIG_BY_KEY = select(Configuration).where(Configuration.key == bindparam("key"))
+_SELECT_GLOBAL_CONFIG = _SELECT_CONFIG_BY_KEY.where(Configuration.scope == "global")
+_SELECT_NODE_CONFIG = _SELECT_CONFIG_BY_KEY.where(Configuration.node_id == _NODE_UUID)
+# Node UUID plus its existing config row (if any) in one round trip
+_SELECT_NODE_WITH_CONFIG = (
+    select(Node.id, Configuration)
+    .outerjoin(
+        Configuration,
+        and_(Configuration.node_id == Node.id, Configuration.key == bindparam("key"))
+    )
+    .where(Node.node_id == bindparam("node_id"))
+)
+
 
 @router.get("", response_model=ConfigListResponse)
 async def list_configs(
     scope: Optional[str] = Query(None, description="Filter by scope (global, node)"),
     node_id: Optional[str] = Query(None, description="Filter by node_id for node-scoped configs"),
     db: AsyncSession = Depends(get_db),
+    session_maker: async_sessionmaker = Depends(get_sessionmaker),
     current_user: User = Depends(require_any_role)
 ) -> ConfigListResponse:
     """
@@ -44,31 +67,32 @@ async def list_configs(
     """
     query = select(Configuration)
     count_query = select(func.count(Configuration.id))
+    params = {}
     
     if scope:
         query = query.where(Configuration.scope == scope)
         count_query = count_query.where(Configuration.scope == scope)
     
     if node_id:
-        # Get node UUID
-        node_result = await db.execute(
-            select(Node.id).where(Node.node_id == node_id)
-        )
-        node_uuid = node_result.scalar_one_or_none()
-        if node_uuid:
-            query = query.where(Configuration.node_id == node_uuid)
-            count_query = count_query.where(Configuration.node_id == node_uuid)
-    
-    # Get total count
-    result = await db.execute(count_query)
-    total = result.scalar()
+        # Resolve node_id inside the same statement
+        query = query.where(Configuration.node_id == _NODE_UUID)
+        count_query = count_query.where(Configuration.node_id == _NODE_UUID)
+        params["node_id"] = node_id
     
-    # Get results
-    result = await db.execute(query.order_by(Configuration.key))
-    configs = result.scalars().all()
+    # Count on a second session so it runs alongside the main query
+    async with session_maker() as count_session:
+        count_result, result = await asyncio.gather(
+            count_session.execute(count_query, params),
+            db.stream_scalars(
+                query.order_by(Configuration.key).execution_options(yield_per=500),
+                params
+            )
+        )
+        configs = [config async for config in result]
+    total = count_result.scalar()
     
     return ConfigListResponse(
-        configs=[ConfigResponse.model_validate(c) for c in configs],
+        configs=_CONFIG_LIST_ADAPTER.validate_python(configs, from_attributes=True),
         total=total
     )
 
@@ -86,27 +110,20 @@ async def get_config(
     - **key**: Configuration key
     - **node_id**: Optional node_id for node-scoped configuration
     """
-    query = select(Configuration).where(Configuration.key == key)
-    
     if node_id:
-        node_result = await db.execute(
-            select(Node.id).where(Node.node_id == node_id)
-        )
-        node_uuid = node_result.scalar_one_or_none()
-        if node_uuid:
-            query = query.where(Configuration.node_id == node_uuid)
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Node not found: {node_id}"
-            )
+        result = await db.execute(_SELECT_NODE_CONFIG, {"key": key, "node_id": node_id})
     else:
-        query = query.where(Configuration.scope == "global")
+        result = await db.execute(_SELECT_GLOBAL_CONFIG, {"key": key})
     
-    result = await db.execute(query)
     config = result.scalar_one_or_none()
     
     if not config:
+        # Only a miss pays for telling an unknown node from an unknown key
+        if node_id and await node_uuid(db, node_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Node not found: {node_id}"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Configuration not found: {key}"
@@ -132,27 +149,22 @@ async def upsert_config(
     - **node_id**: Node ID if scope is node
     - **description**: Human-readable description
     """
+    # Resolve the node and check if config exists in one query
     node_uuid = None
     if config_data.node_id:
-        node_result = await db.execute(
-            select(Node.id).where(Node.node_id == config_data.node_id)
+        result = await db.execute(
+            _SELECT_NODE_WITH_CONFIG, {"key": key, "node_id": config_data.node_id}
         )
-        node_uuid = node_result.scalar_one_or_none()
-        if not node_uuid:
+        row = result.first()
+        if row is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Node not found: {config_data.node_id}"
             )
-    
-    # Check if config exists
-    query = select(Configuration).where(Configuration.key == key)
-    if node_uuid:
-        query = query.where(Configuration.node_id == node_uuid)
+        node_uuid, config = row
     else:
-        query = query.where(Configuration.scope == "global")
-    
-    result = await db.execute(query)
-    config = result.scalar_one_or_none()
+        result = await db.execute(_SELECT_GLOBAL_CONFIG, {"key": key})
+        config = result.scalar_one_or_none()
     
     if config:
         # Update existing
@@ -202,7 +214,7 @@ async def upsert_config(
         
         logger.info(f"Config created: {key} by {current_user.username}")
     
-    await db.flush()
+    await db.commit()
     
     return ConfigResponse.model_validate(config)
 
@@ -221,19 +233,10 @@ async def delete_config(
     - **key**: Configuration key to delete
     - **node_id**: Node ID for node-scoped config
     """
-    query = select(Configuration).where(Configuration.key == key)
-    
     if node_id:
-        node_result = await db.execute(
-            select(Node.id).where(Node.node_id == node_id)
-        )
-        node_uuid = node_result.scalar_one_or_none()
-        if node_uuid:
-            query = query.where(Configuration.node_id == node_uuid)
+        result = await db.execute(_SELECT_NODE_CONFIG, {"key": key, "node_id": node_id})
     else:
-        query = query.where(Configuration.scope == "global")
-    
-    result = await db.execute(query)
+        result = await db.execute(_SELECT_GLOBAL_CONFIG, {"key": key})
     config = result.scalar_one_or_none()
     
     if not config:
@@ -253,6 +256,6 @@ async def delete_config(
     )
     
     await db.delete(config)
-    await db.flush()
+    await db.commit()
     
     logger.info(f"Config deleted: {key} by {current_user.username}")
@@ -6,19 +6,27 @@ Nodes router for TacticalMesh.
 Provides node registration, heartbeat, and query endpoints.
 """
 
+import base64
 import logging
-import secrets
+import os
 from datetime import datetime, timedelta
 from typing import Optional
+from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
-from sqlalchemy import select, func
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
+from sqlalchemy import bindparam, delete, select, func, true, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..auth import create_audit_log, require_any_role, require_operator
+from ..batching import BatchInsertWriter
+from ..caches import invalidate_node_uuid
 from ..config import get_settings
-from ..database import get_db
+from ..database import async_session_maker, get_db
 from ..models import Node, NodeStatus, Command, CommandStatus, TelemetryRecord, User
+from ..pagination import decode_cursor, encode_cursor
 from ..schemas import (
     NodeRegisterRequest,
     NodeRegisterResponse,
@@ -34,10 +42,147 @@ settings = get_settings()
 
 router = APIRouter(prefix="/api/v1/nodes", tags=["Nodes"])
 
+_NODE_RESPONSE_FIELDS = tuple(NodeResponse.model_fields)
+
+# Built once; node_id is unique, so this is a single index probe
+_SELECT_NODE_BY_NODE_ID = select(Node).where(Node.node_id == bindparam("node_id"))
+_DELETE_NODE = (
+    delete(Node)
+    .where(Node.node_id == bindparam("node_id"))
+    .returning(Node.id)
+)
+
+# Heartbeat telemetry is appended in batches off the request path; the
+# application lifespan starts and stops the writer
+TELEMETRY_INSERT = TelemetryRecord.__table__.insert()
+telemetry_writer = BatchInsertWriter(
+    "telemetry",
+    TELEMETRY_INSERT,
+    async_session_maker,
+    buffer_size=settings.telemetry_buffer_size,
+    batch_size=settings.telemetry_batch_size,
+    flush_interval=settings.telemetry_flush_interval,
+)
+
+
+def _dispatch_pending_commands(target_node_id):
+    """
+    UPDATE marking up to 10 of a node's oldest pending commands as sent.
+    
+    Args:
+        target_node_id: Node UUID bind parameter, or a scalar subquery yielding it
+        
+    Returns:
+        Statement RETURNING the fields of each CommandBrief; sent_at is
+        taken from the "now" parameter
+    """
+    pending = (
+        select(Command.id)
+        .where(Command.target_node_id == target_node_id)
+        .where(Command.status == CommandStatus.PENDING)
+        .order_by(Command.created_at)
+        .limit(10)
+        # Concurrent heartbeats for the same node claim disjoint commands
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(Command)
+        .where(Command.id.in_(pending))
+        .values(status=CommandStatus.SENT, sent_at=bindparam("now"))
+        .returning(
+            Command.id.label("command_id"),
+            Command.command_type,
+            Command.payload,
+            Command.created_at
+        )
+    )
+
+
+# Heartbeat statements are built once with bind parameters; ClauseElement
+# memoizes its cache key, so executing them skips both expression
+# construction and cache-key traversal. update() reserves bind names that
+# match column names, hence "heartbeat_node_id" and "new_<column>".
+_HEARTBEAT_COLUMNS = ("cpu_usage", "memory_usage", "disk_usage", "latitude", "longitude", "altitude")
+_UPDATE_NODE_HEARTBEAT = (
+    update(Node)
+    .where(Node.node_id == bindparam("heartbeat_node_id"))
+    .values(
+        status=NodeStatus.ONLINE,
+        last_heartbeat=bindparam("now"),
+        **{column: bindparam(f"new_{column}") for column in _HEARTBEAT_COLUMNS}
+    )
+    .returning(Node.id)
+)
+_DISPATCH_PENDING_COMMANDS = _dispatch_pending_commands(bindparam("node_uuid"))
+
+# PostgreSQL: node update and command dispatch as data-modifying CTEs
+_updated_node = _UPDATE_NODE_HEARTBEAT.cte("updated_node")
+_sent_commands = _dispatch_pending_commands(select(_updated_node.c.id).scalar_subquery()).cte("sent")
+_HEARTBEAT_UPDATE_AND_DISPATCH = (
+    select(_updated_node.c.id, *(column for column in _sent_commands.c))
+    .select_from(_updated_node.outerjoin(_sent_commands, true()))
+)
+
+
+async def mark_stale_nodes_offline(db: AsyncSession) -> int:
+    """
+    Mark ONLINE nodes whose last heartbeat is older than the timeout as OFFLINE.
+    
+    Run periodically by the application lifespan rather than per request,
+    so listing nodes never takes row locks that heartbeats wait on.
+    
+    Args:
+        db: Database session; the change is committed
+        
+    Returns:
+        Number of nodes marked offline
+    """
+    timeout = datetime.utcnow() - timedelta(seconds=settings.node_heartbeat_timeout_seconds)
+    result = await db.execute(
+        Node.__table__.update()
+        .where(Node.last_heartbeat < timeout)
+        .where(Node.status == NodeStatus.ONLINE)
+        .values(status=NodeStatus.OFFLINE)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def _get_node(db: AsyncSession, node_id: str) -> Optional[Node]:
+    """Load a node by its public node_id."""
+    result = await db.execute(_SELECT_NODE_BY_NODE_ID, {"node_id": node_id})
+    return result.scalar_one_or_none()
+
+
+def _node_response(node: Node) -> NodeResponse:
+    """Build a NodeResponse from typed ORM columns without re-validating them."""
+    return NodeResponse.model_construct(
+        **{field: getattr(node, field) for field in _NODE_RESPONSE_FIELDS}
+    )
+
+
+# Node auth tokens are sliced from a batch of OS randomness, one getrandom()
+# call per AUTH_TOKEN_POOL_SIZE tokens. The pool records the PID that filled
+# it so a forked worker never hands out its parent's tokens.
+AUTH_TOKEN_BYTES = 32
+AUTH_TOKEN_POOL_SIZE = 256
+_token_pool = b""
+_token_offset = 0
+_token_pool_pid = 0
+
 
 def generate_auth_token() -> str:
     """Generate a secure authentication token for a node."""
-    return secrets.token_urlsafe(32)
+    global _token_pool, _token_offset, _token_pool_pid
+    
+    if _token_offset >= len(_token_pool) or _token_pool_pid != os.getpid():
+        _token_pool = os.urandom(AUTH_TOKEN_BYTES * AUTH_TOKEN_POOL_SIZE)
+        _token_offset = 0
+        _token_pool_pid = os.getpid()
+    
+    chunk = _token_pool[_token_offset:_token_offset + AUTH_TOKEN_BYTES]
+    _token_offset += AUTH_TOKEN_BYTES
+    return base64.urlsafe_b64encode(chunk).rstrip(b"=").decode()
 
 
 @router.post("/register", response_model=NodeRegisterResponse, status_code=status.HTTP_201_CREATED)
@@ -59,11 +204,10 @@ async def register_node(
     
     Returns an authentication token for the node to use in subsequent requests.
     """
+    now = datetime.utcnow()
+    
     # Check if node already exists
-    result = await db.execute(
-        select(Node).where(Node.node_id == node_data.node_id)
-    )
-    existing_node = result.scalar_one_or_none()
+    existing_node = await _get_node(db, node_data.node_id)
     
     if existing_node:
         # Re-registration: update and return new token
@@ -75,10 +219,10 @@ async def register_node(
         existing_node.node_metadata = node_data.node_metadata or existing_node.node_metadata
         existing_node.auth_token = generate_auth_token()
         existing_node.status = NodeStatus.ONLINE
-        existing_node.last_heartbeat = datetime.utcnow()
-        existing_node.updated_at = datetime.utcnow()
+        existing_node.last_heartbeat = now
+        existing_node.updated_at = now
         
-        await db.flush()
+        await db.commit()
         
         logger.info(f"Node re-registered: {node_data.node_id}")
         
@@ -92,6 +236,7 @@ async def register_node(
     # Create new node
     auth_token = generate_auth_token()
     new_node = Node(
+        id=uuid4(),  # Assigned here so the audit entry can reference it pre-commit
         node_id=node_data.node_id,
         name=node_data.name,
         description=node_data.description,
@@ -101,11 +246,10 @@ async def register_node(
         node_metadata=node_data.node_metadata,
         auth_token=auth_token,
         status=NodeStatus.ONLINE,
-        last_heartbeat=datetime.utcnow()
+        last_heartbeat=now
     )
     
     db.add(new_node)
-    await db.flush()
     
     await create_audit_log(
         db,
@@ -116,6 +260,7 @@ async def register_node(
         details={"node_id": node_data.node_id, "node_type": node_data.node_type},
         request=request
     )
+    await db.commit()
     
     logger.info(f"Node registered: {node_data.node_id} (type: {node_data.node_type})")
     
@@ -127,9 +272,34 @@ async def register_node(
     )
 
 
-@router.post("/heartbeat", response_model=HeartbeatResponse)
+async def _heartbeat_body(request: Request) -> HeartbeatRequest:
+    """
+    Parse and validate a heartbeat body in one step.
+    
+    pydantic-core reads the raw bytes directly, skipping the json.loads()
+    and intermediate dict that FastAPI's body handling would build.
+    """
+    try:
+        return HeartbeatRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])}
+            for error in e.errors(include_url=False)
+        ])
+
+
+@router.post(
+    "/heartbeat",
+    response_model=HeartbeatResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": HeartbeatRequest.model_json_schema()}},
+        }
+    }
+)
 async def node_heartbeat(
-    heartbeat: HeartbeatRequest,
+    heartbeat: HeartbeatRequest = Depends(_heartbeat_body),
     db: AsyncSession = Depends(get_db)
 ) -> HeartbeatResponse:
     """
@@ -144,72 +314,75 @@ async def node_heartbeat(
     
     Returns acknowledgment and any pending commands for this node.
     """
-    # Find node
-    result = await db.execute(
-        select(Node).where(Node.node_id == heartbeat.node_id)
-    )
-    node = result.scalar_one_or_none()
+    now = datetime.utcnow()
+    params = {"heartbeat_node_id": heartbeat.node_id, "now": now}
+    for column in _HEARTBEAT_COLUMNS:
+        params[f"new_{column}"] = getattr(heartbeat, column)
     
-    if not node:
+    if db.get_bind().dialect.name == "postgresql":
+        # One round trip for the node update and command dispatch
+        result = await db.execute(_HEARTBEAT_UPDATE_AND_DISPATCH, params)
+        rows = result.all()
+        node_uuid = rows[0].id if rows else None
+        sent_rows = [row for row in rows if row.command_id is not None]
+    else:
+        result = await db.execute(_UPDATE_NODE_HEARTBEAT, params)
+        node_uuid = result.scalar_one_or_none()
+        sent_rows = []
+        if node_uuid is not None:
+            result = await db.execute(
+                _DISPATCH_PENDING_COMMANDS, {"node_uuid": node_uuid, "now": now}
+            )
+            sent_rows = result.all()
+    
+    if node_uuid is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Node not found: {heartbeat.node_id}"
         )
     
-    # Update node status and telemetry
-    node.status = NodeStatus.ONLINE
-    node.last_heartbeat = datetime.utcnow()
-    node.cpu_usage = heartbeat.cpu_usage
-    node.memory_usage = heartbeat.memory_usage
-    node.disk_usage = heartbeat.disk_usage
-    node.latitude = heartbeat.latitude
-    node.longitude = heartbeat.longitude
-    node.altitude = heartbeat.altitude
-    node.updated_at = datetime.utcnow()
-    
     # Store telemetry record
-    telemetry = TelemetryRecord(
-        node_id=node.id,
+    row = dict(
+        node_id=node_uuid,
         cpu_usage=heartbeat.cpu_usage,
         memory_usage=heartbeat.memory_usage,
         disk_usage=heartbeat.disk_usage,
         latitude=heartbeat.latitude,
         longitude=heartbeat.longitude,
         altitude=heartbeat.altitude,
-        custom_metrics=heartbeat.custom_metrics
-    )
-    db.add(telemetry)
-    
-    # Fetch pending commands for this node
-    result = await db.execute(
-        select(Command)
-        .where(Command.target_node_id == node.id)
-        .where(Command.status == CommandStatus.PENDING)
-        .order_by(Command.created_at)
-        .limit(10)
+        custom_metrics=heartbeat.custom_metrics,
+        recorded_at=now
     )
-    pending_commands = result.scalars().all()
+    if telemetry_writer.running:
+        telemetry_writer.submit(row)
+    else:
+        await db.execute(TELEMETRY_INSERT, row)
     
-    # Mark commands as sent
-    command_briefs = []
-    for cmd in pending_commands:
-        cmd.status = CommandStatus.SENT
-        cmd.sent_at = datetime.utcnow()
-        command_briefs.append(CommandBrief.model_validate(cmd))
+    await db.commit()
     
-    await db.flush()
+    # RETURNING order is unspecified; deliver oldest first
+    command_briefs = [
+        CommandBrief.model_construct(
+            id=row.command_id,
+            command_type=row.command_type,
+            payload=row.payload,
+            created_at=row.created_at
+        )
+        for row in sorted(sent_rows, key=lambda row: row.created_at)
+    ]
     
     return HeartbeatResponse(
         acknowledged=True,
-        server_time=datetime.utcnow(),
+        server_time=now,
         pending_commands=command_briefs
     )
 
 
 @router.get("", response_model=NodeListResponse)
 async def list_nodes(
-    page: int = Query(1, ge=1),
+    page: int = Query(1, ge=1, deprecated=True),
     page_size: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
     status_filter: Optional[NodeStatus] = None,
     node_type: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
@@ -218,49 +391,68 @@ async def list_nodes(
     """
     List all registered nodes with pagination and filtering.
     
-    - **page**: Page number (default: 1)
+    - **page**: Page number (default: 1); deprecated, use **cursor**
     - **page_size**: Items per page (default: 50, max: 100)
+    - **cursor**: `next_cursor` from the previous page
     - **status_filter**: Filter by node status
     - **node_type**: Filter by node type
-    """
-    # Update stale node statuses
-    timeout = datetime.utcnow() - timedelta(seconds=settings.node_heartbeat_timeout_seconds)
-    await db.execute(
-        Node.__table__.update()
-        .where(Node.last_heartbeat < timeout)
-        .where(Node.status == NodeStatus.ONLINE)
-        .values(status=NodeStatus.OFFLINE)
-    )
-    
-    # Build query
-    query = select(Node)
-    count_query = select(func.count(Node.id))
     
+    Nodes are serialized with orjson straight from the ORM columns rather
+    than through NodeResponse models.
+    """
+    filters = []
     if status_filter:
-        query = query.where(Node.status == status_filter)
-        count_query = count_query.where(Node.status == status_filter)
-    
+        filters.append(Node.status == status_filter)
     if node_type:
-        query = query.where(Node.node_type == node_type)
-        count_query = count_query.where(Node.node_type == node_type)
-    
-    # Get total count
-    result = await db.execute(count_query)
-    total = result.scalar()
+        filters.append(Node.node_type == node_type)
     
-    # Get paginated results
-    query = query.order_by(Node.registered_at.desc())
-    query = query.offset((page - 1) * page_size).limit(page_size)
+    order = (Node.registered_at.desc(), Node.id.desc())
     
-    result = await db.execute(query)
-    nodes = result.scalars().all()
+    if cursor:
+        # Keyset pagination: seek past the cursor instead of skipping rows.
+        # The total counts the whole filtered set, not just rows past it.
+        query = (
+            select(Node)
+            .where(*filters)
+            .where(tuple_(Node.registered_at, Node.id) < tuple_(*decode_cursor(cursor)))
+            .order_by(*order)
+            .limit(page_size)
+        )
+        nodes = (await db.execute(query)).scalars().all()
+        total = await db.scalar(select(func.count(Node.id)).where(*filters))
+    else:
+        # Each row carries the filtered total via a window count
+        query = (
+            select(Node, func.count().over().label("total"))
+            .where(*filters)
+            .order_by(*order)
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+        rows = (await db.execute(query)).all()
+        nodes = [row.Node for row in rows]
+        
+        if rows:
+            total = rows[0].total
+        elif page > 1:
+            # Past the last page there is no row to carry the total
+            total = await db.scalar(select(func.count(Node.id)).where(*filters))
+        else:
+            total = 0
     
-    return NodeListResponse(
-        nodes=[NodeResponse.model_validate(n) for n in nodes],
-        total=total,
-        page=page,
-        page_size=page_size
-    )
+    return ORJSONResponse({
+        "nodes": [
+            {field: getattr(node, field) for field in _NODE_RESPONSE_FIELDS}
+            for node in nodes
+        ],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": (
+            encode_cursor(nodes[-1].registered_at, nodes[-1].id)
+            if len(nodes) == page_size else None
+        ),
+    })
 
 
 @router.get("/{node_id}", response_model=NodeResponse)
@@ -272,10 +464,7 @@ async def get_node(
     """
     Get details of a specific node by node_id.
     """
-    result = await db.execute(
-        select(Node).where(Node.node_id == node_id)
-    )
-    node = result.scalar_one_or_none()
+    node = await _get_node(db, node_id)
     
     if not node:
         raise HTTPException(
@@ -283,7 +472,7 @@ async def get_node(
             detail=f"Node not found: {node_id}"
         )
     
-    return NodeResponse.model_validate(node)
+    return _node_response(node)
 
 
 @router.delete("/{node_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -296,12 +485,11 @@ async def delete_node(
     """
     Delete a node (operator or admin only).
     """
-    result = await db.execute(
-        select(Node).where(Node.node_id == node_id)
-    )
-    node = result.scalar_one_or_none()
+    # Delete by key; db.delete() would first load the node and then its
+    # commands and telemetry collections to null out their foreign keys
+    deleted_id = await db.scalar(_DELETE_NODE, {"node_id": node_id})
     
-    if not node:
+    if deleted_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Node not found: {node_id}"
@@ -312,12 +500,12 @@ async def delete_node(
         user=current_user,
         action="node_deleted",
         resource_type="node",
-        resource_id=str(node.id),
+        resource_id=str(deleted_id),
         details={"node_id": node_id},
         request=request
     )
     
-    await db.delete(node)
-    await db.flush()
+    await db.commit()
+    invalidate_node_uuid(node_id)
     
     logger.info(f"Node deleted: {node_id} by {current_user.username}")
@@ -10,7 +10,7 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 
 from .models import UserRole, NodeStatus, CommandStatus, CommandType
 
@@ -50,6 +50,8 @@ class LoginRequest(BaseModel):
     username: str = Field(..., min_length=3, max_length=100)
     password: str = Field(..., min_length=8)
 
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
 
 class UserCreate(BaseModel):
     """User creation request (admin only)."""
@@ -69,8 +71,13 @@ class UserResponse(BaseModel):
     created_at: datetime
     last_login: Optional[datetime]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UserListResponse(BaseModel):
+    """Cursor-paginated user list response."""
+    users: List[UserResponse]
+    next_cursor: Optional[UUID] = None
 
 
 # =============================================================================
@@ -87,6 +94,8 @@ class NodeRegisterRequest(BaseModel):
     mac_address: Optional[str] = None
     node_metadata: Optional[Dict[str, Any]] = None
 
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
 
 class NodeRegisterResponse(BaseModel):
     """Node registration response."""
@@ -107,6 +116,8 @@ class HeartbeatRequest(BaseModel):
     altitude: Optional[float] = None
     custom_metrics: Optional[Dict[str, Any]] = None
 
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
 
 class HeartbeatResponse(BaseModel):
     """Heartbeat response with pending commands."""
@@ -135,8 +146,7 @@ class NodeResponse(BaseModel):
     registered_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class NodeListResponse(BaseModel):
@@ -145,6 +155,7 @@ class NodeListResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 # =============================================================================
@@ -157,6 +168,8 @@ class CommandCreate(BaseModel):
     command_type: CommandType
     payload: Optional[Dict[str, Any]] = None
 
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
 
 class CommandBrief(BaseModel):
     """Brief command info for heartbeat responses."""
@@ -165,8 +178,7 @@ class CommandBrief(BaseModel):
     payload: Optional[Dict[str, Any]]
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CommandResponse(BaseModel):
@@ -184,8 +196,7 @@ class CommandResponse(BaseModel):
     acknowledged_at: Optional[datetime]
     completed_at: Optional[datetime]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CommandResultUpdate(BaseModel):
@@ -196,12 +207,24 @@ class CommandResultUpdate(BaseModel):
     error_message: Optional[str] = None
 
 
+class CommandResultBatch(BaseModel):
+    """Batch of command result updates from a node."""
+    results: List[CommandResultUpdate] = Field(..., min_length=1, max_length=100)
+
+
+class CommandResultBatchResponse(BaseModel):
+    """Outcome of a batched command result update."""
+    updated: int
+    not_found: List[UUID] = []
+
+
 class CommandListResponse(BaseModel):
     """Paginated command list response."""
     commands: List[CommandResponse]
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 # =============================================================================
@@ -227,8 +250,7 @@ class ConfigResponse(BaseModel):
     description: Optional[str]
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ConfigListResponse(BaseModel):
@@ -260,8 +282,7 @@ class AuditLogResponse(BaseModel):
     error_message: Optional[str]
     timestamp: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AuditLogListResponse(BaseModel):
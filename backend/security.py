@@ -7,17 +7,22 @@ Provides rate limiting, password complexity validation, account lockout,
 and token revocation mechanisms.
 """
 
-import re
+import string
+import heapq
 import logging
-from datetime import datetime, timedelta
+import math
+import time
+import uuid
+from datetime import datetime
 from typing import Optional, Set
-from collections import defaultdict
-import threading
+from collections import OrderedDict, deque
 
-from fastapi import Request, HTTPException, status
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from fastapi import Request, Response, HTTPException, status
+
+try:
+    from redis.asyncio import Redis
+except ImportError:  # redis not installed; security state stays in memory
+    Redis = None
 
 logger = logging.getLogger(__name__)
 
@@ -26,26 +31,115 @@ logger = logging.getLogger(__name__)
 # Rate Limiting
 # =============================================================================
 
+FORWARDED_FOR_HEADER = "x-forwarded-for"
+
+
 def get_client_ip(request: Request) -> str:
     """Get client IP for rate limiting, handling proxies."""
-    forwarded = request.headers.get("X-Forwarded-For")
+    forwarded = request.headers.get(FORWARDED_FOR_HEADER)
     if forwarded:
-        return forwarded.split(",")[0].strip()
-    return get_remote_address(request)
+        # First hop only; find/slice avoids splitting the whole chain
+        end = forwarded.find(",")
+        return (forwarded if end < 0 else forwarded[:end]).strip()
+    return request.client.host if request.client else "127.0.0.1"
 
 
-# Create rate limiter instance
-limiter = Limiter(key_func=get_client_ip)
+# Sliding-window log: drop entries older than the window, then record this
+# request only if the window still has room. Returns the count before it.
+_SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[4])
+end
+redis.call('PEXPIRE', KEYS[1], window)
+return count
+"""
 
 
-def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
-    """Custom handler for rate limit exceeded."""
-    logger.warning(f"Rate limit exceeded for {get_client_ip(request)}")
-    raise HTTPException(
-        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-        detail="Too many requests. Please slow down.",
-        headers={"Retry-After": "60"}
-    )
+class SlidingWindowLimiter:
+    """
+    Per-client-IP sliding-window rate limit, used as a route dependency.
+    
+    With Redis attached the check-and-record is a single atomic script call
+    shared by all workers; otherwise a per-process window log is used.
+    
+    Client IPs can be spoofed through X-Forwarded-For, so the in-memory log
+    is bounded: clients whose window has emptied are swept out once per
+    window, and beyond ``MAX_CLIENTS`` the least recently seen client is
+    evicted.
+    
+    Example:
+        @router.post("/login", dependencies=[Depends(SlidingWindowLimiter("login", 5, 60))])
+    """
+    
+    MAX_CLIENTS = 10000
+    
+    def __init__(self, scope: str, limit: int, window_seconds: int):
+        self.scope = scope
+        self.limit = limit
+        self.window_ms = window_seconds * 1000
+        self._windows: "OrderedDict[str, deque]" = OrderedDict()
+        self._next_sweep_ms = 0
+    
+    def _sweep(self, cutoff: int) -> None:
+        """Forget clients with no hits left in the window."""
+        for key in [key for key, window in self._windows.items() if window[-1] <= cutoff]:
+            del self._windows[key]
+    
+    def _hit_memory(self, key: str, now_ms: int) -> int:
+        """Record a hit in the local window log; returns the prior count."""
+        cutoff = now_ms - self.window_ms
+        if now_ms >= self._next_sweep_ms:
+            self._sweep(cutoff)
+            self._next_sweep_ms = now_ms + self.window_ms
+        
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = deque()
+            if len(self._windows) > self.MAX_CLIENTS:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+            while window and window[0] <= cutoff:
+                window.popleft()
+        
+        count = len(window)
+        if count < self.limit:
+            window.append(now_ms)
+        elif not window:
+            del self._windows[key]
+        return count
+    
+    async def __call__(self, request: Request, response: Response) -> None:
+        key = f"rl:{self.scope}:{get_client_ip(request)}"
+        now_ms = int(time.time() * 1000)
+        
+        if _rate_limit_script is not None:
+            count = await _rate_limit_script(
+                keys=[key],
+                args=[now_ms, self.window_ms, self.limit, f"{now_ms}-{uuid.uuid4().hex}"]
+            )
+        else:
+            count = self._hit_memory(key, now_ms)
+        
+        if count >= self.limit:
+            logger.warning(f"Rate limit exceeded for {key}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests. Please slow down.",
+                headers={
+                    "Retry-After": str(self.window_ms // 1000),
+                    "X-RateLimit-Limit": str(self.limit),
+                    "X-RateLimit-Remaining": "0",
+                }
+            )
+        
+        response.headers["X-RateLimit-Limit"] = str(self.limit)
+        response.headers["X-RateLimit-Remaining"] = str(self.limit - count - 1)
 
 
 # =============================================================================
@@ -65,7 +159,10 @@ class PasswordValidator:
     """
     
     MIN_LENGTH = 8
-    SPECIAL_CHARS = r"[!@#$%^&*(),.?\":{}|<>_\-+=\[\]\\;'/~`]"
+    SPECIAL_CHARS = frozenset("!@#$%^&*(),.?\":{}|<>_-+=[]\\;'/~`")
+    UPPERCASE = frozenset(string.ascii_uppercase)
+    LOWERCASE = frozenset(string.ascii_lowercase)
+    DIGITS = frozenset(string.digits)
     
     @classmethod
     def validate(cls, password: str) -> tuple[bool, list[str]]:
@@ -80,16 +177,24 @@ class PasswordValidator:
         if len(password) < cls.MIN_LENGTH:
             errors.append(f"Password must be at least {cls.MIN_LENGTH} characters long")
         
-        if not re.search(r"[A-Z]", password):
+        # One pass to collect the distinct characters, then C-level
+        # set checks per class; non-ASCII digits still count, as with \d
+        chars = set(password)
+        has_upper = not cls.UPPERCASE.isdisjoint(chars)
+        has_lower = not cls.LOWERCASE.isdisjoint(chars)
+        has_digit = not cls.DIGITS.isdisjoint(chars) or any(ch.isdecimal() for ch in chars)
+        has_special = not cls.SPECIAL_CHARS.isdisjoint(chars)
+        
+        if not has_upper:
             errors.append("Password must contain at least one uppercase letter")
         
-        if not re.search(r"[a-z]", password):
+        if not has_lower:
             errors.append("Password must contain at least one lowercase letter")
         
-        if not re.search(r"\d", password):
+        if not has_digit:
             errors.append("Password must contain at least one digit")
         
-        if not re.search(cls.SPECIAL_CHARS, password):
+        if not has_special:
             errors.append("Password must contain at least one special character")
         
         return len(errors) == 0, errors
@@ -112,89 +217,215 @@ class PasswordValidator:
 # Account Lockout
 # =============================================================================
 
+# INCR the failure counter and start its expiry window on the first failure,
+# atomically, in a single round trip
+_RECORD_FAILURE_LUA = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+
 class AccountLockoutManager:
     """
-    In-memory account lockout manager.
+    Account lockout manager.
     
     Tracks failed login attempts and locks accounts after threshold exceeded.
-    For production, consider using Redis for distributed lockout tracking.
+    When a Redis client is attached (see ``init_redis``) the counters live in
+    Redis so every worker process shares them; otherwise they are kept in
+    process memory. In-memory failures are counted in a fixed window that
+    opens at the first failure, as in Redis; timestamps come from
+    ``time.monotonic()``. The in-memory state needs no lock: it is only
+    touched from the event loop thread, and no method awaits between
+    reading and writing it.
     """
     
     MAX_FAILED_ATTEMPTS = 5
     LOCKOUT_DURATION_MINUTES = 15
+    KEY_PREFIX = "lockout:"
+    # Audit entries written per username per window for attempts on a locked account
+    BLOCKED_AUDIT_LIMIT = 5
+    BLOCKED_AUDIT_WINDOW_SECONDS = 60
     
     def __init__(self):
-        self._failed_attempts: dict[str, list[datetime]] = defaultdict(list)
-        self._lockouts: dict[str, datetime] = {}
-        self._lock = threading.Lock()
-    
-    def _cleanup_old_attempts(self, username: str) -> None:
-        """Remove attempts older than lockout duration."""
-        cutoff = datetime.utcnow() - timedelta(minutes=self.LOCKOUT_DURATION_MINUTES)
-        self._failed_attempts[username] = [
-            attempt for attempt in self._failed_attempts[username]
-            if attempt > cutoff
-        ]
-    
-    def is_locked_out(self, username: str) -> bool:
+        self._failed_attempts: dict[str, tuple[float, int]] = {}
+        self._lockouts: dict[str, float] = {}
+        self._blocked_audits: dict[str, tuple[float, int]] = {}
+        self._window = self.LOCKOUT_DURATION_MINUTES * 60
+        self._redis: Optional["Redis"] = None
+        self._record_failure = None
+    
+    def use_redis(self, client: Optional["Redis"]) -> None:
+        """Store counters in Redis (or back in memory when client is None)."""
+        self._redis = client
+        self._record_failure = client.register_script(_RECORD_FAILURE_LUA) if client else None
+    
+    def _failure_count(self, username: str) -> int:
+        """Failures in the current in-memory window."""
+        window_start, count = self._failed_attempts.get(username, (0.0, 0))
+        if count and time.monotonic() - window_start >= self._window:
+            del self._failed_attempts[username]
+            return 0
+        return count
+    
+    async def _redis_failures(self, username: str) -> int:
+        """Current failure count for a username from Redis."""
+        count = await self._redis.get(self.KEY_PREFIX + username)
+        return int(count) if count else 0
+    
+    async def is_locked_out(self, username: str) -> bool:
         """Check if account is currently locked out."""
-        with self._lock:
-            if username in self._lockouts:
-                lockout_until = self._lockouts[username]
-                if datetime.utcnow() < lockout_until:
-                    return True
-                else:
-                    # Lockout expired, remove it
-                    del self._lockouts[username]
-                    self._failed_attempts[username] = []
-            return False
+        if self._redis is not None:
+            return await self._redis_failures(username) >= self.MAX_FAILED_ATTEMPTS
+        
+        lockout_until = self._lockouts.get(username)
+        if lockout_until is not None:
+            if time.monotonic() < lockout_until:
+                return True
+            else:
+                # Lockout expired, remove it
+                del self._lockouts[username]
+                self._failed_attempts.pop(username, None)
+                self._blocked_audits.pop(username, None)
+        return False
     
-    def get_lockout_remaining(self, username: str) -> Optional[int]:
+    async def get_lockout_remaining(self, username: str) -> Optional[int]:
         """Get remaining lockout time in seconds."""
-        with self._lock:
-            if username in self._lockouts:
-                remaining = (self._lockouts[username] - datetime.utcnow()).total_seconds()
-                if remaining > 0:
-                    return int(remaining)
+        if self._redis is not None:
+            # The counter expires a full window after the first failure, not
+            # the one that locked the account; its PTTL is what is left
+            if await self._redis_failures(username) < self.MAX_FAILED_ATTEMPTS:
+                return None
+            remaining_ms = await self._redis.pttl(self.KEY_PREFIX + username)
+            return math.ceil(remaining_ms / 1000) if remaining_ms > 0 else None
+        
+        lockout_until = self._lockouts.get(username)
+        if lockout_until is not None:
+            remaining = lockout_until - time.monotonic()
+            if remaining > 0:
+                return math.ceil(remaining)
         return None
     
-    def record_failed_attempt(self, username: str) -> bool:
+    async def record_failed_attempt(self, username: str) -> bool:
         """
         Record a failed login attempt.
         
         Returns:
             True if account is now locked out, False otherwise
         """
-        with self._lock:
-            self._cleanup_old_attempts(username)
-            self._failed_attempts[username].append(datetime.utcnow())
-            
-            if len(self._failed_attempts[username]) >= self.MAX_FAILED_ATTEMPTS:
-                lockout_until = datetime.utcnow() + timedelta(minutes=self.LOCKOUT_DURATION_MINUTES)
-                self._lockouts[username] = lockout_until
-                logger.warning(f"Account locked: {username} until {lockout_until}")
+        if self._redis is not None:
+            count = await self._record_failure(
+                keys=[self.KEY_PREFIX + username],
+                args=[self._window]
+            )
+            if count >= self.MAX_FAILED_ATTEMPTS:
+                logger.warning(f"Account locked: {username}")
                 return True
-            
             return False
+        
+        now = time.monotonic()
+        window_start, count = self._failed_attempts.get(username, (now, 0))
+        if now - window_start >= self._window:
+            window_start, count = now, 0
+        count += 1
+        self._failed_attempts[username] = (window_start, count)
+        
+        if count >= self.MAX_FAILED_ATTEMPTS:
+            self._lockouts[username] = now + self._window
+            logger.warning(
+                f"Account locked: {username} for {self.LOCKOUT_DURATION_MINUTES} minutes"
+            )
+            return True
+        
+        return False
     
-    def clear_attempts(self, username: str) -> None:
+    def should_audit_blocked(self, username: str) -> bool:
+        """
+        Sample audit entries for login attempts against a locked account.
+        
+        Allows ``BLOCKED_AUDIT_LIMIT`` entries per username per window so a
+        sustained attack on a locked account cannot turn every rejected
+        request into a database write. Kept per process, even with Redis.
+        """
+        now = time.monotonic()
+        window_start, count = self._blocked_audits.get(username, (now, 0))
+        if now - window_start >= self.BLOCKED_AUDIT_WINDOW_SECONDS:
+            window_start, count = now, 0
+        if count >= self.BLOCKED_AUDIT_LIMIT:
+            return False
+        self._blocked_audits[username] = (window_start, count + 1)
+        return True
+    
+    async def clear_attempts(self, username: str) -> None:
         """Clear failed attempts after successful login."""
-        with self._lock:
-            self._failed_attempts[username] = []
-            if username in self._lockouts:
-                del self._lockouts[username]
+        if self._redis is not None:
+            await self._redis.delete(self.KEY_PREFIX + username)
+        
+        self._failed_attempts.pop(username, None)
+        self._lockouts.pop(username, None)
+        self._blocked_audits.pop(username, None)
     
-    def get_remaining_attempts(self, username: str) -> int:
+    async def get_remaining_attempts(self, username: str) -> int:
         """Get remaining login attempts before lockout."""
-        with self._lock:
-            self._cleanup_old_attempts(username)
-            return max(0, self.MAX_FAILED_ATTEMPTS - len(self._failed_attempts[username]))
+        if self._redis is not None:
+            return max(0, self.MAX_FAILED_ATTEMPTS - await self._redis_failures(username))
+        
+        return max(0, self.MAX_FAILED_ATTEMPTS - self._failure_count(username))
 
 
 # Global lockout manager instance
 lockout_manager = AccountLockoutManager()
 
 
+# =============================================================================
+# Redis (shared state across worker processes)
+# =============================================================================
+
+redis_client: Optional["Redis"] = None
+_rate_limit_script = None
+
+
+async def init_redis(url: Optional[str]) -> None:
+    """
+    Connect to Redis and move shared security state onto it.
+    
+    Falls back to per-process in-memory state if Redis is not configured
+    or not reachable.
+    """
+    global redis_client, _rate_limit_script
+    
+    if not url or Redis is None:
+        return
+    
+    client = Redis.from_url(url, decode_responses=True)
+    try:
+        await client.ping()
+    except Exception as e:
+        logger.warning(f"Redis unavailable at {url}, using in-memory security state: {e}")
+        await client.aclose()
+        return
+    
+    redis_client = client
+    _rate_limit_script = client.register_script(_SLIDING_WINDOW_LUA)
+    lockout_manager.use_redis(client)
+    logger.info("Security state backed by Redis")
+
+
+async def close_redis() -> None:
+    """Detach and close the Redis client."""
+    global redis_client, _rate_limit_script
+    
+    if redis_client is None:
+        return
+    
+    _rate_limit_script = None
+    lockout_manager.use_redis(None)
+    await redis_client.aclose()
+    redis_client = None
+
+
 # =============================================================================
 # Token Revocation (Simple In-Memory Implementation)
 # =============================================================================
@@ -205,30 +436,33 @@ class TokenRevocationList:
     
     For production, use Redis or a database for persistence and scalability.
     Tokens are stored with their expiration time for automatic cleanup.
+    Like the lockout state, it is only used from the event loop thread.
     """
     
     def __init__(self):
         self._revoked_tokens: dict[str, datetime] = {}
-        self._lock = threading.Lock()
+        # (expires_at, jti) min-heap, so cleanup only touches expired entries
+        self._expiry_heap: list[tuple[datetime, str]] = []
     
     def revoke(self, token_jti: str, expires_at: datetime) -> None:
         """Add a token to the revocation list."""
-        with self._lock:
-            self._revoked_tokens[token_jti] = expires_at
-            self._cleanup_expired()
+        self._revoked_tokens[token_jti] = expires_at
+        heapq.heappush(self._expiry_heap, (expires_at, token_jti))
+        self._cleanup_expired()
     
     def is_revoked(self, token_jti: str) -> bool:
         """Check if a token has been revoked."""
-        with self._lock:
-            return token_jti in self._revoked_tokens
+        return token_jti in self._revoked_tokens
     
     def _cleanup_expired(self) -> None:
         """Remove expired tokens from the revocation list."""
         now = datetime.utcnow()
-        self._revoked_tokens = {
-            jti: exp for jti, exp in self._revoked_tokens.items()
-            if exp > now
-        }
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, jti = heapq.heappop(heap)
+            # Skip stale entries left behind when a token was revoked again
+            if self._revoked_tokens.get(jti) == expires_at:
+                del self._revoked_tokens[jti]
 
 
 # Global token revocation list
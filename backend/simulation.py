@@ -154,44 +154,47 @@ class SimulationManager:
                 logger.error(f"Failed to register simulated node {node_data['node_id']}: {e}")
 
     async def _send_heartbeats(self, client: httpx.AsyncClient, base_url: str):
-        """Send heartbeats for all registered nodes with movement."""
-        for node in NODES:
-            if not self._running:
-                break
-                
-            token = self._node_tokens.get(node["node_id"])
-            if not token:
-                continue
+        """Send heartbeats for all registered nodes with movement, concurrently."""
+        if not self._running:
+            return
+        
+        await asyncio.gather(*(
+            self._send_heartbeat(client, base_url, node, self._node_tokens[node["node_id"]])
+            for node in NODES
+            if node["node_id"] in self._node_tokens
+        ))
 
-            try:
-                # Update position (Random Walk)
-                node["lat"] += random.uniform(-0.0001, 0.0001)
-                node["lon"] += random.uniform(-0.0001, 0.0001)
-                
-                # Update stats
-                cpu = random.randint(10, 80)
-                altitude = 300 + random.randint(-10, 10) if node["node_type"] == "uas" else 0
-                
-                heartbeat_data = {
-                    "node_id": node["node_id"],
-                    "cpu_usage": cpu,
-                    "memory_usage": random.randint(20, 60),
-                    "disk_usage": 45,
-                    "latitude": node["lat"],
-                    "longitude": node["lon"],
-                    "altitude": altitude,
-                    "custom_metrics": {"battery": random.randint(80, 100), "signal": random.randint(-90, -50)}
-                }
-                
-                headers = {"Authorization": f"Bearer {token}"}
-                await client.post(
-                    f"{base_url}/nodes/heartbeat",
-                    json=heartbeat_data,
-                    headers=headers
-                )
-                
-            except Exception as e:
-                pass  # Ignore transient errors
+    async def _send_heartbeat(self, client: httpx.AsyncClient, base_url: str, node: dict, token: str):
+        """Move one node and send its heartbeat."""
+        try:
+            # Update position (Random Walk)
+            node["lat"] += random.uniform(-0.0001, 0.0001)
+            node["lon"] += random.uniform(-0.0001, 0.0001)
+            
+            # Update stats
+            cpu = random.randint(10, 80)
+            altitude = 300 + random.randint(-10, 10) if node["node_type"] == "uas" else 0
+            
+            heartbeat_data = {
+                "node_id": node["node_id"],
+                "cpu_usage": cpu,
+                "memory_usage": random.randint(20, 60),
+                "disk_usage": 45,
+                "latitude": node["lat"],
+                "longitude": node["lon"],
+                "altitude": altitude,
+                "custom_metrics": {"battery": random.randint(80, 100), "signal": random.randint(-90, -50)}
+            }
+            
+            headers = {"Authorization": f"Bearer {token}"}
+            await client.post(
+                f"{base_url}/nodes/heartbeat",
+                json=heartbeat_data,
+                headers=headers
+            )
+            
+        except Exception as e:
+            pass  # Ignore transient errors
 
 # Global instance
 simulation_manager = SimulationManager()
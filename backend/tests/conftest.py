@@ -5,20 +5,53 @@ Test configuration and fixtures for TacticalMesh backend tests.
 """
 
 import asyncio
-from typing import AsyncGenerator, Generator
+import os
+from types import MappingProxyType
+from typing import Any, AsyncGenerator, Dict, List, Mapping
+from uuid import UUID
 
+import orjson
 import pytest
 import pytest_asyncio
-from httpx import AsyncClient, ASGITransport
+from pytest_asyncio import is_async_test
+from httpx import AsyncClient, ASGITransport, Response
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from backend.database import Base, get_db
+try:
+    # Installed with uvicorn[standard] everywhere except Windows
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Test-only: hash passwords with the cheapest argon2id parameters. Must be
+# set before backend settings are first loaded.
+os.environ.setdefault("TM_PASSWORD_HASH_TIME_COST", "1")
+os.environ.setdefault("TM_PASSWORD_HASH_MEMORY_COST", "8")
+os.environ.setdefault("TM_PASSWORD_HASH_PARALLELISM", "1")
+
+from backend.database import Base, get_db, get_sessionmaker
 from backend.main import app
-from backend.auth import get_password_hash, create_access_token
+from backend.auth import _credential_cache, _user_cache, create_access_token
+from backend.caches import _node_uuid_cache
 from backend.models import User, UserRole
 
 
+# Password of the fixture users, pre-hashed with the test argon2id
+# parameters so creating a fixture user costs no KDF time. Logins still
+# verify it through the regular CryptContext.
+TEST_PASSWORD = "testpassword123"
+TEST_PASSWORD_HASH = "$argon2id$v=19$m=8,t=1,p=1$oDTG+H+vNaaU0lrrXWvtnQ$luFHC5YsLscoSP0XFIEhWBtiZbYXU+vj80cTI/AB+sc"
+
+# Fixture users keep the same primary key in every test, so their JWTs
+# can be signed once per session. The ids contain hex letters: SQLite gives
+# the UUID column numeric affinity and would turn an all-digit id into a
+# number.
+FIXTURE_USERS = {
+    UserRole.ADMIN: (UUID("adadadad-0000-4000-8000-000000000001"), "testadmin"),
+    UserRole.OPERATOR: (UUID("bdbdbdbd-0000-4000-8000-000000000002"), "testoperator"),
+}
+
 # Use in-memory SQLite for tests
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -41,43 +74,101 @@ test_async_session = async_sessionmaker(
 pytest_plugins = ['pytest_asyncio']
 
 
-@pytest_asyncio.fixture
-async def db_session() -> AsyncGenerator[AsyncSession, None]:
-    """Create a test database session."""
+def pytest_collection_modifyitems(items: List[pytest.Item]) -> None:
+    """Run every async test in the session event loop shared with the fixtures."""
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+
+def load_json(response: Response) -> Any:
+    """Decode a response body with orjson, the library the app encodes it with."""
+    return orjson.loads(response.content)
+
+
+async def register_nodes(client: AsyncClient, specs: List[Dict[str, Any]]) -> List[dict]:
+    """
+    Register several nodes and return their registration responses.
+    
+    Requests are sent one after another: the client fixture routes every
+    request to the same AsyncSession, which does not allow concurrent
+    operations, so they cannot be gathered.
+    """
+    responses = []
+    for spec in specs:
+        response = await client.post("/api/v1/nodes/register", json=spec)
+        assert response.status_code == 201
+        responses.append(load_json(response))
+    return responses
+
+
+@pytest.fixture(scope="session")
+def event_loop_policy() -> asyncio.AbstractEventLoopPolicy:
+    """Run the session event loop on uvloop when it is available."""
+    if uvloop is not None:
+        return uvloop.EventLoopPolicy()
+    return asyncio.DefaultEventLoopPolicy()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def test_schema() -> None:
+    """Create the in-memory schema once per session."""
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-    
+
+
+@pytest_asyncio.fixture
+async def db_session(test_schema: None) -> AsyncGenerator[AsyncSession, None]:
+    """Create a test database session."""
+    # The schema outlives each test; tests are isolated by emptying the
+    # tables, committed before the next test starts
     async with test_async_session() as session:
         yield session
     
     async with test_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+        for table in reversed(Base.metadata.sorted_tables):
+            await conn.execute(table.delete())
+    
+    # Rows are gone; so are the caches keyed by them. Fixture user ids
+    # repeat across tests, so a stale user snapshot must not survive.
+    _node_uuid_cache.clear()
+    _user_cache.clear()
+    _credential_cache.clear()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def asgi_client() -> AsyncGenerator[AsyncClient, None]:
+    """One AsyncClient for the whole session; ASGITransport calls the app in-process."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
 
 
 @pytest_asyncio.fixture
-async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
+async def client(db_session: AsyncSession, asgi_client: AsyncClient) -> AsyncGenerator[AsyncClient, None]:
     """Create a test client with database dependency override."""
     
     async def override_get_db():
         yield db_session
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_sessionmaker] = lambda: test_async_session
     
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as ac:
-        yield ac
+    yield asgi_client
     
+    asgi_client.cookies.clear()
     app.dependency_overrides.clear()
 
 
-@pytest_asyncio.fixture
-async def admin_user(db_session: AsyncSession) -> User:
-    """Create an admin user for testing."""
+async def create_fixture_user(db_session: AsyncSession, role: UserRole) -> User:
+    """Insert the fixture user for a role."""
+    user_id, username = FIXTURE_USERS[role]
     user = User(
-        username="testadmin",
-        email="testadmin@test.com",
-        hashed_password=get_password_hash("testpassword123"),
-        role=UserRole.ADMIN,
+        id=user_id,
+        username=username,
+        email=f"{username}@test.com",
+        hashed_password=TEST_PASSWORD_HASH,
+        role=role,
         is_active=True
     )
     db_session.add(user)
@@ -86,41 +177,63 @@ async def admin_user(db_session: AsyncSession) -> User:
     return user
 
 
+@pytest.fixture(scope="session")
+def fixture_tokens() -> Dict[UserRole, str]:
+    """Sign one JWT per fixture user for the whole session."""
+    return {
+        role: create_access_token(
+            data={"sub": username, "user_id": str(user_id), "role": role.value}
+        )
+        for role, (user_id, username) in FIXTURE_USERS.items()
+    }
+
+
+@pytest.fixture(scope="session")
+def fixture_auth_headers(fixture_tokens: Dict[UserRole, str]) -> Dict[UserRole, Mapping[str, str]]:
+    """Read-only Authorization headers for each fixture user."""
+    return {
+        role: MappingProxyType({"Authorization": "Bearer " + token})
+        for role, token in fixture_tokens.items()
+    }
+
+
 @pytest_asyncio.fixture
-async def admin_token(admin_user: User) -> str:
-    """Create an admin JWT token for testing."""
-    return create_access_token(
-        data={
-            "sub": admin_user.username,
-            "user_id": str(admin_user.id),
-            "role": admin_user.role.value
-        }
-    )
+async def admin_user(db_session: AsyncSession) -> User:
+    """Create an admin user for testing."""
+    return await create_fixture_user(db_session, UserRole.ADMIN)
+
+
+@pytest.fixture
+def admin_token(admin_user: User, fixture_tokens: Dict[UserRole, str]) -> str:
+    """Admin JWT token for testing."""
+    return fixture_tokens[UserRole.ADMIN]
+
+
+@pytest.fixture
+def admin_headers(
+    admin_user: User,
+    fixture_auth_headers: Dict[UserRole, Mapping[str, str]]
+) -> Mapping[str, str]:
+    """Authorization header of the admin user."""
+    return fixture_auth_headers[UserRole.ADMIN]
 
 
 @pytest_asyncio.fixture
 async def operator_user(db_session: AsyncSession) -> User:
     """Create an operator user for testing."""
-    user = User(
-        username="testoperator",
-        email="testoperator@test.com",
-        hashed_password=get_password_hash("testpassword123"),
-        role=UserRole.OPERATOR,
-        is_active=True
-    )
-    db_session.add(user)
-    await db_session.commit()
-    await db_session.refresh(user)
-    return user
+    return await create_fixture_user(db_session, UserRole.OPERATOR)
 
 
-@pytest_asyncio.fixture
-async def operator_token(operator_user: User) -> str:
-    """Create an operator JWT token for testing."""
-    return create_access_token(
-        data={
-            "sub": operator_user.username,
-            "user_id": str(operator_user.id),
-            "role": operator_user.role.value
-        }
-    )
+@pytest.fixture
+def operator_token(operator_user: User, fixture_tokens: Dict[UserRole, str]) -> str:
+    """Operator JWT token for testing."""
+    return fixture_tokens[UserRole.OPERATOR]
+
+
+@pytest.fixture
+def operator_headers(
+    operator_user: User,
+    fixture_auth_headers: Dict[UserRole, Mapping[str, str]]
+) -> Mapping[str, str]:
+    """Authorization header of the operator user."""
+    return fixture_auth_headers[UserRole.OPERATOR]
@@ -0,0 +1,34 @@
+# Copyright 2024 TacticalMesh Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Audit log writer tests for TacticalMesh.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.audit import AuditLogWriter
+from backend.models import AuditLog
+
+from .conftest import test_async_session
+
+
+async def test_audit_writer_flushes_batches_on_stop(db_session: AsyncSession):
+    """Test that buffered audit entries are written in batches on shutdown."""
+    writer = AuditLogWriter(test_async_session, batch_size=2, flush_interval=30)
+    writer.start()
+    
+    for i in range(5):
+        assert writer.submit({
+            "action": f"test_action_{i}",
+            "success": True,
+            "timestamp": datetime.utcnow()
+        })
+    
+    await writer.stop()
+    assert not writer.running
+    
+    count = await db_session.scalar(select(func.count()).select_from(AuditLog))
+    assert count == 5
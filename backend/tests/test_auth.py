@@ -4,55 +4,59 @@
 Authentication API tests for TacticalMesh.
 """
 
-import pytest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Mapping
+
 from httpx import AsyncClient
+from sqlalchemy import select
 
+from backend import auth
+from backend.models import AuditLog
+from .conftest import TEST_PASSWORD, load_json, test_async_session
 
-@pytest.mark.asyncio
-async def test_login_success(client: AsyncClient, admin_user):
-    """Test successful login."""
-    response = await client.post(
-        "/api/v1/auth/login",
-        json={
-            "username": "testadmin",
-            "password": "testpassword123"
-        }
-    )
-    assert response.status_code == 200
-    data = response.json()
-    assert "access_token" in data
-    assert data["token_type"] == "bearer"
-    assert data["role"] == "admin"
+# Login body of the admin fixture user
+ADMIN_LOGIN = {"username": "testadmin", "password": TEST_PASSWORD}
 
 
-@pytest.mark.asyncio
-async def test_login_wrong_password(client: AsyncClient, admin_user):
-    """Test login with wrong password."""
-    response = await client.post(
-        "/api/v1/auth/login",
-        json={
-            "username": "testadmin",
-            "password": "wrongpassword"
-        }
-    )
-    assert response.status_code == 401
+async def test_login(client: AsyncClient, admin_user):
+    """Test login with valid, wrong and unknown credentials."""
+    for payload, status_code in (
+        (ADMIN_LOGIN, 200),
+        ({"username": "testadmin", "password": "wrongpassword"}, 401),
+        ({"username": "nonexistent", "password": "password123"}, 401),
+    ):
+        response = await client.post("/api/v1/auth/login", json=payload)
+        assert response.status_code == status_code
+        if status_code == 200:
+            data = load_json(response)
+            assert "access_token" in data
+            assert data["token_type"] == "bearer"
+            assert data["role"] == "admin"
 
 
-@pytest.mark.asyncio
-async def test_login_nonexistent_user(client: AsyncClient):
-    """Test login with non-existent user."""
+async def test_login_failure_audit_is_committed(client: AsyncClient, db_session):
+    """Test that a failed login's audit entry survives the 401 rollback."""
     response = await client.post(
         "/api/v1/auth/login",
         json={
-            "username": "nonexistent",
+            "username": "audited-nobody",
             "password": "password123"
         }
     )
     assert response.status_code == 401
+    # What get_db does with uncommitted work when the request ends
+    await db_session.rollback()
+    
+    async with test_async_session() as session:
+        result = await session.execute(
+            select(AuditLog).where(AuditLog.action == "login_failed")
+        )
+        entry = result.scalar_one()
+    assert entry.details["username"] == "audited-nobody"
+    assert entry.success is False
 
 
-@pytest.mark.asyncio
-async def test_register_user_requires_admin(client: AsyncClient, operator_token: str):
+async def test_register_user_requires_admin(client: AsyncClient, operator_headers: Mapping[str, str]):
     """Test that user registration requires admin role."""
     response = await client.post(
         "/api/v1/auth/register",
@@ -61,14 +65,13 @@ async def test_register_user_requires_admin(client: AsyncClient, operator_token:
             "password": "NewPassword123!",  # Complex password
             "role": "observer"
         },
-        headers={"Authorization": f"Bearer {operator_token}"}
+        headers=operator_headers
     )
     assert response.status_code == 403
 
 
 
-@pytest.mark.asyncio
-async def test_register_user_as_admin(client: AsyncClient, admin_token: str):
+async def test_register_user_as_admin(client: AsyncClient, admin_headers: Mapping[str, str]):
     """Test user registration as admin."""
     response = await client.post(
         "/api/v1/auth/register",
@@ -78,10 +81,107 @@ async def test_register_user_as_admin(client: AsyncClient, admin_token: str):
             "password": "NewPassword123!",  # Complex password meeting requirements
             "role": "operator"
         },
-        headers={"Authorization": f"Bearer {admin_token}"}
+        headers=admin_headers
     )
     assert response.status_code == 201
-    data = response.json()
+    data = load_json(response)
     assert data["username"] == "newoperator"
     assert data["role"] == "operator"
 
+
+async def test_register_user_duplicate(client: AsyncClient, admin_headers: Mapping[str, str]):
+    """Test registration rejects an existing username or email."""
+    for payload, detail in (
+        ({"username": "testadmin"}, "Username already registered"),
+        ({"username": "other", "email": "testadmin@test.com"}, "Email already registered"),
+    ):
+        response = await client.post(
+            "/api/v1/auth/register",
+            json={"password": "NewPassword123!", "role": "observer", **payload},
+            headers=admin_headers
+        )
+        assert response.status_code == 400
+        assert load_json(response)["detail"] == detail
+
+
+
+async def test_change_password_with_cached_user(client: AsyncClient, admin_headers: Mapping[str, str]):
+    """Test that a cached authenticated user can still be updated."""
+    for _ in range(2):
+        response = await client.get("/api/v1/auth/me", headers=admin_headers)
+        assert response.status_code == 200
+        assert load_json(response)["username"] == "testadmin"
+    
+    response = await client.post(
+        "/api/v1/auth/change-password",
+        params={"current_password": TEST_PASSWORD, "new_password": "N3w-Passw0rd!"},
+        headers=admin_headers
+    )
+    assert response.status_code == 200
+    
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={"username": "testadmin", "password": "N3w-Passw0rd!"}
+    )
+    assert response.status_code == 200
+
+
+async def test_list_users_pagination(client: AsyncClient, admin_headers: Mapping[str, str], operator_user):
+    """Test cursor pagination of the user list."""
+    response = await client.get("/api/v1/auth/users", params={"limit": 1}, headers=admin_headers)
+    assert response.status_code == 200
+    first_page = load_json(response)
+    assert len(first_page["users"]) == 1
+    assert first_page["next_cursor"] == first_page["users"][0]["id"]
+    assert first_page["users"][0]["role"] in ("admin", "operator")
+    
+    response = await client.get(
+        "/api/v1/auth/users",
+        params={"limit": 1, "cursor": first_page["next_cursor"]},
+        headers=admin_headers
+    )
+    second_page = load_json(response)
+    assert len(second_page["users"]) == 1
+    assert second_page["next_cursor"] is None
+    assert {first_page["users"][0]["username"], second_page["users"][0]["username"]} == {
+        "testadmin", "testoperator"
+    }
+
+
+async def test_authenticate_unknown_user_runs_kdf(db_session, monkeypatch):
+    """Test that unknown usernames cost the same KDF verification as known ones."""
+    verified_hashes = []
+    
+    def record_verify(password, hashed_password):
+        verified_hashes.append(hashed_password)
+        return False, None
+    
+    monkeypatch.setattr(auth, "_password_executor", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(auth, "_verify_and_update", record_verify)
+    
+    assert await auth.authenticate_user(db_session, "no-such-user", "password") is None
+    assert verified_hashes == [auth._DUMMY_HASH]
+
+
+async def test_authenticate_reuses_recent_verification(db_session, admin_user, monkeypatch):
+    """Test that a recently verified password skips the KDF until the hash changes."""
+    verify_calls = []
+    
+    def record_verify(password, hashed_password):
+        verify_calls.append(hashed_password)
+        return password == TEST_PASSWORD, None
+    
+    monkeypatch.setattr(auth, "_password_executor", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(auth, "_verify_and_update", record_verify)
+    monkeypatch.setattr(auth, "_credential_cache", auth.OrderedDict())
+    
+    assert await auth.authenticate_user(db_session, "testadmin", TEST_PASSWORD)
+    assert await auth.authenticate_user(db_session, "testadmin", TEST_PASSWORD)
+    assert len(verify_calls) == 1
+    
+    assert await auth.authenticate_user(db_session, "testadmin", "wrong") is None
+    assert len(verify_calls) == 2
+    
+    admin_user.hashed_password = "changed"
+    assert await auth.authenticate_user(db_session, "testadmin", TEST_PASSWORD)
+    assert len(verify_calls) == 3
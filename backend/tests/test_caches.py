@@ -0,0 +1,27 @@
+# Copyright 2024 TacticalMesh Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Lookup cache tests for TacticalMesh.
+"""
+
+from backend import caches
+from backend.models import Node
+
+
+async def test_node_uuid_cached_until_invalidated(db_session):
+    """Test that node UUIDs are cached on hit and dropped on invalidation."""
+    assert await caches.node_uuid(db_session, "test-node-cache") is None
+
+    node = Node(node_id="test-node-cache", node_type="sensor", auth_token="token")
+    db_session.add(node)
+    await db_session.commit()
+
+    # Misses are not cached, so the new node is found right away
+    assert await caches.node_uuid(db_session, "test-node-cache") == node.id
+
+    await db_session.delete(node)
+    await db_session.commit()
+    assert await caches.node_uuid(db_session, "test-node-cache") == node.id
+
+    caches.invalidate_node_uuid("test-node-cache")
+    assert await caches.node_uuid(db_session, "test-node-cache") is None
@@ -0,0 +1,208 @@
+# Copyright 2024 TacticalMesh Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Command API tests for TacticalMesh.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from typing import Mapping
+
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from backend.models import Command
+
+from .conftest import load_json
+
+
+async def test_command_results_batch(client: AsyncClient, operator_headers: Mapping[str, str]):
+    """Test acknowledging and completing commands in a single batch."""
+    await client.post(
+        "/api/v1/nodes/register",
+        json={"node_id": "test-node-batch", "node_type": "sensor"}
+    )
+
+    create_response = await client.post(
+        "/api/v1/commands",
+        json={"target_node_id": "test-node-batch", "command_type": "ping"},
+        headers=operator_headers
+    )
+    assert create_response.status_code == 201
+    command_id = load_json(create_response)["id"]
+    unknown_id = str(uuid.uuid4())
+
+    response = await client.post(
+        "/api/v1/commands/results:batch",
+        json={
+            "results": [
+                {"command_id": command_id, "status": "acknowledged"},
+                {"command_id": command_id, "status": "completed", "result": {"message": "pong"}},
+                {"command_id": unknown_id, "status": "completed"},
+            ]
+        }
+    )
+    assert response.status_code == 200
+    data = load_json(response)
+    assert data["updated"] == 2
+    assert data["not_found"] == [unknown_id]
+
+    get_response = await client.get(
+        f"/api/v1/commands/{command_id}",
+        headers=operator_headers
+    )
+    command = load_json(get_response)
+    assert command["status"] == "completed"
+    assert command["result"] == {"message": "pong"}
+    assert command["acknowledged_at"] is not None
+    assert command["completed_at"] is not None
+
+
+async def test_list_commands_filtered_by_node(client: AsyncClient, operator_headers: Mapping[str, str]):
+    """Test listing commands for one node returns the matching page and total."""
+    for node_id in ("test-node-list-a", "test-node-list-b"):
+        await client.post(
+            "/api/v1/nodes/register",
+            json={"node_id": node_id, "node_type": "sensor"}
+        )
+        await client.post(
+            "/api/v1/commands",
+            json={"target_node_id": node_id, "command_type": "ping"},
+            headers=operator_headers
+        )
+
+    response = await client.get(
+        "/api/v1/commands",
+        params={"target_node_id": "test-node-list-a"},
+        headers=operator_headers
+    )
+    assert response.status_code == 200
+    data = load_json(response)
+    assert data["total"] == 1
+    assert len(data["commands"]) == 1
+
+    response = await client.get(
+        "/api/v1/commands",
+        params={"target_node_id": "missing-node"},
+        headers=operator_headers
+    )
+    assert load_json(response)["total"] == 0
+
+
+async def test_command_result_and_cancel(client: AsyncClient, operator_headers: Mapping[str, str]):
+    """Test reporting a result for one command and cancelling another."""
+    await client.post(
+        "/api/v1/nodes/register",
+        json={"node_id": "test-node-result", "node_type": "sensor"}
+    )
+    command_ids = []
+    for _ in range(2):
+        response = await client.post(
+            "/api/v1/commands",
+            json={"target_node_id": "test-node-result", "command_type": "ping"},
+            headers=operator_headers
+        )
+        command_ids.append(load_json(response)["id"])
+    done_id, pending_id = command_ids
+
+    response = await client.post(
+        f"/api/v1/commands/{done_id}/result",
+        json={"command_id": done_id, "status": "acknowledged"}
+    )
+    assert response.status_code == 200
+    acknowledged_at = load_json(response)["acknowledged_at"]
+    assert acknowledged_at is not None
+
+    response = await client.post(
+        f"/api/v1/commands/{done_id}/result",
+        json={"command_id": done_id, "status": "completed", "result": {"message": "pong"}}
+    )
+    assert response.status_code == 200
+    data = load_json(response)
+    assert data["status"] == "completed"
+    assert data["result"] == {"message": "pong"}
+    assert data["acknowledged_at"] == acknowledged_at
+    assert data["completed_at"] is not None
+
+    response = await client.delete(f"/api/v1/commands/{done_id}", headers=operator_headers)
+    assert response.status_code == 400
+
+    response = await client.delete(f"/api/v1/commands/{pending_id}", headers=operator_headers)
+    assert response.status_code == 204
+
+    response = await client.delete(f"/api/v1/commands/{pending_id}", headers=operator_headers)
+    assert response.status_code == 404
+
+    response = await client.post(
+        f"/api/v1/commands/{uuid.uuid4()}/result",
+        json={"command_id": pending_id, "status": "completed"}
+    )
+    assert response.status_code == 404
+
+
+async def test_list_commands_cursor_pagination(client: AsyncClient, operator_headers: Mapping[str, str], db_session):
+    """Test that following next_cursor visits every command exactly once."""
+    await client.post(
+        "/api/v1/nodes/register",
+        json={"node_id": "test-node-cursor", "node_type": "sensor"}
+    )
+    for _ in range(5):
+        await client.post(
+            "/api/v1/commands",
+            json={"target_node_id": "test-node-cursor", "command_type": "ping"},
+            headers=operator_headers
+        )
+    # Two commands share a timestamp so the id tiebreak is exercised
+    base = datetime(2024, 1, 1)
+    commands = (await db_session.execute(select(Command))).scalars().all()
+    for offset, command in zip((0, 1, 1, 2, 3), commands):
+        command.created_at = base + timedelta(seconds=offset)
+    await db_session.commit()
+
+    seen = []
+    params = {"page_size": 2}
+    while True:
+        response = await client.get("/api/v1/commands", params=params, headers=operator_headers)
+        assert response.status_code == 200
+        data = load_json(response)
+        assert data["total"] == 5
+        seen.extend(command["id"] for command in data["commands"])
+        if data["next_cursor"] is None:
+            break
+        params["cursor"] = data["next_cursor"]
+
+    assert len(seen) == 5
+    assert set(seen) == {str(command.id) for command in commands}
+
+    response = await client.get(
+        "/api/v1/commands", params={"cursor": "not-a-cursor"}, headers=operator_headers
+    )
+    assert response.status_code == 400
+
+
+async def test_list_commands_cursor_pagination_server_timestamps(client: AsyncClient, operator_headers: Mapping[str, str]):
+    """Test that next_cursor advances over database-generated created_at values."""
+    await client.post(
+        "/api/v1/nodes/register",
+        json={"node_id": "test-node-cursor-server", "node_type": "sensor"}
+    )
+    created = []
+    for _ in range(7):
+        response = await client.post(
+            "/api/v1/commands",
+            json={"target_node_id": "test-node-cursor-server", "command_type": "ping"},
+            headers=operator_headers
+        )
+        created.append(load_json(response)["id"])
+    
+    seen = []
+    params = {"page_size": 2}
+    while len(seen) <= len(created):
+        response = await client.get("/api/v1/commands", params=params, headers=operator_headers)
+        data = load_json(response)
+        seen.extend(command["id"] for command in data["commands"])
+        if data["next_cursor"] is None:
+            break
+        params["cursor"] = data["next_cursor"]
+    
+    assert sorted(seen) == sorted(created)
@@ -0,0 +1,64 @@
+# Copyright 2024 TacticalMesh Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Configuration API tests for TacticalMesh.
+"""
+
+from typing import Mapping
+
+from httpx import AsyncClient
+
+from .conftest import load_json
+
+
+async def test_node_scoped_config_lifecycle(client: AsyncClient, operator_headers: Mapping[str, str]):
+    """Test creating, reading, updating and deleting a node-scoped config."""
+    await client.post(
+        "/api/v1/nodes/register",
+        json={"node_id": "test-node-config", "node_type": "sensor"}
+    )
+
+    response = await client.put(
+        "/api/v1/config/interval",
+        json={"key": "interval", "value": 30, "scope": "node", "node_id": "test-node-config"},
+        headers=operator_headers
+    )
+    assert response.status_code == 200
+
+    response = await client.put(
+        "/api/v1/config/interval",
+        json={"key": "interval", "value": 60, "scope": "node", "node_id": "test-node-config"},
+        headers=operator_headers
+    )
+    assert response.status_code == 200
+    assert load_json(response)["value"] == 60
+
+    response = await client.get(
+        "/api/v1/config/interval",
+        params={"node_id": "test-node-config"},
+        headers=operator_headers
+    )
+    assert response.status_code == 200
+    assert load_json(response)["value"] == 60
+
+    response = await client.get(
+        "/api/v1/config",
+        params={"node_id": "test-node-config"},
+        headers=operator_headers
+    )
+    assert load_json(response)["total"] == 1
+
+    response = await client.get(
+        "/api/v1/config/interval",
+        params={"node_id": "missing-node"},
+        headers=operator_headers
+    )
+    assert response.status_code == 404
+    assert "Node not found" in load_json(response)["detail"]
+
+    response = await client.delete(
+        "/api/v1/config/interval",
+        params={"node_id": "test-node-config"},
+        headers=operator_headers
+    )
+    assert response.status_code == 204
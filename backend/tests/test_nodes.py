@@ -4,31 +4,59 @@
 Node API tests for TacticalMesh.
 """
 
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Mapping
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from backend.database import Base
+from backend.models import Command, CommandStatus, CommandType, Node, NodeStatus
+from backend.routers.nodes import (
+    _HEARTBEAT_COLUMNS,
+    _HEARTBEAT_UPDATE_AND_DISPATCH,
+    mark_stale_nodes_offline,
+)
+
+from .conftest import load_json, register_nodes
+
+# Throwaway PostgreSQL database for the postgres-marked tests; they create
+# and drop the whole schema
+POSTGRES_URL = os.environ.get("TM_TEST_POSTGRES_URL")
+
 
+def heartbeat_params(node_id: str, now: datetime) -> dict:
+    """Bind parameters the heartbeat route passes to its statements."""
+    params = {"heartbeat_node_id": node_id, "now": now}
+    for column in _HEARTBEAT_COLUMNS:
+        params[f"new_{column}"] = 1.0
+    return params
 
-@pytest.mark.asyncio
-async def test_health_check(client: AsyncClient):
-    """Test health check endpoint."""
-    response = await client.get("/health")
+
+async def test_health_check(asgi_client: AsyncClient):
+    """Test health check endpoint; needs no database, so skips the client fixture."""
+    response = await asgi_client.get("/health")
     assert response.status_code == 200
-    data = response.json()
+    data = load_json(response)
     assert data["status"] == "healthy"
     assert "version" in data
 
 
-@pytest.mark.asyncio
-async def test_root_endpoint(client: AsyncClient):
+async def test_root_endpoint(asgi_client: AsyncClient):
     """Test root endpoint."""
-    response = await client.get("/")
+    response = await asgi_client.get("/")
     assert response.status_code == 200
-    data = response.json()
+    data = load_json(response)
     assert "name" in data
     assert "version" in data
 
 
-@pytest.mark.asyncio
 async def test_register_node(client: AsyncClient):
     """Test node registration."""
     response = await client.post(
@@ -41,13 +69,12 @@ async def test_register_node(client: AsyncClient):
         }
     )
     assert response.status_code == 201
-    data = response.json()
+    data = load_json(response)
     assert data["node_id"] == "test-node-001"
     assert "auth_token" in data
     assert "id" in data
 
 
-@pytest.mark.asyncio
 async def test_node_heartbeat(client: AsyncClient):
     """Test node heartbeat."""
     # First register a node
@@ -74,20 +101,35 @@ async def test_node_heartbeat(client: AsyncClient):
         }
     )
     assert hb_response.status_code == 200
-    data = hb_response.json()
+    data = load_json(hb_response)
     assert data["acknowledged"] is True
     assert "server_time" in data
 
 
-@pytest.mark.asyncio
+async def test_node_heartbeat_rejects_invalid_body(client: AsyncClient):
+    """Test that heartbeat validation errors are reported as 422."""
+    response = await client.post(
+        "/api/v1/nodes/heartbeat",
+        json={"node_id": "test-node-invalid", "cpu_usage": 150}
+    )
+    assert response.status_code == 422
+    assert load_json(response)["detail"][0]["loc"] == ["body", "cpu_usage"]
+    
+    response = await client.post(
+        "/api/v1/nodes/heartbeat",
+        content=b"{not json",
+        headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 422
+
+
 async def test_list_nodes_requires_auth(client: AsyncClient):
     """Test that listing nodes requires authentication."""
     response = await client.get("/api/v1/nodes")
     assert response.status_code == 403
 
 
-@pytest.mark.asyncio
-async def test_list_nodes_with_auth(client: AsyncClient, admin_token: str):
+async def test_list_nodes_with_auth(client: AsyncClient, admin_headers: Mapping[str, str]):
     """Test listing nodes with authentication."""
     # Register a node first
     await client.post(
@@ -102,10 +144,265 @@ async def test_list_nodes_with_auth(client: AsyncClient, admin_token: str):
     # List nodes with auth
     response = await client.get(
         "/api/v1/nodes",
-        headers={"Authorization": f"Bearer {admin_token}"}
+        headers=admin_headers
     )
     assert response.status_code == 200
-    data = response.json()
+    data = load_json(response)
     assert "nodes" in data
     assert "total" in data
     assert len(data["nodes"]) >= 1
+
+
+async def test_heartbeat_delivers_pending_commands(client: AsyncClient, operator_headers: Mapping[str, str]):
+    """Test that a heartbeat returns pending commands once and marks them sent."""
+    await client.post(
+        "/api/v1/nodes/register",
+        json={"node_id": "test-node-dispatch", "node_type": "sensor"}
+    )
+    create_response = await client.post(
+        "/api/v1/commands",
+        json={"target_node_id": "test-node-dispatch", "command_type": "ping"},
+        headers=operator_headers
+    )
+    command_id = load_json(create_response)["id"]
+    
+    hb_response = await client.post(
+        "/api/v1/nodes/heartbeat",
+        json={"node_id": "test-node-dispatch", "cpu_usage": 10.0}
+    )
+    assert hb_response.status_code == 200
+    assert [c["id"] for c in load_json(hb_response)["pending_commands"]] == [command_id]
+    
+    hb_response = await client.post(
+        "/api/v1/nodes/heartbeat",
+        json={"node_id": "test-node-dispatch"}
+    )
+    assert load_json(hb_response)["pending_commands"] == []
+    
+    command = load_json(await client.get(f"/api/v1/commands/{command_id}", headers=operator_headers))
+    assert command["status"] == "sent"
+    assert command["sent_at"] is not None
+    
+    hb_response = await client.post(
+        "/api/v1/nodes/heartbeat",
+        json={"node_id": "missing-node"}
+    )
+    assert hb_response.status_code == 404
+
+
+async def test_mark_stale_nodes_offline(db_session):
+    """Test that only online nodes past the heartbeat timeout go offline."""
+    now = datetime.utcnow()
+    stale = Node(node_id="test-node-stale", status=NodeStatus.ONLINE,
+                 last_heartbeat=now - timedelta(days=1))
+    fresh = Node(node_id="test-node-fresh", status=NodeStatus.ONLINE, last_heartbeat=now)
+    db_session.add_all([stale, fresh])
+    await db_session.commit()
+    
+    assert await mark_stale_nodes_offline(db_session) == 1
+    
+    await db_session.refresh(stale)
+    await db_session.refresh(fresh)
+    assert stale.status == NodeStatus.OFFLINE
+    assert fresh.status == NodeStatus.ONLINE
+
+
+async def test_server_timestamp_compares_with_bound_value(db_session):
+    """Test that a server-generated timestamp matches itself when bound back."""
+    node = Node(node_id="test-node-timestamp", node_type="sensor")
+    db_session.add(node)
+    await db_session.commit()
+    await db_session.refresh(node)
+    
+    result = await db_session.execute(
+        select(func.count()).select_from(Node).where(
+            Node.node_id == node.node_id,
+            Node.registered_at >= node.registered_at,
+            Node.registered_at <= node.registered_at
+        )
+    )
+    assert result.scalar_one() == 1
+
+
+async def test_list_nodes_total_with_filters(client: AsyncClient, admin_headers: Mapping[str, str]):
+    """Test that the total reflects filters, including past the last page."""
+    await register_nodes(client, [
+        {"node_id": f"test-node-total-{i}", "node_type": node_type}
+        for i, node_type in enumerate(["uas", "uas", "sensor"])
+    ])
+    
+    response = await client.get(
+        "/api/v1/nodes",
+        params={"node_type": "uas", "page_size": 1},
+        headers=admin_headers
+    )
+    assert load_json(response)["total"] == 2
+    assert len(load_json(response)["nodes"]) == 1
+    
+    response = await client.get(
+        "/api/v1/nodes",
+        params={"node_type": "uas", "page": 5},
+        headers=admin_headers
+    )
+    assert load_json(response)["total"] == 2
+    assert load_json(response)["nodes"] == []
+
+
+async def test_list_nodes_cursor_pagination(client: AsyncClient, admin_headers: Mapping[str, str], db_session):
+    """Test that following next_cursor visits every node exactly once."""
+    # Two nodes share a timestamp so the id tiebreak is exercised
+    base = datetime(2024, 1, 1)
+    nodes = [
+        Node(
+            node_id=f"test-node-page-{i}",
+            node_type="sensor",
+            registered_at=base + timedelta(seconds=offset)
+        )
+        for i, offset in enumerate((0, 1, 1, 2, 3))
+    ]
+    db_session.add_all(nodes)
+    await db_session.commit()
+    
+    seen = []
+    params = {"page_size": 2}
+    while True:
+        response = await client.get("/api/v1/nodes", params=params, headers=admin_headers)
+        assert response.status_code == 200
+        data = load_json(response)
+        assert data["total"] == 5
+        seen.extend(node["node_id"] for node in data["nodes"])
+        if data["next_cursor"] is None:
+            break
+        params["cursor"] = data["next_cursor"]
+    
+    assert len(seen) == 5
+    assert set(seen) == {node.node_id for node in nodes}
+    assert seen[0] == "test-node-page-4"
+
+
+async def test_list_nodes_cursor_pagination_server_timestamps(client: AsyncClient, admin_headers: Mapping[str, str]):
+    """Test that next_cursor advances over database-generated registered_at values."""
+    await register_nodes(client, [
+        {"node_id": f"test-node-seek-{i}", "node_type": "sensor"} for i in range(7)
+    ])
+    
+    seen = []
+    params = {"page_size": 2}
+    while len(seen) <= 7:
+        response = await client.get("/api/v1/nodes", params=params, headers=admin_headers)
+        data = load_json(response)
+        seen.extend(node["node_id"] for node in data["nodes"])
+        if data["next_cursor"] is None:
+            break
+        params["cursor"] = data["next_cursor"]
+    
+    assert sorted(seen) == [f"test-node-seek-{i}" for i in range(7)]
+
+
+async def test_delete_node(client: AsyncClient, operator_headers: Mapping[str, str]):
+    """Test deleting a node, then deleting it again."""
+    await client.post(
+        "/api/v1/nodes/register",
+        json={"node_id": "test-node-delete", "node_type": "sensor"}
+    )
+    
+    response = await client.delete("/api/v1/nodes/test-node-delete", headers=operator_headers)
+    assert response.status_code == 204
+    
+    response = await client.get("/api/v1/nodes/test-node-delete", headers=operator_headers)
+    assert response.status_code == 404
+    
+    response = await client.delete("/api/v1/nodes/test-node-delete", headers=operator_headers)
+    assert response.status_code == 404
+
+
+def test_heartbeat_cte_compiles_for_postgresql():
+    """Test the PostgreSQL heartbeat statement's shape, binds and status transitions."""
+    compiled = _HEARTBEAT_UPDATE_AND_DISPATCH.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    
+    def bound(prefix: str):
+        name = re.search(re.escape(prefix) + r"%\((\w+)\)s", sql).group(1)
+        return compiled.params[name]
+    
+    assert sql.startswith("WITH updated_node AS")
+    assert "RETURNING nodes.id)" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert [column.name for column in _HEARTBEAT_UPDATE_AND_DISPATCH.selected_columns] == [
+        "id", "command_id", "command_type", "payload", "created_at"
+    ]
+    
+    # Node goes ONLINE; its PENDING commands become SENT
+    assert bound("UPDATE nodes SET status=") == NodeStatus.ONLINE
+    assert bound("UPDATE commands SET status=") == CommandStatus.SENT
+    assert bound("commands.status = ") == CommandStatus.PENDING
+    assert bound("LIMIT ") == 10
+    
+    # Every parameter the route sends has a bind to land in
+    assert heartbeat_params("node", datetime.utcnow()).keys() <= compiled.params.keys()
+
+
+@pytest.mark.postgres
+@pytest.mark.skipif(not POSTGRES_URL, reason="TM_TEST_POSTGRES_URL is not set")
+async def test_heartbeat_cte_on_postgresql():
+    """Test the heartbeat CTE against a real PostgreSQL database."""
+    engine = create_async_engine(POSTGRES_URL, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            node = Node(node_id="pg-heartbeat", node_type="sensor", status=NodeStatus.OFFLINE)
+            session.add(node)
+            await session.flush()
+            created = datetime(2024, 1, 1)
+            commands = [
+                Command(
+                    target_node_id=node.id,
+                    command_type=CommandType.PING,
+                    status=CommandStatus.PENDING,
+                    created_at=created + timedelta(seconds=i)
+                )
+                for i in range(12)
+            ]
+            session.add_all(commands)
+            await session.flush()
+            
+            now = datetime(2024, 1, 2)
+            rows = (await session.execute(
+                _HEARTBEAT_UPDATE_AND_DISPATCH, heartbeat_params("pg-heartbeat", now)
+            )).all()
+            assert {row.id for row in rows} == {node.id}
+            assert {row.command_id for row in rows} == {command.id for command in commands[:10]}
+            
+            counts = dict((await session.execute(
+                select(Command.status, func.count()).group_by(Command.status)
+            )).all())
+            assert counts == {CommandStatus.SENT: 10, CommandStatus.PENDING: 2}
+            
+            await session.refresh(node)
+            assert node.status == NodeStatus.ONLINE
+            assert node.last_heartbeat == now
+            assert node.cpu_usage == 1.0
+            
+            # The rest are dispatched next; after that the node row comes alone
+            rows = (await session.execute(
+                _HEARTBEAT_UPDATE_AND_DISPATCH, heartbeat_params("pg-heartbeat", now)
+            )).all()
+            assert {row.command_id for row in rows} == {command.id for command in commands[10:]}
+            rows = (await session.execute(
+                _HEARTBEAT_UPDATE_AND_DISPATCH, heartbeat_params("pg-heartbeat", now)
+            )).all()
+            assert [(row.id, row.command_id) for row in rows] == [(node.id, None)]
+            
+            # Unknown nodes update nothing and return no rows
+            rows = (await session.execute(
+                _HEARTBEAT_UPDATE_AND_DISPATCH, heartbeat_params("no-such-node", now)
+            )).all()
+            assert rows == []
+            
+            await session.rollback()
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
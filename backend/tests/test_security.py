@@ -0,0 +1,215 @@
+# Copyright 2024 TacticalMesh Contributors
+# SPDX-License-Identifier: Apache-2.0
+"""
+Security control tests for TacticalMesh.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+
+from backend import security
+from backend.security import (
+    AccountLockoutManager,
+    PasswordValidator,
+    SlidingWindowLimiter,
+    TokenRevocationList,
+)
+
+
+def make_request(ip: str) -> Request:
+    """Build a bare request from the given client address."""
+    return Request({"type": "http", "headers": [], "client": (ip, 12345)})
+
+
+@pytest_asyncio.fixture
+async def redis_security(monkeypatch):
+    """Attach the module's security state to an in-process fake Redis."""
+    monkeypatch.setattr(security, "Redis", fakeredis.FakeAsyncRedis)
+    await security.init_redis("redis://fake:6379/0")
+    assert security.redis_client is not None
+    await security.redis_client.flushall()
+    yield security.redis_client
+    await security.close_redis()
+
+
+async def assert_sliding_window(limiter: SlidingWindowLimiter, monkeypatch) -> None:
+    """Exercise the limit, rate limit headers and window sliding of a limiter."""
+    now = 1000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+    
+    for remaining in ("1", "0"):
+        response = Response()
+        await limiter(make_request("10.0.0.1"), response)
+        assert response.headers["X-RateLimit-Limit"] == "2"
+        assert response.headers["X-RateLimit-Remaining"] == remaining
+    
+    with pytest.raises(HTTPException) as exc_info:
+        await limiter(make_request("10.0.0.1"), Response())
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers["Retry-After"] == "60"
+    assert exc_info.value.headers["X-RateLimit-Limit"] == "2"
+    assert exc_info.value.headers["X-RateLimit-Remaining"] == "0"
+    
+    # Other clients have their own window
+    await limiter(make_request("10.0.0.2"), Response())
+    
+    # Half a window on, the first client's hits still count
+    now += 30
+    with pytest.raises(HTTPException):
+        await limiter(make_request("10.0.0.1"), Response())
+    
+    # Once they slide out of the window the client may send again
+    now += 30
+    response = Response()
+    await limiter(make_request("10.0.0.1"), response)
+    assert response.headers["X-RateLimit-Remaining"] == "1"
+
+
+async def test_sliding_window_limiter_in_memory(monkeypatch):
+    """Test that the limiter allows `limit` requests per window per client IP."""
+    await assert_sliding_window(SlidingWindowLimiter("test", 2, 60), monkeypatch)
+
+
+async def test_sliding_window_limiter_redis(redis_security, monkeypatch):
+    """Test the Redis-backed limiter against the same window rules."""
+    await assert_sliding_window(SlidingWindowLimiter("test", 2, 60), monkeypatch)
+    assert await redis_security.exists("rl:test:10.0.0.1")
+
+
+async def test_sliding_window_limiter_bounds_memory(monkeypatch):
+    """Test that idle clients are swept and the client table is capped."""
+    now = 1000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+    limiter = SlidingWindowLimiter("test", 2, 60)
+    monkeypatch.setattr(limiter, "MAX_CLIENTS", 3)
+    
+    for i in range(5):
+        await limiter(make_request(f"10.0.0.{i}"), Response())
+    assert list(limiter._windows) == [f"rl:test:10.0.0.{i}" for i in (2, 3, 4)]
+    
+    now += 60
+    await limiter(make_request("10.0.1.1"), Response())
+    assert list(limiter._windows) == ["rl:test:10.0.1.1"]
+
+
+async def test_account_lockout_in_memory():
+    """Test that an account locks after MAX_FAILED_ATTEMPTS and clears on success."""
+    manager = AccountLockoutManager()
+    
+    for _ in range(manager.MAX_FAILED_ATTEMPTS - 1):
+        assert await manager.record_failed_attempt("alice") is False
+    assert await manager.get_remaining_attempts("alice") == 1
+    assert await manager.get_remaining_attempts("bob") == manager.MAX_FAILED_ATTEMPTS
+    
+    assert await manager.record_failed_attempt("alice") is True
+    assert await manager.is_locked_out("alice")
+    assert 0 < await manager.get_lockout_remaining("alice") <= manager.LOCKOUT_DURATION_MINUTES * 60
+    assert not await manager.is_locked_out("bob")
+    
+    await manager.clear_attempts("alice")
+    assert not await manager.is_locked_out("alice")
+    assert await manager.get_lockout_remaining("alice") is None
+
+
+async def test_failed_attempts_reset_after_window(monkeypatch):
+    """Test that the failure count starts over once the window has passed."""
+    manager = AccountLockoutManager()
+    now = 1000.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    
+    for _ in range(manager.MAX_FAILED_ATTEMPTS - 1):
+        await manager.record_failed_attempt("alice")
+    assert await manager.get_remaining_attempts("alice") == 1
+    
+    now += manager.LOCKOUT_DURATION_MINUTES * 60
+    assert await manager.get_remaining_attempts("alice") == manager.MAX_FAILED_ATTEMPTS
+    assert await manager.record_failed_attempt("alice") is False
+    assert await manager.get_remaining_attempts("alice") == manager.MAX_FAILED_ATTEMPTS - 1
+
+
+def test_blocked_login_audit_is_sampled():
+    """Test that audit entries for a locked account are capped per window."""
+    manager = AccountLockoutManager()
+    
+    allowed = [manager.should_audit_blocked("alice") for _ in range(10)]
+    assert allowed.count(True) == manager.BLOCKED_AUDIT_LIMIT
+    assert manager.should_audit_blocked("bob")
+
+
+def test_password_validator_reports_each_missing_class():
+    """Test that every missing character class is reported."""
+    assert PasswordValidator.validate("Str0ng!pass") == (True, [])
+    
+    is_valid, errors = PasswordValidator.validate("lowercase")
+    assert not is_valid
+    assert len(errors) == 3
+    assert any("uppercase" in error for error in errors)
+    assert any("digit" in error for error in errors)
+    assert any("special" in error for error in errors)
+
+
+def test_token_revocation_drops_expired_entries():
+    """Test that revoked tokens are forgotten once they expire."""
+    revocations = TokenRevocationList()
+    now = datetime.utcnow()
+    
+    revocations.revoke("live", now + timedelta(hours=1))
+    revocations.revoke("expired", now - timedelta(seconds=1))
+    assert revocations.is_revoked("live")
+    assert not revocations.is_revoked("expired")
+    
+    # Re-revoking with a later expiry outlives the earlier heap entry
+    revocations.revoke("live", now + timedelta(hours=2))
+    revocations._cleanup_expired()
+    assert revocations.is_revoked("live")
+
+
+async def test_account_lockout_redis(redis_security):
+    """Test that lockout counters live in Redis and report the key's real TTL."""
+    manager = security.lockout_manager
+    key = manager.KEY_PREFIX + "alice"
+    
+    for _ in range(manager.MAX_FAILED_ATTEMPTS - 1):
+        assert await manager.record_failed_attempt("alice") is False
+    assert await redis_security.get(key) == str(manager.MAX_FAILED_ATTEMPTS - 1)
+    assert await manager.get_remaining_attempts("alice") == 1
+    assert not await manager.is_locked_out("alice")
+    assert await manager.get_lockout_remaining("alice") is None
+    
+    assert await manager.record_failed_attempt("alice") is True
+    assert await manager.is_locked_out("alice")
+    assert not await manager.is_locked_out("bob")
+    
+    # The window opened at the first failure; the lock lasts only what is left of it
+    await redis_security.pexpire(key, 300_500)
+    assert await manager.get_lockout_remaining("alice") == 301
+    
+    await manager.clear_attempts("alice")
+    assert not await manager.is_locked_out("alice")
+    assert await redis_security.exists(key) == 0
+
+
+async def test_close_redis_restores_in_memory_state(redis_security):
+    """Test that closing Redis puts the limiter and lockout state back in memory."""
+    await security.close_redis()
+    assert security.redis_client is None
+    assert security._rate_limit_script is None
+    assert security.lockout_manager._redis is None
+    
+    # Closing again is a no-op
+    await security.close_redis()
+
+
+async def test_init_redis_falls_back_when_unreachable():
+    """Test that an unreachable Redis leaves security state in memory."""
+    await security.init_redis("redis://127.0.0.1:1/0")
+    assert security.redis_client is None
+    assert security._rate_limit_script is None
+    assert security.lockout_manager._redis is None
@@ -1,10 +0,0 @@
-# Copyright 2024 TacticalMesh Contributors
-# SPDX-License-Identifier: Apache-2.0
-"""Pytest configuration."""
-
-import sys
-from pathlib import Path
-
-# Add the project root to the Python path
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))